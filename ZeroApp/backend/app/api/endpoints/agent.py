@@ -1,19 +1,22 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List
 from app.core.void_engine import VoidEngine
 from app.api.deps import get_engine
 from app.services.agent.researcher import ResearchAgent
 from app.services.agent.writer import WriterAgent
 from app.services.agent.zero_agent import ZeroAgent
+from app.services.agent.batch_runner import BatchRunner
 from app.services.file_manager import FileManager
 from app.services.history_service import history_service
-from app.models.agent import TrendReport, WritingMethod, SearchResult, ScriptRefinementRequest, SaveDraftRequest, ChatRequest, ChatResponse
+from app.models.agent import TrendReport, WritingMethod, SearchResult, ScriptRefinementRequest, SaveDraftRequest, ChatRequest, ChatResponse, BatchRequest
 
 router = APIRouter()
 researcher = ResearchAgent()
 writer = WriterAgent()
 zero_agent = ZeroAgent()
 file_manager = FileManager()
+batch_runner = BatchRunner(zero_agent)
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
@@ -85,6 +88,26 @@ async def chat(
     
     return response
 
+@router.post("/batch")
+async def batch_chat(
+    request: BatchRequest,
+    engine: VoidEngine = Depends(get_engine)
+):
+    """
+    Run many independent (stateless) chats through the agent loop.
+    Streams NDJSON: one line per item as soon as it finishes, with timings and token usage.
+    Re-post with the same batch_id after a disconnect to resume; finished items are replayed.
+    """
+    try:
+        run, items = batch_runner.prepare(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        batch_runner.stream(run, items, default_module=request.module_name),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/status")
 async def get_agent_status(engine: VoidEngine = Depends(get_engine)):
     status = engine.get_status()
@@ -2,13 +2,15 @@ from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from app.core.void_engine import VoidEngine, Fuel, FuelType
 from app.api.deps import get_engine, save_engine_state
+from app.core.config import settings
+from app.core.entropy import entropy_estimator
 from app.core.llm import LLMFactory
+from app.core.sse import coalesce_deltas, sse_frame
 from app.services.agent.zero_agent import ZeroAgent
 from app.services.history_service import HistoryService
 from pydantic import BaseModel
 from typing import Optional
 import os
-import json
 from datetime import datetime
 
 router = APIRouter()
@@ -20,6 +22,9 @@ class ChatRequest(BaseModel):
     fuel_type: str = "daily_chat" # default
     module_name: str = "default"
     conversation_id: Optional[str] = None
+    # /stream only: merge content_delta frames within this window / size (None = server default, 0 = off)
+    coalesce_ms: Optional[int] = None
+    coalesce_bytes: Optional[int] = None
 
 @router.get("/modules")
 async def get_modules():
@@ -43,10 +48,8 @@ async def send_message(request: ChatRequest, engine: VoidEngine = Depends(get_en
     except ValueError:
         f_type = FuelType.DAILY_CHAT
 
-    # 2. Estimate Entropy (Mock for now, length/complexity based)
-    entropy = min(1.0, len(request.message) / 100.0)
-    if "help" in request.message or "error" in request.message:
-        entropy += 0.3
+    # 2. Estimate Entropy (symbol entropy + compressibility)
+    entropy = entropy_estimator.estimate(request.message)
 
     # 3. Create Fuel
     fuel = Fuel(type=f_type, content=request.message, entropy_score=entropy)
@@ -101,7 +104,9 @@ Instructions:
                 messages=messages,
                 temperature=0.7,
                 max_tokens=200,
-                extra_headers={"Authorization": f"Bearer {client.api_key}"}
+                cache=True, # Identical one-shot messages get the cached reply
+                semantic_scope=f"chat_send:{request.module_name}",
+                caller="chat_send"
             )
             agent_response = completion.choices[0].message.content
         except Exception as e:
@@ -133,7 +138,7 @@ async def stream_chat(
     except:
         f_type = FuelType.DAILY_CHAT
     
-    fuel = Fuel(type=f_type, content=request.message, entropy_score=0.1)
+    fuel = Fuel(type=f_type, content=request.message, entropy_score=entropy_estimator.estimate(request.message))
     engine.ingest(fuel)
     save_engine_state()
     
@@ -182,19 +187,24 @@ async def stream_chat(
     if request.conversation_id:
         background_tasks.add_task(history_service.generate_tags, request.conversation_id)
 
+    window_ms = request.coalesce_ms if request.coalesce_ms is not None else settings.SSE_COALESCE_MS
+    max_bytes = request.coalesce_bytes if request.coalesce_bytes is not None else settings.SSE_COALESCE_BYTES
+
     async def event_generator():
+        events = zero_agent.chat_generator(
+            messages, 
+            module_name=request.module_name, 
+            context_data=context_str if context_str else None,
+            conversation_id=request.conversation_id,
+            history_service=history_service
+        )
         try:
-            async for event in zero_agent.chat_generator(
-                messages, 
-                module_name=request.module_name, 
-                context_data=context_str if context_str else None,
-                conversation_id=request.conversation_id,
-                history_service=history_service
-            ):
-                yield f"data: {json.dumps(event)}\n\n"
+            # Fast models emit one chunk per token; merging them saves frames, packets and re-renders
+            async for event in coalesce_deltas(events, window_ms, max_bytes):
+                yield sse_frame(event)
         except Exception as e:
             error_event = {"type": "error", "content": str(e)}
-            yield f"data: {json.dumps(error_event)}\n\n"
+            yield sse_frame(error_event)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -224,26 +234,27 @@ async def upload_file(
         fuel_type = FuelType.COMPLEX_CODE
         try:
             text_content = content_bytes.decode("utf-8")
-            # Calculate entropy based on code length/complexity
-            entropy = min(1.0, len(text_content) / 1000.0)
+            entropy = entropy_estimator.estimate(text_content)
             preview = text_content[:500]
             fuel_content = f"[Code File: {filename}]\n{preview}..."
         except:
+            entropy = entropy_estimator.estimate(content_bytes)
             fuel_content = f"[Binary Code File: {filename}]"
     
     elif is_image:
         fuel_type = FuelType.FRESH_TRENDS
-        # Images are considered high entropy visual data
-        entropy = 0.9 
+        # Encoded images are already compressed: close to random bytes, so this lands near 1.0
+        entropy = entropy_estimator.estimate(content_bytes)
         fuel_content = f"[Visual Data: {filename}] Size: {file_size} bytes"
         
     else:
         # Generic file
         try:
             text_content = content_bytes.decode("utf-8")
-            entropy = min(1.0, len(text_content) / 500.0)
+            entropy = entropy_estimator.estimate(text_content)
             fuel_content = f"[Text File: {filename}]\n{text_content[:200]}..."
         except:
+            entropy = entropy_estimator.estimate(content_bytes)
             fuel_content = f"[Binary File: {filename}] Size: {file_size} bytes"
 
     # 2. Ingest
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from app.core.void_engine import VoidEngine, Fuel, FuelType
 from app.api.deps import get_engine, save_engine_state
+from app.core.entropy import entropy_estimator
 from app.services.file_reader import FileReader
 import os
 
@@ -32,11 +33,8 @@ async def upload_file(
 
         final_content_msg = f"[File Uploaded: {file.filename}]\n[Type: {result['type']}]\n[Method: {read_method}]\n\n--- CONTENT START ---\n{content_preview}\n--- CONTENT END ---"
         
-        # 3. Calculate Entropy
-        # ZERO_PROTOCOL UPDATE: User intent is the highest form of entropy.
-        # Even a small file (like a secret key or a haiku) has high value if the user sends it.
-        # Base entropy 0.8 (High Interest) + Bonus for content density
-        entropy = 0.8 + min(0.2, len(content_extracted) / 10000.0)
+        # 3. Calculate Entropy from the content's measured information density
+        entropy = entropy_estimator.estimate(content_extracted)
         
         # 4. Ingest into Engine
         fuel_type = FuelType.COMPLEX_CODE if "code" in result["read_method"] or result["type"] in ['.py', '.js', '.ts'] else FuelType.FRESH_TRENDS
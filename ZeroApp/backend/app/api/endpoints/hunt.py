@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.core.void_engine import VoidEngine, Fuel, FuelType
 from app.api.deps import get_engine, save_engine_state
+from app.core.entropy import entropy_estimator
 from app.services.tavily_service import tavily_service
 
 router = APIRouter()
@@ -26,9 +27,9 @@ async def trigger_hunt(topic: str = "latest tech trends", engine: VoidEngine = D
     reaction_log = []
     
     for res in results:
-        # Calculate entropy based on content length and complexity (Mock)
+        # Calculate entropy from the content's symbol entropy and compressibility
         content = res.get("content", "")
-        entropy = min(1.0, len(content) / 200.0) 
+        entropy = entropy_estimator.estimate(content)
         
         # Inject calculated entropy into the result for frontend display
         res["entropy"] = entropy
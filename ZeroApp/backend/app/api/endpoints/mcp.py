@@ -1,23 +1,53 @@
+import asyncio
+import json
+import math
+import time
 from fastapi import APIRouter, HTTPException, Body
-from typing import List, Dict, Any, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Any, Optional
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.core.mcp.manager import mcp_manager
+from app.core.mcp.policy import CircuitOpenError
 
 router = APIRouter()
 
 class ServerConfig(BaseModel):
     name: str
-    command: str
+    command: Optional[str] = None # Required unless transport is "http"
     args: List[str] = []
     env: Optional[Dict[str, str]] = None
     enabled: bool = True
+    idempotent_tools: List[str] = [] # Concurrent identical calls to these share one execution
+    lifecycle: str = "eager" # "lazy": spawned on first call, stopped when idle
+    replicas: int = 1 # Subprocesses to run; calls go to the least busy one
+    transport: str = "stdio" # "inprocess": import a first-party Python server into the backend; "http": shared server at url
+    url: Optional[str] = None # Streamable HTTP endpoint, e.g. http://127.0.0.1:8931/mcp
+    headers: Optional[Dict[str, str]] = None # Sent with every HTTP request (e.g. Authorization)
+    idle_timeout: Optional[float] = None # Seconds, lazy servers only (default: MCP_IDLE_TIMEOUT)
+    startup_timeout: Optional[float] = None # Seconds (default: MCP_STARTUP_TIMEOUT)
+    on_unavailable: Optional[str] = None # Calls during a reconnect: "queue" or "fail" (default: MCP_ON_UNAVAILABLE)
+    queue_timeout: Optional[float] = None # Seconds a queued call waits (default: MCP_QUEUE_TIMEOUT)
+    timeout: Optional[float] = None # Seconds per tool call (default: MCP_TOOL_TIMEOUT)
+    max_concurrency: Optional[int] = None # Calls in flight (default: MCP_MAX_CONCURRENCY, 0 = unlimited)
+    circuit_breaker: Optional[Dict[str, float]] = None # failure_ratio, min_calls, window, open_seconds, half_open_probes
+    tools: Optional[Dict[str, Dict[str, Any]]] = None # Per-tool timeout / max_concurrency / circuit_breaker
 
 class ToolCallRequest(BaseModel):
     server_name: str
     tool_name: str
     arguments: Optional[Dict[str, Any]] = None
 
+class BatchToolCall(BaseModel):
+    server: str
+    tool: str
+    arguments: Optional[Dict[str, Any]] = None
+
+class ToolCallBatchRequest(BaseModel):
+    calls: List[BatchToolCall]
+    stream: bool = False # NDJSON, one line per call as it finishes, then a summary
+
 @router.get("/servers")
 async def list_servers():
     """List all configured servers and their status"""
@@ -26,7 +56,9 @@ async def list_servers():
     
     result = []
     for name, cfg in servers.items():
-        status = "connected" if name in mcp_manager.clients else "disconnected"
+        # connecting | connected | reconnecting | idle (lazy, not running) | failed | disconnected | disabled
+        detail = mcp_manager.server_status(name)
+        status = detail.get("state", "disconnected")
         if not cfg.get("enabled", True):
             status = "disabled"
             
@@ -37,7 +69,8 @@ async def list_servers():
         result.append({
             "name": name,
             "config": cfg_with_name,
-            "status": status
+            "status": status,
+            "detail": detail
         })
     return result
 
@@ -50,8 +83,16 @@ async def add_server(config: ServerConfig):
         "command": config.command,
         "args": config.args,
         "env": config.env or {},
-        "enabled": config.enabled
+        "enabled": config.enabled,
+        "idempotent_tools": config.idempotent_tools,
+        "lifecycle": config.lifecycle,
+        "replicas": config.replicas,
+        "transport": config.transport
     }
+    for key in ("idle_timeout", "startup_timeout", "on_unavailable", "queue_timeout",
+                "timeout", "max_concurrency", "circuit_breaker", "tools", "url", "headers"):
+        if getattr(config, key) is not None:
+            server_entry[key] = getattr(config, key)
     
     if "servers" not in current_config:
         current_config["servers"] = {}
@@ -109,6 +150,66 @@ async def call_tool(request: ToolCallRequest):
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _run_batch_call(index: int, call: BatchToolCall) -> Dict[str, Any]:
+    """One batch item; failures become the item's error instead of failing the batch"""
+    item: Dict[str, Any] = {"index": index, "server": call.server, "tool": call.tool}
+    started = time.perf_counter()
+    try:
+        result = await mcp_manager.call_tool(call.server, call.tool, call.arguments)
+        item["status"] = "error" if getattr(result, "isError", False) else "ok"
+        item["result"] = result.model_dump(mode="json") if hasattr(result, "model_dump") else result
+    except ValueError as e:
+        item.update(status="error", error=str(e), error_type="not_found")
+    except CircuitOpenError as e:
+        item.update(status="error", error=str(e), error_type="circuit_open", retry_after=math.ceil(e.retry_after))
+    except Exception as e:
+        item.update(status="error", error=str(e), error_type=type(e).__name__)
+    item["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return item
+
+def _batch_summary(items: List[Dict[str, Any]], started: float) -> Dict[str, Any]:
+    failed = sum(1 for item in items if item["status"] != "ok")
+    return {
+        "completed": len(items) - failed,
+        "failed": failed,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+async def _stream_batch(tasks: List[asyncio.Task], started: float) -> AsyncIterator[str]:
+    done: List[Dict[str, Any]] = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            item = await finished
+            done.append(item)
+            yield json.dumps({"type": "result", **item}, ensure_ascii=False) + "\n"
+        yield json.dumps({"type": "done", **_batch_summary(done, started)}) + "\n"
+    finally:
+        # Client went away mid-batch: don't leave calls running for nobody
+        for task in tasks:
+            task.cancel()
+
+@router.post("/call_batch")
+async def call_tool_batch(request: ToolCallBatchRequest):
+    """
+    Run many tool calls in one request. Calls run concurrently, each within its server's
+    concurrency limit and breaker; results come back in request order with per-item
+    status, error and timing. With "stream": true, NDJSON lines arrive as calls finish
+    (each carries its "index"), followed by a "done" summary.
+    """
+    if not request.calls:
+        raise HTTPException(status_code=400, detail="No calls given")
+    if len(request.calls) > settings.MCP_BATCH_MAX_CALLS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MCP_BATCH_MAX_CALLS} calls per batch")
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(_run_batch_call(i, call)) for i, call in enumerate(request.calls)]
+    if request.stream:
+        return StreamingResponse(_stream_batch(tasks, started), media_type="application/x-ndjson")
+
+    items = await asyncio.gather(*tasks)
+    return {"results": items, **_batch_summary(items, started)}
@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Body, UploadFile, File, HTTPException
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from app.core.config import settings
+from app.core.llm import LLMFactory
+from app.core.llm_cache import llm_cache
+from app.core.semantic_cache import semantic_cache
+from app.core.prompt_prefix import prefix_tracker
+from app.core.llm_telemetry import llm_telemetry
 import shutil
 import os
 
@@ -12,10 +17,16 @@ class SettingsUpdate(BaseModel):
     llm_key: Optional[str] = None
     llm_base_url: Optional[str] = None
     llm_model: Optional[str] = None
+    llm_providers: Optional[List[Dict[str, Any]]] = None
     tavily_key: Optional[str] = None
     github_token: Optional[str] = None
     agent_bio: Optional[str] = None
 
+def mask_key(key: Optional[str]) -> str:
+    if not key or len(key) < 8:
+        return ""
+    return f"{key[:3]}...{key[-4:]}"
+
 @router.post("/avatar")
 async def upload_avatar(file: UploadFile = File(...)):
     """
@@ -41,16 +52,12 @@ async def get_settings():
     """
     Get current settings (Masked for security)
     """
-    def mask_key(key: str):
-        if not key or len(key) < 8:
-            return ""
-        return f"{key[:3]}...{key[-4:]}"
-
     return {
         "llm_provider": settings.LLM_PROVIDER,
         "llm_key": mask_key(settings.LLM_API_KEY),
         "llm_base_url": settings.LLM_BASE_URL,
         "llm_model": settings.LLM_MODEL,
+        "llm_providers": [{**p, "api_key": mask_key(p.get("api_key", ""))} for p in settings.LLM_PROVIDERS],
         "tavily_key": mask_key(settings.TAVILY_API_KEY),
         "github_token": mask_key(settings.GITHUB_TOKEN),
         "llm_configured": bool(settings.LLM_API_KEY),
@@ -64,11 +71,21 @@ async def update_settings(data: SettingsUpdate = Body(...)):
     """
     Update settings and save to disk
     """
+    if data.llm_providers is not None:
+        # The GET endpoint returns masked keys (short ones as ""); keep the stored key when
+        # one comes back exactly as it was masked
+        existing = {p.get("name"): p for p in settings.LLM_PROVIDERS}
+        for p in data.llm_providers:
+            stored = existing.get(p.get("name"), {}).get("api_key") or ""
+            submitted = p.get("api_key") or ""
+            p["api_key"] = stored if stored and submitted == mask_key(stored) else submitted
+
     settings.save_user_settings(
         llm_provider=data.llm_provider,
         llm_key=data.llm_key,
         llm_base_url=data.llm_base_url,
         llm_model=data.llm_model,
+        llm_providers=data.llm_providers,
         tavily_key=data.tavily_key,
         github_token=data.github_token,
         agent_bio=data.agent_bio
@@ -81,6 +98,7 @@ async def test_llm_connection(data: SettingsUpdate = Body(...)):
     Test LLM connection with provided credentials (without saving)
     """
     from openai import AsyncOpenAI
+    from app.core.http_pool import llm_http_pool
     
     try:
         # Use provided credentials or fallback to settings
@@ -91,7 +109,8 @@ async def test_llm_connection(data: SettingsUpdate = Body(...)):
         if not api_key:
              return {"status": "error", "message": "No API Key provided"}
 
-        client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        # Throwaway credentials, but the shared pool keeps the connection warm for the real client
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=llm_http_pool.client)
         
         response = await client.chat.completions.create(
             model=model,
@@ -104,3 +123,46 @@ async def test_llm_connection(data: SettingsUpdate = Body(...)):
         
     except Exception as e:
         return {"status": "error", "message": f"Connection Failed: {str(e)}"}
+
+@router.get("/llm-status")
+async def get_llm_status():
+    """
+    Rolling time-to-first-token and error rate per configured LLM provider, in routing order.
+    """
+    client = LLMFactory.get_client()
+    if not client or not client.router:
+        return {"providers": [], "cache": llm_cache.stats(), "semantic_cache": semantic_cache.stats(),
+                "prompt_prefix": prefix_tracker.stats()}
+    ranked = [p.name for p in client.router.ranked()]
+    return {
+        "providers": client.router.status(),
+        "routing_order": ranked,
+        "hedging": client.router.hedging.snapshot(),
+        "cache": llm_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "prompt_prefix": prefix_tracker.stats()
+    }
+
+@router.delete("/llm-cache")
+async def clear_llm_cache():
+    """
+    Drop every cached LLM response.
+    """
+    llm_cache.clear()
+    return {"status": "cleared", "cache": llm_cache.stats()}
+
+@router.get("/llm-metrics")
+async def get_llm_metrics():
+    """
+    Queue wait, time-to-first-token, duration and tokens/sec histograms per workload
+    (chat_stream, agent_chat, chat_send, research, write, tags), plus the latest calls.
+    """
+    return llm_telemetry.stats()
+
+@router.delete("/llm-metrics")
+async def reset_llm_metrics():
+    """
+    Start a fresh measurement window (e.g. before a load test).
+    """
+    llm_telemetry.reset()
+    return {"status": "reset"}
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys the OpenAI API actually reads from a message; anything else (e.g. our history
+# "timestamp") must not leak into the fingerprint or replays would never match.
+MESSAGE_KEYS = ("role", "content", "name", "tool_calls", "tool_call_id")
+
+# Request kwargs that never change what the model answers
+IGNORED_REQUEST_KEYS = ("extra_headers", "extra_query", "extra_body", "timeout", "stream_options")
+
+
+class CassetteMissError(LookupError):
+    pass
+
+
+def _to_plain(value: Any) -> Any:
+    """Recursively convert pydantic / OpenAI objects into JSON-compatible data."""
+    if hasattr(value, "model_dump"):
+        return _to_plain(value.model_dump(exclude_none=True))
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    return value
+
+
+def normalize_request(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    request = {k: v for k, v in kwargs.items() if k not in IGNORED_REQUEST_KEYS and v is not None}
+    messages = []
+    for m in _to_plain(request.get("messages", [])):
+        messages.append({k: m[k] for k in MESSAGE_KEYS if k in m})
+    request["messages"] = messages
+    return _to_plain(request)
+
+
+def fingerprint(payload: Any) -> str:
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Record / replay layer for LLM completions and MCP tool calls.
+
+    Modes (settings.LLM_CASSETTE_MODE):
+    - off:    pass-through
+    - record: call upstream and append every interaction to a JSONL cassette
+    - replay: serve interactions from the cassette, never touching the network
+
+    Replay honours the recorded inter-chunk timing when timing is "realtime",
+    or serves everything immediately when timing is "fast". A request whose fingerprint
+    matches no unplayed recording raises CassetteMissError, so prompt drift fails the
+    regression run; strict=False replays the next entry of the same kind instead.
+    """
+
+    def __init__(self):
+        self.configure(settings.LLM_CASSETTE_MODE, settings.LLM_CASSETTE_PATH, settings.LLM_CASSETTE_TIMING,
+                       settings.LLM_CASSETTE_STRICT)
+
+    def configure(self, mode: str = "off", path: Optional[str] = None, timing: str = "realtime", strict: bool = True):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.mode = mode
+        self.path = path or settings.LLM_CASSETTE_PATH
+        self.timing = timing
+        self.strict = strict
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._played: set = set()
+        self._last_tools_fp: Optional[str] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # --- Storage ---
+
+    def _append(self, entry: Dict[str, Any]):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = []
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = [json.loads(line) for line in f if line.strip()]
+            logger.info(f"Loaded {len(self._entries)} cassette entries from {self.path}")
+        return self._entries
+
+    def _take(self, kind: str, fp: str) -> Dict[str, Any]:
+        """
+        Pop the next unplayed entry with this fingerprint. When not strict, a request that
+        drifted (e.g. a timestamp in the prompt) gets the next unplayed entry of the same
+        kind in recorded order, so a replayed session still runs end to end.
+        """
+        entries = self._load()
+        fallback = None
+        for i, entry in enumerate(entries):
+            if i in self._played or entry["kind"] != kind:
+                continue
+            if entry["fingerprint"] == fp:
+                self._played.add(i)
+                return entry
+            if fallback is None:
+                fallback = i
+        if self.strict:
+            raise CassetteMissError(
+                f"No recorded {kind} interaction matches request {fp[:12]} in {self.path} "
+                f"(the request changed since recording; re-record, or replay with strict=False)")
+        if fallback is None:
+            raise CassetteMissError(f"No recorded {kind} interaction left in {self.path}")
+        logger.warning(f"Cassette fingerprint miss for {kind}; replaying entry #{fallback} in order")
+        self._played.add(fallback)
+        return entries[fallback]
+
+    async def _sleep_until(self, start: float, offset: float):
+        if self.timing == "realtime":
+            delay = offset - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    # --- LLM completions ---
+
+    async def record_completion(self, kwargs: Dict[str, Any], create: Callable[..., Awaitable[Any]]):
+        request = normalize_request(kwargs)
+        fp = fingerprint(request)
+        start = time.perf_counter()
+        response = await create(**kwargs)
+
+        if not kwargs.get("stream"):
+            self._append({
+                "kind": "llm",
+                "fingerprint": fp,
+                "request": request,
+                "duration": time.perf_counter() - start,
+                "response": response.model_dump()
+            })
+            return response
+
+        return self._record_stream(fp, request, start, response)
+
+    async def _record_stream(self, fp: str, request: Dict[str, Any], start: float, stream) -> AsyncIterator[Any]:
+        chunks = []
+        async for chunk in stream:
+            chunks.append({"t": time.perf_counter() - start, "chunk": chunk.model_dump()})
+            yield chunk
+        self._append({
+            "kind": "llm",
+            "fingerprint": fp,
+            "request": request,
+            "duration": time.perf_counter() - start,
+            "stream": True,
+            "chunks": chunks
+        })
+
+    async def replay_completion(self, kwargs: Dict[str, Any]):
+        from openai.types.chat import ChatCompletion
+
+        entry = self._take("llm", fingerprint(normalize_request(kwargs)))
+        start = time.perf_counter()
+        if entry.get("stream"):
+            return self._replay_stream(entry, start)
+        await self._sleep_until(start, entry["duration"])
+        return ChatCompletion.model_validate(entry["response"])
+
+    async def _replay_stream(self, entry: Dict[str, Any], start: float) -> AsyncIterator[Any]:
+        from openai.types.chat import ChatCompletionChunk
+
+        for item in entry["chunks"]:
+            await self._sleep_until(start, item["t"])
+            yield ChatCompletionChunk.model_validate(item["chunk"])
+
+    # --- MCP ---
+
+    async def record_tool_call(self, server_name: str, tool_name: str, arguments: Optional[Dict[str, Any]], call: Callable[..., Awaitable[Any]]):
+        request = {"server": server_name, "tool": tool_name, "arguments": arguments or {}}
+        start = time.perf_counter()
+        result = await call(tool_name, arguments)
+        self._append({
+            "kind": "mcp",
+            "fingerprint": fingerprint(request),
+            "request": request,
+            "duration": time.perf_counter() - start,
+            "response": _to_plain(result)
+        })
+        return result
+
+    async def replay_tool_call(self, server_name: str, tool_name: str, arguments: Optional[Dict[str, Any]]):
+        from mcp.types import CallToolResult
+
+        request = {"server": server_name, "tool": tool_name, "arguments": arguments or {}}
+        entry = self._take("mcp", fingerprint(request))
+        await self._sleep_until(time.perf_counter(), entry["duration"])
+        return CallToolResult.model_validate(entry["response"])
+
+    def record_tools(self, tools: List[Dict[str, Any]]):
+        """Snapshot the advertised tool list whenever it changes (tools are part of every LLM request)."""
+        plain = _to_plain(tools)
+        fp = fingerprint(plain)
+        if fp != self._last_tools_fp:
+            self._append({"kind": "tools", "fingerprint": fp, "tools": plain})
+            self._last_tools_fp = fp
+
+    def replay_tools(self) -> Optional[List[Dict[str, Any]]]:
+        snapshots = [e for e in self._load() if e["kind"] == "tools"]
+        return snapshots[-1]["tools"] if snapshots else None
+
+
+# Global Instance
+cassette = Cassette()
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -16,7 +16,85 @@ class Settings(BaseSettings):
     LLM_API_KEY: str = os.getenv("LLM_API_KEY", "") or os.getenv("OPENAI_API_KEY", "")
     LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
     LLM_MODEL: str = "gpt-4-turbo-preview"
+
+    # Multi-provider routing. Each entry: {name, provider, api_key, base_url?, model?, weight?}.
+    # Empty = single provider from the LLM_* settings above.
+    LLM_PROVIDERS: List[Dict[str, Any]] = []
+    LLM_FIRST_BYTE_TIMEOUT: float = 20.0  # seconds to wait for the first streamed chunk before failing over
+    LLM_ROUTER_WINDOW_SECONDS: float = 300.0  # rolling window for TTFT / error-rate stats
+    LLM_MAX_ATTEMPTS: int = 3  # total tries per request across providers (429 / 5xx / timeouts)
+    LLM_STREAM_USAGE: bool = True  # ask streams for a final usage chunk (stream_options.include_usage)
+
+    # Hedged streaming requests: if the first chunk is later than the provider's TTFT percentile,
+    # fire a duplicate (next provider, or the same one) and keep whichever streams first.
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_DELAY: float = 0.25  # seconds; floor for the percentile-derived delay
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # TTFT samples needed before hedging kicks in
+    LLM_HEDGE_MAX_RATE: float = 0.1  # at most this fraction of eligible requests is hedged
+
+    # Client-side rate limiting per provider key (0 = unlimited). Adapted at runtime from
+    # x-ratelimit-* headers and 429s; a provider entry may override with "rpm" / "tpm".
+    LLM_RATE_LIMIT_RPM: int = 500
+    LLM_RATE_LIMIT_TPM: int = 200000
+
+    # Exact-match response cache for non-streaming completions
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: str = "data/llm_cache"
+    LLM_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+    LLM_CACHE_TTL: int = 24 * 3600  # seconds
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.3  # calls at or below this are cached without opting in
+
+    # Coalesce identical in-flight LLM / search / idempotent MCP calls into one upstream request
+    LLM_SINGLE_FLIGHT: bool = True
+
+    # Semantic cache for near-duplicate stateless prompts (off | shadow | on).
+    # Shadow mode only counts would-be hits, so the threshold can be tuned before serving from it.
+    LLM_SEMANTIC_CACHE_MODE: str = os.getenv("LLM_SEMANTIC_CACHE_MODE", "shadow")
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.92  # cosine similarity of the user message
+    LLM_SEMANTIC_CACHE_MAX_ENTRIES: int = 500  # per scope
+    LLM_SEMANTIC_CACHE_MAX_GROUPS: int = 64  # scope + system prompt combinations kept, least recently used dropped
+    LLM_SEMANTIC_CACHE_DIM: int = 2048
+
+    # LLM HTTP transport (one pooled httpx client shared by every LLM call)
+    LLM_HTTP2: bool = True
+    LLM_POOL_MAX_CONNECTIONS: int = 50
+    LLM_POOL_MAX_KEEPALIVE: int = 20
+    LLM_POOL_KEEPALIVE_EXPIRY: float = 120.0  # seconds an idle connection is kept open
+    LLM_POOL_WARMUP_CONNECTIONS: int = 2  # connections pre-opened at startup
+    LLM_POOL_WARMUP_TIMEOUT: float = 5.0  # seconds startup waits for warmup, across all providers
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_READ_TIMEOUT: float = 600.0
+
+    # LLM / MCP record-replay (off | record | replay), for offline benchmarks and regression runs
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "off")
+    LLM_CASSETTE_PATH: str = os.getenv("LLM_CASSETTE_PATH", "data/cassettes/default.jsonl")
+    LLM_CASSETTE_TIMING: str = os.getenv("LLM_CASSETTE_TIMING", "realtime")  # realtime | fast
+    # Replay raises on a request that matches no recording; false replays the next entry in order
+    LLM_CASSETTE_STRICT: bool = os.getenv("LLM_CASSETTE_STRICT", "true").lower() != "false"
     
+    # /chat/stream: merge consecutive content_delta frames (clients may override per request)
+    SSE_COALESCE_MS: int = 40  # 0 = one frame per upstream chunk
+    SSE_COALESCE_BYTES: int = 512
+
+    # MCP servers
+    MCP_STARTUP_TIMEOUT: float = 30.0  # per server, covers spawn + initialize + list_tools (config: "startup_timeout")
+    MCP_HEALTH_INTERVAL: float = 15.0  # seconds between supervisor pings (0 = no supervisor)
+    MCP_PING_TIMEOUT: float = 5.0
+    MCP_RECONNECT_BASE_DELAY: float = 0.5  # reconnect backoff doubles from here, with jitter...
+    MCP_RECONNECT_MAX_DELAY: float = 30.0  # ...up to this
+    MCP_ON_UNAVAILABLE: str = "queue"  # calls during a reconnect: "queue" (wait) or "fail" (config: "on_unavailable")
+    MCP_QUEUE_TIMEOUT: float = 30.0  # how long queued calls wait for the reconnect (config: "queue_timeout")
+    MCP_TOOL_TIMEOUT: float = 30.0  # per call (config: "timeout", per server and per tool)
+    MCP_MAX_CONCURRENCY: int = 0  # calls in flight per server, 0 = unlimited (config: "max_concurrency")
+    MCP_BREAKER_FAILURE_RATIO: float = 0.5  # circuit opens at this failure ratio... (config: "circuit_breaker")
+    MCP_BREAKER_MIN_CALLS: int = 5  # ...over at least this many calls...
+    MCP_BREAKER_WINDOW: float = 60.0  # ...in this many seconds
+    MCP_BREAKER_OPEN_SECONDS: float = 30.0  # calls fail fast this long before probing again
+    MCP_BREAKER_HALF_OPEN_PROBES: int = 1  # successful probes needed to close it
+    MCP_IDLE_TIMEOUT: float = 300.0  # lazy servers stop after this long without calls (config: "idle_timeout", 0 = never)
+    MCP_BATCH_MAX_CALLS: int = 100  # calls accepted per POST /mcp/call_batch
+
     # Tool Keys
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "")
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")
@@ -27,6 +105,10 @@ class Settings(BaseSettings):
     # Void System
     VOID_CHECK_INTERVAL: int = 60  # seconds
 
+    # Agent Batch Execution
+    AGENT_BATCH_CONCURRENCY: int = 4  # default parallel items per batch
+    AGENT_BATCH_MAX_CONCURRENCY: int = 16  # hard cap for client-requested concurrency
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -47,6 +129,7 @@ class Settings(BaseSettings):
                         self.LLM_API_KEY = data["LLM_API_KEY"].strip() # Strip whitespace
                     if "LLM_BASE_URL" in data: self.LLM_BASE_URL = data["LLM_BASE_URL"]
                     if "LLM_MODEL" in data: self.LLM_MODEL = data["LLM_MODEL"]
+                    if "LLM_PROVIDERS" in data: self.LLM_PROVIDERS = data["LLM_PROVIDERS"]
                     if "TAVILY_API_KEY" in data: self.TAVILY_API_KEY = data["TAVILY_API_KEY"]
                     if "GITHUB_TOKEN" in data: self.GITHUB_TOKEN = data["GITHUB_TOKEN"]
                     if "AGENT_BIO" in data: self.AGENT_BIO = data["AGENT_BIO"]
@@ -58,6 +141,7 @@ class Settings(BaseSettings):
                           llm_key: Optional[str] = None,
                           llm_base_url: Optional[str] = None,
                           llm_model: Optional[str] = None,
+                          llm_providers: Optional[List[Dict[str, Any]]] = None,
                           tavily_key: Optional[str] = None,
                           github_token: Optional[str] = None,
                           agent_bio: Optional[str] = None):
@@ -89,6 +173,10 @@ class Settings(BaseSettings):
         if llm_model is not None:
             self.LLM_MODEL = llm_model
             data["LLM_MODEL"] = llm_model
+
+        if llm_providers is not None:
+            self.LLM_PROVIDERS = llm_providers
+            data["LLM_PROVIDERS"] = llm_providers
         
         if tavily_key is not None:
             self.TAVILY_API_KEY = tavily_key
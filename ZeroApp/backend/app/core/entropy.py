@@ -0,0 +1,113 @@
+import zlib
+from typing import Dict, Union
+
+import numpy as np
+
+# Shannon entropy is scored against 8 bits per symbol: random bytes (or compressed media)
+# reach 1.0, prose sits around 0.55, a repeated character is 0. Short inputs score low on
+# their own, since n symbols can't carry more than log2(n) bits each.
+MAX_BITS = 8.0
+# Compression ratio is sampled: this many evenly spaced blocks of BLOCK bytes at most
+SAMPLE_BLOCKS = 8
+BLOCK = 8192
+# Below this, deflate's framing outweighs the data and the ratio means nothing
+MIN_COMPRESS_BYTES = 64
+# Counting codepoints costs several times a byte count, so non-ASCII text beyond this many
+# characters is histogrammed over HISTOGRAM_BLOCKS evenly spaced runs instead of in full
+MAX_HISTOGRAM_CHARS = 1 << 20
+HISTOGRAM_BLOCKS = 64
+
+
+def shannon_bits(counts: np.ndarray) -> float:
+    """Entropy in bits per symbol of a symbol histogram"""
+    counts = counts[counts > 0]
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    p = counts / total
+    return max(0.0, float(-(p * np.log2(p)).sum()))
+
+
+def evenly_spaced(seq, limit: int, blocks: int) -> Union[str, bytes]:
+    """At most `limit` items of a str or bytes, as `blocks` equal runs spread across it"""
+    if len(seq) <= limit:
+        return seq
+    block = limit // blocks
+    stride = (len(seq) - block) // (blocks - 1)
+    return seq[:0].join(seq[i * stride:i * stride + block] for i in range(blocks))
+
+
+def byte_histogram(raw: bytes) -> np.ndarray:
+    """
+    Counts of each byte value. Bins byte pairs as uint16 and folds the 256x256 table back,
+    which halves the elements np.bincount has to walk (about 2x faster on large inputs).
+    """
+    even = len(raw) & ~1
+    pairs = np.bincount(np.frombuffer(raw, dtype=np.uint16, count=even // 2), minlength=65536).reshape(256, 256)
+    counts = pairs.sum(axis=0) + pairs.sum(axis=1)
+    if len(raw) & 1:
+        counts[raw[-1]] += 1
+    return counts
+
+
+class EntropyEstimator:
+    """
+    Scores fuel by how much information it carries, in [0, 1]. Two views, each normalized
+    to [0, 1] and averaged:
+    - shannon: symbol entropy from a vectorized histogram (np.bincount) - bytes for binary
+      input, characters for text (so UTF-8 multi-byte structure doesn't count against CJK)
+    - compression: deflate (level 1) size / original size on a sample of the data;
+      repetitive or templated content compresses well and scores low
+
+    Bytes and ASCII text are histogrammed in full; non-ASCII text beyond MAX_HISTOGRAM_CHARS
+    and the compression input are sampled, so a 10 MB upload costs one byte count (or ~1M
+    codepoints) plus ~64 KB of deflate.
+    """
+
+    def __init__(self, shannon_weight: float = 0.5):
+        self.shannon_weight = shannon_weight
+
+    @staticmethod
+    def _symbols(data: Union[str, bytes]) -> tuple:
+        """(histogram, utf-8 bytes) for text or binary input"""
+        if isinstance(data, str):
+            raw = data.encode("utf-8", errors="surrogatepass")
+            if not data.isascii():
+                text = evenly_spaced(data, MAX_HISTOGRAM_CHARS, HISTOGRAM_BLOCKS)
+                codepoints = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+                return np.bincount(codepoints), raw
+        else:
+            raw = bytes(data)
+        return byte_histogram(raw), raw
+
+    def breakdown(self, data: Union[str, bytes]) -> Dict[str, float]:
+        counts, raw = self._symbols(data)
+        bits = shannon_bits(counts)
+        shannon = min(1.0, bits / MAX_BITS)
+        if len(raw) < MIN_COMPRESS_BYTES:
+            compression = None
+            score = shannon
+        else:
+            sample = evenly_spaced(raw, SAMPLE_BLOCKS * BLOCK, SAMPLE_BLOCKS)
+            # Raw deflate (no zlib header/checksum): the ratio reflects the data, not framing
+            compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+            compressed = len(compressor.compress(sample)) + len(compressor.flush())
+            compression = min(1.0, compressed / len(sample))
+            score = self.shannon_weight * shannon + (1 - self.shannon_weight) * compression
+        return {
+            "score": round(score, 4),
+            "shannon": round(shannon, 4),
+            "shannon_bits": round(bits, 3),
+            "compression": round(compression, 4) if compression is not None else None,
+            "size": len(raw)
+        }
+
+    def estimate(self, data: Union[str, bytes]) -> float:
+        """Information score in [0, 1]"""
+        if not data:
+            return 0.0
+        return self.breakdown(data)["score"]
+
+
+# Global Instance
+entropy_estimator = EntropyEstimator()
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx[http2] extra)
+        return True
+    except ImportError:
+        return False
+
+
+class LLMHttpPool:
+    """
+    Process-wide httpx transport shared by every AsyncOpenAI client.
+
+    httpx pools connections per origin, so a single AsyncClient can serve any
+    provider/base URL. Rebuilding the OpenAI client on a key or provider change
+    therefore never closes sockets that in-flight streams are still reading from.
+    HTTP/2 is negotiated via ALPN and silently falls back to HTTP/1.1.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            http2 = settings.LLM_HTTP2 and _http2_available()
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+                follow_redirects=True
+            )
+            logger.info(f"LLM HTTP pool created (http2={http2}, max_connections={settings.LLM_POOL_MAX_CONNECTIONS})")
+        return self._client
+
+    async def warmup(self, base_url: str, api_key: str, connections: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Pre-open TLS connections to the provider so the first real request skips the handshake.
+        Concurrent requests are needed to open more than one HTTP/1.1 connection.
+        The response status is irrelevant; only the established connection matters.
+        """
+        if not base_url:
+            return
+        connections = connections or settings.LLM_POOL_WARMUP_CONNECTIONS
+        timeout = timeout or settings.LLM_POOL_WARMUP_TIMEOUT
+        url = f"{base_url.rstrip('/')}/models"
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        async def _touch():
+            try:
+                response = await self.client.get(url, headers=headers)
+                return response.http_version
+            except Exception as e:
+                logger.warning(f"LLM pool warmup request to {url} failed: {e}")
+                return None
+
+        try:
+            versions = await asyncio.wait_for(asyncio.gather(*[_touch() for _ in range(connections)]), timeout=timeout)
+            print(f"[LLM Pool] Warmed up {sum(1 for v in versions if v)}/{connections} connections to {base_url} ({versions[0]})")
+        except asyncio.TimeoutError:
+            logger.warning(f"LLM pool warmup to {base_url} timed out after {timeout}s")
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+# Global Instance
+llm_http_pool = LLMHttpPool()
@@ -1,41 +1,164 @@
-from openai import AsyncOpenAI
+import asyncio
+import json
 from app.core.config import settings
-from typing import Optional
+from app.core.cassette import cassette, fingerprint, normalize_request
+from app.core.http_pool import llm_http_pool
+from app.core.llm_cache import llm_cache
+from app.core.llm_router import LLMRouter
+from app.core.llm_telemetry import CallRecord, current_call, llm_telemetry
+from app.core.rate_limiter import PRIORITY_INTERACTIVE
+from app.core.semantic_cache import semantic_cache
+from app.core.single_flight import SingleFlight
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Optional
+
+# Identical requests already on the wire share one upstream call (streams included)
+llm_flight = SingleFlight("llm")
+
+class LLMClient:
+    """
+    Facade over the provider router. Callers keep using `client.chat.completions.create(...)`;
+    this is the single place where cross-cutting behaviour (record/replay, ...) hooks in.
+    """
+
+    def __init__(self, router: Optional[LLMRouter]):
+        self.router = router
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_completion))
+
+    @property
+    def api_key(self) -> str:
+        return self.router.primary.api_key if self.router else ""
+
+    async def create_completion(self, priority: int = PRIORITY_INTERACTIVE, cache: Optional[bool] = None,
+                                semantic_scope: Optional[str] = None, caller: str = "other", **kwargs) -> Any:
+        """
+        Same arguments as AsyncOpenAI's chat.completions.create, plus:
+        - priority: rate-limiter queue position (see app.core.rate_limiter)
+        - cache: True to opt in to the response cache, False to bypass it,
+          None to cache only low-temperature calls (see app.core.llm_cache)
+        - semantic_scope: e.g. "chat_send:<module>"; lets stateless calls reuse answers
+          to near-duplicate prompts within that scope (see app.core.semantic_cache)
+        - caller: workload tag for telemetry (chat_stream, agent_chat, research, write, tags, ...)
+
+        cache=False also opts out of single-flight coalescing, for callers that want
+        independent samples of the same prompt.
+        """
+        if kwargs.get("stream") and settings.LLM_STREAM_USAGE:
+            # Token counts arrive in one extra chunk with no choices, after the last delta
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        record = llm_telemetry.start(caller, kwargs)
+        context = current_call.set(record)
+        try:
+            response = await self._create(priority, cache, semantic_scope, record, kwargs)
+        except Exception as e:
+            llm_telemetry.finish(record, error=e)
+            raise
+        finally:
+            current_call.reset(context)
+
+        if kwargs.get("stream"):
+            return llm_telemetry.wrap_stream(response, record)
+        llm_telemetry.finish(record, response)
+        return response
+
+    async def _create(self, priority: int, cache: Optional[bool], semantic_scope: Optional[str],
+                      record: CallRecord, kwargs: dict) -> Any:
+        # Record/replay sessions must see every call, so the cache stays out of their way
+        use_cache = cassette.mode == "off" and llm_cache.applies(kwargs, cache)
+        if use_cache:
+            key = llm_cache.make_key(kwargs)
+            cached = llm_cache.get(key)
+            if cached is not None:
+                record.source = "cache"
+                return cached
+
+        token = None
+        if cassette.mode == "off" and cache is not False:
+            similar, token = semantic_cache.lookup(kwargs, semantic_scope)
+            if similar is not None:
+                record.source = "semantic_cache"
+                return similar
+
+        if cassette.replaying:
+            record.source = "replay"
+
+        response = await self._coalesced(priority, kwargs, cache)
+        if use_cache:
+            llm_cache.put(key, response)
+        semantic_cache.store(token, response)
+        return response
+
+    async def _coalesced(self, priority: int, kwargs: dict, cache: Optional[bool]) -> Any:
+        if not settings.LLM_SINGLE_FLIGHT or cache is False or cassette.mode != "off":
+            return await self._dispatch(priority, kwargs)
+        key = fingerprint(normalize_request(kwargs))
+        if kwargs.get("stream"):
+            return await llm_flight.stream(key, partial(self._dispatch, priority, kwargs))
+        return await llm_flight.do(key, partial(self._dispatch, priority, kwargs))
+
+    async def _dispatch(self, priority: int, kwargs: dict) -> Any:
+        if cassette.replaying:
+            return await cassette.replay_completion(kwargs)
+        if cassette.recording:
+            return await cassette.record_completion(kwargs, partial(self.router.create, priority=priority))
+        return await self.router.create(priority=priority, **kwargs)
 
 class LLMFactory:
-    _client: Optional[AsyncOpenAI] = None
-    _last_key: Optional[str] = None
-    _last_base_url: Optional[str] = None
+    _client: Optional[LLMClient] = None
+    _signature: Optional[tuple] = None
 
     @classmethod
-    def get_client(cls) -> Optional[AsyncOpenAI]:
+    def _config_signature(cls) -> tuple:
+        return (
+            settings.LLM_PROVIDER,
+            settings.LLM_API_KEY,
+            settings.LLM_BASE_URL,
+            settings.LLM_MODEL,
+            json.dumps(settings.LLM_PROVIDERS, sort_keys=True),
+            id(llm_http_pool.client)
+        )
+
+    @classmethod
+    def get_client(cls) -> Optional[LLMClient]:
         """
-        Get or initialize the AsyncOpenAI client based on current settings.
-        Handles provider switching automatically via Base URL.
+        Get or initialize the LLM client based on current settings.
+        Handles provider switching automatically via Base URL / LLM_PROVIDERS.
         """
-        current_key = settings.LLM_API_KEY
-        current_base_url = settings.LLM_BASE_URL
-
-        if not current_key:
-            return None
+        signature = cls._config_signature()
 
         # Re-initialize if config changed
-        if (cls._client is None or 
-            cls._last_key != current_key or 
-            cls._last_base_url != current_base_url):
-            
-            print(f"[LLM Factory] Initializing Client for {settings.LLM_PROVIDER} at {current_base_url}")
-            
-            cls._client = AsyncOpenAI(
-                api_key=current_key,
-                base_url=current_base_url,
-                default_headers={"Authorization": f"Bearer {current_key}"}
-            )
-            cls._last_key = current_key
-            cls._last_base_url = current_base_url
+        if cls._client is None or cls._signature != signature:
+            previous = cls._client.router if cls._client else None
+            router = LLMRouter.from_settings(previous)
+            if router is None:
+                # Replay needs no provider at all
+                return LLMClient(None) if cassette.replaying else None
+
+            names = ", ".join(f"{p.name}@{p.base_url}" for p in router.providers)
+            print(f"[LLM Factory] Initializing Client for {names}")
+
+            # The swap is a single assignment: streams still running on the previous client
+            # keep their object and their sockets, since the transport pool is shared.
+            cls._client = LLMClient(router)
+            cls._signature = signature
 
         return cls._client
 
+    @classmethod
+    async def warmup(cls):
+        """
+        Pre-open pooled connections to every configured provider (called at app startup).
+        Providers warm up concurrently, so startup waits at most LLM_POOL_WARMUP_TIMEOUT;
+        failures are logged, never raised.
+        """
+        try:
+            client = cls.get_client()
+            if client and client.router and not cassette.replaying:
+                await asyncio.gather(*[llm_http_pool.warmup(p.base_url, p.api_key) for p in client.router.providers])
+        except Exception as e:
+            print(f"[LLM Factory] Warmup failed: {e}")
+
     @classmethod
     def get_model(cls) -> str:
         return settings.LLM_MODEL
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.cassette import fingerprint, normalize_request
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request fields that determine the completion; everything else (headers, priority, ...) is ignored
+KEY_FIELDS = ("model", "messages", "tools", "tool_choice", "temperature", "top_p", "max_tokens", "response_format")
+
+
+class LLMCache:
+    """
+    Opt-in exact-match cache for non-streaming completions.
+
+    One JSON file per entry under LLM_CACHE_DIR; file mtime doubles as the LRU clock,
+    so the bound survives restarts. Only deterministic-enough calls are cached:
+    temperature <= LLM_CACHE_MAX_TEMPERATURE, or callers passing cache=True.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or settings.LLM_CACHE_DIR
+        self._index: Optional[OrderedDict] = None  # key -> size, least recently used first
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def applies(self, kwargs: Dict[str, Any], opt_in: Optional[bool]) -> bool:
+        if not settings.LLM_CACHE_ENABLED or kwargs.get("stream"):
+            return False
+        if opt_in is False:
+            self.bypassed += 1
+            return False
+        if opt_in:
+            return True
+        temperature = kwargs.get("temperature")
+        return temperature is not None and temperature <= settings.LLM_CACHE_MAX_TEMPERATURE
+
+    def make_key(self, kwargs: Dict[str, Any]) -> str:
+        request = normalize_request(kwargs)
+        return fingerprint({k: request[k] for k in KEY_FIELDS if k in request})
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self) -> OrderedDict:
+        if self._index is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = []
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith(".json"):
+                    stat = os.stat(os.path.join(self.cache_dir, filename))
+                    entries.append((stat.st_mtime, filename[:-5], stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._size = sum(self._index.values())
+        return self._index
+
+    def _remove(self, key: str):
+        index = self._load_index()
+        self._size -= index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[Any]:
+        from openai.types.chat import ChatCompletion
+
+        index = self._load_index()
+        if key not in index:
+            self.misses += 1
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        if time.time() - entry["created_at"] > settings.LLM_CACHE_TTL:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        index.move_to_end(key)
+        os.utime(self._path(key))
+        self.hits += 1
+        return ChatCompletion.model_validate(entry["response"])
+
+    def put(self, key: str, response: Any):
+        index = self._load_index()
+        data = json.dumps({"created_at": time.time(), "response": response.model_dump()}, ensure_ascii=False)
+        if key in index:
+            self._remove(key)
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            f.write(data)
+        size = len(data.encode("utf-8"))
+        index[key] = size
+        self._size += size
+        self.stores += 1
+
+        while self._size > settings.LLM_CACHE_MAX_BYTES and len(index) > 1:
+            oldest = next(iter(index))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        for key in list(self._load_index().keys()):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        self._load_index()
+        return {
+            "enabled": settings.LLM_CACHE_ENABLED,
+            "entries": len(self._index),
+            "size_bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global Instance
+llm_cache = LLMCache()
@@ -0,0 +1,441 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.core.http_pool import llm_http_pool
+from app.core.llm_telemetry import current_call
+from app.core.rate_limiter import RateLimiter, PRIORITY_INTERACTIVE, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Used when a provider entry in LLM_PROVIDERS has no explicit base_url
+PROVIDER_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "deepseek": "https://api.deepseek.com",
+    "siliconflow": "https://api.siliconflow.cn/v1",
+    "minimax": "https://api.minimax.chat/v1",
+}
+
+# Optimistic TTFT guess for providers without samples, so they get tried
+DEFAULT_TTFT = 1.0
+
+
+class ProviderStats:
+    """Rolling time-to-first-token and error rate over a sliding time window."""
+
+    def __init__(self, window_seconds: float, max_samples: int = 200):
+        self.window_seconds = window_seconds
+        self.ttft: deque = deque(maxlen=max_samples)      # (timestamp, seconds)
+        self.outcomes: deque = deque(maxlen=max_samples)  # (timestamp, ok)
+
+    def _prune(self):
+        cutoff = time.time() - self.window_seconds
+        for samples in (self.ttft, self.outcomes):
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+
+    def record_success(self, ttft: Optional[float] = None):
+        now = time.time()
+        self.outcomes.append((now, True))
+        if ttft is not None:
+            self.ttft.append((now, ttft))
+
+    def record_failure(self):
+        self.outcomes.append((time.time(), False))
+
+    @property
+    def error_rate(self) -> float:
+        self._prune()
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+    @property
+    def ttft_estimate(self) -> float:
+        """Median TTFT of the window (robust against a single slow outlier)."""
+        self._prune()
+        if not self.ttft:
+            return DEFAULT_TTFT
+        values = sorted(v for _, v in self.ttft)
+        return values[len(values) // 2]
+
+    def ttft_percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        self._prune()
+        if len(self.ttft) < min_samples or not self.ttft:
+            return None
+        values = sorted(v for _, v in self.ttft)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ttft_median_ms": round(self.ttft_estimate * 1000, 1) if self.ttft else None,
+            "error_rate": round(self.error_rate, 3),
+            "samples": len(self.outcomes)
+        }
+
+
+class HedgeStats:
+    """
+    Hedging budget and outcomes. A hedge is only fired while hedges stay below
+    LLM_HEDGE_MAX_RATE of the eligible requests seen in the rolling window.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.requests: deque = deque()  # timestamps of hedge-eligible requests
+        self.hedges: deque = deque()    # timestamps of fired hedges
+        self.recent: deque = deque(maxlen=50)  # per-request outcomes of hedged requests
+        self.totals = {"eligible": 0, "hedged": 0, "hedge_won": 0, "primary_won": 0, "both_failed": 0, "budget_denied": 0}
+
+    def _prune(self):
+        cutoff = time.time() - self.window_seconds
+        for samples in (self.requests, self.hedges):
+            while samples and samples[0] < cutoff:
+                samples.popleft()
+
+    def record_request(self):
+        self.requests.append(time.time())
+        self.totals["eligible"] += 1
+
+    def try_hedge(self) -> bool:
+        self._prune()
+        if len(self.hedges) >= settings.LLM_HEDGE_MAX_RATE * len(self.requests):
+            self.totals["budget_denied"] += 1
+            return False
+        self.hedges.append(time.time())
+        self.totals["hedged"] += 1
+        return True
+
+    def record_outcome(self, outcome: str, **details):
+        self.totals[outcome] += 1
+        self.recent.append({"at": round(time.time(), 3), "outcome": outcome, **details})
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._prune()
+        return {
+            "enabled": settings.LLM_HEDGE_ENABLED,
+            "window_hedge_rate": round(len(self.hedges) / len(self.requests), 3) if self.requests else 0.0,
+            **self.totals,
+            "recent": list(self.recent)[-10:]
+        }
+
+
+class StreamRelay:
+    """
+    Async iterator over an opened completion stream, starting with the first chunk
+    that was already read to measure TTFT. Closing it releases the HTTP stream even
+    if it was never iterated (e.g. the losing side of a hedge).
+    The rate limiter's up-front estimate is settled once the stream ends, fails or is
+    closed: with the final usage chunk if one arrived, otherwise with the estimate.
+    """
+
+    _EMPTY = object()
+
+    def __init__(self, provider: "Provider", stream: Any, iterator: AsyncIterator[Any], first: Any, estimate: int = 0):
+        self.provider = provider
+        self._stream = stream
+        self._iterator = iterator
+        self._first = first
+        self._estimate = estimate
+        self._usage: Optional[int] = None
+        self._settled = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._first is not self._EMPTY:
+            chunk, self._first = self._first, self._EMPTY
+            return self._observe(chunk)
+        try:
+            return self._observe(await self._iterator.__anext__())
+        except StopAsyncIteration:
+            self._settle()
+            raise
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self.provider.stats.record_failure()
+            self._settle()
+            raise
+
+    def _observe(self, chunk: Any) -> Any:
+        usage = getattr(chunk, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            self._usage = usage.total_tokens
+        return chunk
+
+    def _settle(self):
+        if not self._settled:
+            self._settled = True
+            self.provider.limiter.settle(self._estimate, self._usage if self._usage is not None else self._estimate)
+
+    async def aclose(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._settle()
+
+    close = aclose
+
+
+class Provider:
+    def __init__(self, name: str, api_key: str, base_url: str, model: Optional[str] = None, weight: float = 1.0,
+                 provider: Optional[str] = None, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.name = name
+        self.provider = provider or name
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.weight = weight
+        self.stats = ProviderStats(settings.LLM_ROUTER_WINDOW_SECONDS)
+        self.limiter = RateLimiter(
+            rpm if rpm is not None else settings.LLM_RATE_LIMIT_RPM,
+            tpm if tpm is not None else settings.LLM_RATE_LIMIT_TPM
+        )
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            default_headers={"Authorization": f"Bearer {api_key}"},
+            http_client=llm_http_pool.client,
+            max_retries=0  # retries go through the router so they respect the rate limiter
+        )
+
+    @property
+    def score(self) -> float:
+        return self.weight * (1.0 - self.stats.error_rate) ** 2 / max(self.stats.ttft_estimate, 0.05)
+
+
+class LLMRouter:
+    """
+    Routes each completion to the healthiest configured provider and fails over to
+    the next one on connection errors, 5xx/429, or when the first streamed chunk
+    does not arrive within LLM_FIRST_BYTE_TIMEOUT.
+
+    Once a stream has yielded content it is committed to its provider: switching
+    mid-answer would duplicate text the client has already rendered.
+    """
+
+    def __init__(self, providers: List[Provider]):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.hedging = HedgeStats(settings.LLM_ROUTER_WINDOW_SECONDS)
+
+    @classmethod
+    def from_settings(cls, previous: Optional["LLMRouter"] = None) -> Optional["LLMRouter"]:
+        providers = []
+        if settings.LLM_PROVIDERS:
+            for i, cfg in enumerate(settings.LLM_PROVIDERS):
+                kind = cfg.get("provider", "openai")
+                if not cfg.get("api_key"):
+                    continue
+                providers.append(Provider(
+                    name=cfg.get("name") or f"{kind}-{i}",
+                    provider=kind,
+                    api_key=cfg["api_key"].strip(),
+                    base_url=cfg.get("base_url") or PROVIDER_BASE_URLS.get(kind, PROVIDER_BASE_URLS["openai"]),
+                    model=cfg.get("model"),
+                    weight=float(cfg.get("weight", 1.0)),
+                    rpm=cfg.get("rpm"),
+                    tpm=cfg.get("tpm")
+                ))
+        elif settings.LLM_API_KEY:
+            providers.append(Provider(
+                name=settings.LLM_PROVIDER,
+                api_key=settings.LLM_API_KEY,
+                base_url=settings.LLM_BASE_URL,
+                model=settings.LLM_MODEL
+            ))
+        if not providers:
+            return None
+
+        # Keep rolling stats and learned limits across config reloads for providers that still exist
+        if previous:
+            old_providers = {p.name: p for p in previous.providers}
+            for p in providers:
+                if p.name in old_providers:
+                    p.stats = old_providers[p.name].stats
+                    p.limiter = old_providers[p.name].limiter
+        router = cls(providers)
+        if previous:
+            router.hedging = previous.hedging
+        return router
+
+    @property
+    def primary(self) -> Provider:
+        return self.providers[0]
+
+    def ranked(self) -> List[Provider]:
+        # Stable sort keeps configuration order as the tie-breaker
+        return sorted(self.providers, key=lambda p: p.score, reverse=True)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": p.name, "provider": p.provider, "base_url": p.base_url, "model": p.model,
+             "weight": p.weight, "score": round(p.score, 3), **p.stats.snapshot(),
+             "rate_limit": p.limiter.snapshot()}
+            for p in self.providers
+        ]
+
+    @staticmethod
+    def _is_failover_error(e: Exception) -> bool:
+        if isinstance(e, (asyncio.TimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(e, openai.APIStatusError):
+            return e.status_code >= 500 or e.status_code == 429
+        return False
+
+    @classmethod
+    def _note_failure(cls, provider: Provider, e: Exception) -> bool:
+        """Update provider health for a failed attempt; returns whether another try makes sense."""
+        if isinstance(e, openai.RateLimitError):
+            provider.limiter.on_rate_limited(e.response.headers)
+        elif not cls._is_failover_error(e):
+            return False
+        provider.stats.record_failure()
+        return True
+
+    @staticmethod
+    def _request_for(provider: Provider, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        request = dict(kwargs)
+        if provider.model:
+            request["model"] = provider.model
+        return request
+
+    async def create(self, priority: int = PRIORITY_INTERACTIVE, **kwargs) -> Any:
+        ranked = self.ranked()
+        last_error: Optional[Exception] = None
+        # Cycle through providers; a single provider gets LLM_MAX_ATTEMPTS tries
+        for attempt in range(max(len(ranked), settings.LLM_MAX_ATTEMPTS)):
+            provider = ranked[attempt % len(ranked)]
+            if attempt >= len(ranked) and not isinstance(last_error, openai.RateLimitError):
+                # Second lap over the same providers: back off (429s already wait in the limiter)
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - len(ranked)), 4.0))
+
+            try:
+                if kwargs.get("stream") and settings.LLM_HEDGE_ENABLED:
+                    # Hedge against the next provider in line, or the same one when it is alone
+                    backup = ranked[(attempt + 1) % len(ranked)]
+                    return await self._hedged_attempt(provider, backup, kwargs, priority)
+                return await self._attempt(provider, self._request_for(provider, kwargs), priority)
+            except Exception as e:
+                if not self._note_failure(provider, e):
+                    raise
+                last_error = e
+                logger.warning(f"LLM provider {provider.name} failed ({type(e).__name__}: {e}); retrying")
+        raise last_error
+
+    def _hedge_delay(self, provider: Provider) -> Optional[float]:
+        percentile = provider.stats.ttft_percentile(settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_MIN_SAMPLES)
+        if percentile is None:
+            return None  # not enough history to know what "slow" means yet
+        return max(percentile, settings.LLM_HEDGE_MIN_DELAY)
+
+    async def _hedged_attempt(self, provider: Provider, backup: Provider, kwargs: Dict[str, Any], priority: int) -> Any:
+        """
+        Open a stream on `provider`; if its first chunk is later than the provider's
+        LLM_HEDGE_PERCENTILE TTFT, open a duplicate on `backup` and keep whichever
+        streams first. The loser is cancelled (or closed, if it had already opened).
+        Errors of the primary are raised so create() can fail over as usual.
+        """
+        delay = self._hedge_delay(provider)
+        if delay is None:
+            return await self._attempt(provider, self._request_for(provider, kwargs), priority)
+
+        self.hedging.record_request()
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self._attempt(provider, self._request_for(provider, kwargs), priority))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done or not self.hedging.try_hedge():
+            return await primary
+
+        logger.info(f"Hedging LLM request: {provider.name} silent for {delay * 1000:.0f}ms, duplicating on {backup.name}")
+        hedge = asyncio.ensure_future(self._attempt(backup, self._request_for(backup, kwargs), priority))
+        pending = {primary, hedge}
+        winner: Optional[asyncio.Task] = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, hedge):
+                    if task in done and task.exception() is None:
+                        winner = winner or task
+        finally:
+            # Cancelling a task that is still opening closes its half-open stream
+            for task in pending:
+                task.cancel()
+
+        # Both may have opened in the same tick: release the extra stream
+        for task in (primary, hedge):
+            if task is not winner and task.done() and not task.cancelled() and task.exception() is None:
+                await task.result().aclose()
+
+        details = {"provider": provider.name, "hedge_provider": backup.name,
+                   "delay_ms": round(delay * 1000, 1), "ttft_ms": round((time.perf_counter() - start) * 1000, 1)}
+        if winner is None:
+            if hedge.exception() is not None:
+                self._note_failure(backup, hedge.exception())
+            self.hedging.record_outcome("both_failed", **details)
+            raise primary.exception()
+        self.hedging.record_outcome("hedge_won" if winner is hedge else "primary_won", **details)
+        if winner is hedge and primary.done() and not primary.cancelled() and primary.exception() is not None:
+            self._note_failure(provider, primary.exception())
+        return winner.result()
+
+    async def _attempt(self, provider: Provider, request: Dict[str, Any], priority: int) -> Any:
+        estimate = estimate_tokens(request)
+        record = current_call.get()
+        queued = time.perf_counter()
+        await provider.limiter.acquire(estimate, priority)
+        if record:
+            record.queue_s += time.perf_counter() - queued
+
+        if request.get("stream"):
+            relay = await self._open_stream(provider, request, estimate)
+            if record:
+                record.provider = provider.name
+            return relay
+
+        raw = await provider.client.chat.completions.with_raw_response.create(**request)
+        provider.limiter.observe_headers(raw.headers)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        provider.limiter.settle(estimate, usage.total_tokens if usage else None)
+        provider.stats.record_success()
+        if record:
+            record.provider = provider.name
+        return response
+
+    async def _open_stream(self, provider: Provider, request: Dict[str, Any], estimate: int) -> AsyncIterator[Any]:
+        start = time.perf_counter()
+        opened: List[Any] = []
+
+        async def _first_chunk():
+            raw = await provider.client.chat.completions.with_raw_response.create(**request)
+            provider.limiter.observe_headers(raw.headers)
+            stream = raw.parse()
+            opened.append(stream)
+            iterator = stream.__aiter__()
+            try:
+                return iterator, await iterator.__anext__()
+            except StopAsyncIteration:
+                return iterator, None
+
+        try:
+            iterator, first = await asyncio.wait_for(_first_chunk(), timeout=settings.LLM_FIRST_BYTE_TIMEOUT)
+        except BaseException:
+            if opened:
+                await opened[0].close()
+            raise
+
+        provider.stats.record_success(ttft=time.perf_counter() - start)
+        return StreamRelay(provider, opened[0], iterator, first if first is not None else StreamRelay._EMPTY, estimate)
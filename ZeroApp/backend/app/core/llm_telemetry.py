@@ -0,0 +1,224 @@
+import bisect
+import contextvars
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Upper bucket bounds; the last bucket is open-ended
+MS_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+TPS_BUCKETS = [1, 5, 10, 20, 40, 80, 160, 320]
+
+
+class Histogram:
+    """Fixed-bucket counts for charts plus a bounded reservoir for percentiles."""
+
+    def __init__(self, bounds: List[float], reservoir: int = 500):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.samples: deque = deque(maxlen=reservoir)
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.samples.append(value)
+        self.total += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        values = sorted(self.samples)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": count,
+            "mean": round(self.total / count, 1) if count else None,
+            "p50": self._round(self.percentile(0.5)),
+            "p95": self._round(self.percentile(0.95)),
+            "p99": self._round(self.percentile(0.99)),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n}
+        }
+
+    @staticmethod
+    def _round(value: Optional[float]) -> Optional[float]:
+        return round(value, 1) if value is not None else None
+
+
+class CallRecord:
+    """Timings of one completion call, filled in by the layers it passes through."""
+
+    def __init__(self, caller: str, model: Optional[str], stream: bool):
+        self.caller = caller
+        self.model = model
+        self.stream = stream
+        self.provider: Optional[str] = None
+        self.source = "upstream"  # upstream | cache | semantic_cache | replay
+        self.start = time.perf_counter()
+        self.queue_s = 0.0
+        self.ttft_s: Optional[float] = None
+        self.duration_s: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.chunks = 0
+        self.error: Optional[str] = None
+
+    def mark_first_token(self):
+        if self.ttft_s is None:
+            self.ttft_s = time.perf_counter() - self.start
+
+    def take_usage(self, usage: Any):
+        if usage is not None:
+            self.prompt_tokens = getattr(usage, "prompt_tokens", None)
+            self.completion_tokens = getattr(usage, "completion_tokens", None)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        tokens = self.completion_tokens if self.completion_tokens is not None else (self.chunks or None)
+        if not tokens or self.duration_s is None:
+            return None
+        generating = self.duration_s - (self.ttft_s if self.stream and self.ttft_s else 0.0)
+        return tokens / generating if generating > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        ms = lambda s: round(s * 1000, 1) if s is not None else None
+        tps = self.tokens_per_second
+        return {
+            "caller": self.caller, "model": self.model, "provider": self.provider, "source": self.source,
+            "stream": self.stream, "queue_ms": ms(self.queue_s), "ttft_ms": ms(self.ttft_s),
+            "duration_ms": ms(self.duration_s), "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": round(tps, 1) if tps is not None else None, "error": self.error
+        }
+
+
+# The record of the call currently in progress; the router adds queue wait and provider to it
+current_call: contextvars.ContextVar[Optional[CallRecord]] = contextvars.ContextVar("llm_current_call", default=None)
+
+
+class CallerStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.sources: Dict[str, int] = {}
+        self.models: Dict[str, int] = {}
+        self.queue_ms = Histogram(MS_BUCKETS)
+        self.ttft_ms = Histogram(MS_BUCKETS)
+        self.duration_ms = Histogram(MS_BUCKETS)
+        self.tokens_per_second = Histogram(TPS_BUCKETS)
+
+    def add(self, record: CallRecord):
+        self.calls += 1
+        self.sources[record.source] = self.sources.get(record.source, 0) + 1
+        label = f"{record.provider or '-'}/{record.model or '-'}"
+        self.models[label] = self.models.get(label, 0) + 1
+        if record.error:
+            self.errors += 1
+            return
+        self.prompt_tokens += record.prompt_tokens or 0
+        self.completion_tokens += record.completion_tokens or 0
+        self.queue_ms.observe(record.queue_s * 1000)
+        if record.ttft_s is not None:
+            self.ttft_ms.observe(record.ttft_s * 1000)
+        if record.duration_s is not None:
+            self.duration_ms.observe(record.duration_s * 1000)
+        if record.tokens_per_second is not None:
+            self.tokens_per_second.observe(record.tokens_per_second)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "sources": self.sources,
+            "models": self.models,
+            "queue_ms": self.queue_ms.snapshot(),
+            "ttft_ms": self.ttft_ms.snapshot(),
+            "duration_ms": self.duration_ms.snapshot(),
+            "tokens_per_second": self.tokens_per_second.snapshot()
+        }
+
+
+class MeteredStream:
+    """Wraps a completion stream to time the first token and count output as the caller reads it."""
+
+    def __init__(self, stream: Any, record: CallRecord, telemetry: "LLMTelemetry"):
+        self._stream = stream
+        self._iterator = stream.__aiter__()
+        self._record = record
+        self._telemetry = telemetry
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self._telemetry.finish(self._record)
+            raise
+        except Exception as e:
+            self._telemetry.finish(self._record, error=e)
+            raise
+        if getattr(chunk, "usage", None):
+            self._record.take_usage(chunk.usage)
+        if chunk.choices:
+            delta = chunk.choices[0].delta
+            if delta.content or delta.tool_calls:
+                self._record.mark_first_token()
+                self._record.chunks += 1
+        return chunk
+
+    async def aclose(self):
+        # Caller stopped reading early (client disconnect, hedge loser, ...)
+        self._telemetry.finish(self._record)
+        close = getattr(self._stream, "aclose", None) or getattr(self._stream, "close", None)
+        if close:
+            await close()
+
+    close = aclose
+
+
+class LLMTelemetry:
+    """Per-caller latency / throughput histograms for every completion call."""
+
+    def __init__(self):
+        self.callers: Dict[str, CallerStats] = {}
+        self.recent: deque = deque(maxlen=50)
+
+    def start(self, caller: str, kwargs: Dict[str, Any]) -> CallRecord:
+        return CallRecord(caller, kwargs.get("model"), bool(kwargs.get("stream")))
+
+    def finish(self, record: CallRecord, response: Any = None, error: Optional[BaseException] = None):
+        if record.duration_s is not None:
+            return  # already recorded
+        record.duration_s = time.perf_counter() - record.start
+        if error is not None:
+            record.error = type(error).__name__
+        if response is not None:
+            record.take_usage(getattr(response, "usage", None))
+            record.model = getattr(response, "model", None) or record.model
+            record.ttft_s = record.duration_s  # non-streaming: the whole answer is the first token
+        self.callers.setdefault(record.caller, CallerStats()).add(record)
+        self.recent.append(record.to_dict())
+
+    def wrap_stream(self, stream: Any, record: CallRecord) -> MeteredStream:
+        return MeteredStream(stream, record, self)
+
+    def reset(self):
+        self.callers.clear()
+        self.recent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "callers": {name: stats.snapshot() for name, stats in sorted(self.callers.items())},
+            "recent": list(self.recent)[-20:]
+        }
+
+
+# Global Instance
+llm_telemetry = LLMTelemetry()
@@ -1,85 +1,275 @@
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+import time
+from typing import Optional, List, Dict, Any, Callable
 from contextlib import AsyncExitStack
 
+import anyio
+import httpx
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamable_http_client
+from mcp.server import Server
+import mcp.types as types
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ErrorData
+
+from .inprocess import inprocess_transport
 
 logger = logging.getLogger(__name__)
 
+# Streamable HTTP: the server answered 404 for our session id (it restarted), so the request didn't run
+SESSION_TERMINATED = 32600
+
+def is_undelivered(error: BaseException) -> bool:
+    """The request never reached the server (its pipe was already gone), so resending is safe"""
+    if isinstance(error, McpError):
+        return error.error.code == SESSION_TERMINATED
+    return isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError))
+
+def _single_cause(error: BaseException) -> BaseException:
+    """Unwrap task-group exception groups holding a single error (e.g. an HTTP ConnectError)"""
+    while len(getattr(error, "exceptions", ())) == 1:
+        error = error.exceptions[0]
+    return error
+
+def is_connection_lost(error: BaseException) -> bool:
+    """The server process or its pipes died, before or during the request"""
+    return is_undelivered(error) or (isinstance(error, McpError) and error.error.code == CONNECTION_CLOSED)
+
 class MCPClient:
-    def __init__(self, name: str, command: str, args: List[str] = [], env: Dict[str, str] = None):
+    def __init__(self, name: str, command: str, args: List[str] = [], env: Dict[str, str] = None,
+                 connect_timeout: float = 10.0, fetch_tools: bool = True, server: Optional[Server] = None,
+                 url: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
         self.name = name
         self.server_params = StdioServerParameters(
             command=command,
             args=args,
             env=env
         )
+        # First-party servers can run in this process instead, over in-memory streams
+        self.server = server
+        # Shared servers are reached over streamable HTTP; the pooled HTTP client outlives reconnects
+        self.url = url
+        self.headers = headers
+        self._http: Optional[httpx.AsyncClient] = None
+        self.connect_timeout = connect_timeout
+        # Extra replicas of a server share the primary's tool list instead of fetching their own
+        self.fetch_tools = fetch_tools
         self.session: Optional[ClientSession] = None
-        self._exit_stack: Optional[AsyncExitStack] = None
         self.tools: List[Any] = []
+        self._runner: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        # Lazy lifecycle bookkeeping: spawns counts subprocess starts, active_calls is
+        # maintained by the manager so an idle stop never races an incoming call
+        self._lifecycle_lock = asyncio.Lock()
+        self.spawns = 0
+        self.restarts = 0  # reconnects after a failure, counted by the manager's supervisor
+        self.connected_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # The connection ended without disconnect() being asked for (e.g. the HTTP server went away)
+        self.connection_lost = False
+        # Called with this client after a tools/list_changed notification refreshed self.tools
+        self.on_tools_changed: Optional[Callable[["MCPClient"], None]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_again = False
+        self.active_calls = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
+
+    @property
+    def transport(self) -> str:
+        if self.server is not None:
+            return "inprocess"
+        return "http" if self.url else "stdio"
 
     async def connect(self):
-        """Connect to the MCP Server and initialize session"""
+        """
+        Connect to the MCP Server and initialize session.
+
+        The stdio transport and session live in a dedicated runner task: anyio requires
+        their context managers to be exited by the task that entered them, and callers
+        (startup, API requests, supervisors) all run in different tasks.
+        """
+        self.spawns += 1
+        self.last_used = time.monotonic()
+        self.connection_lost = False
+        ready = asyncio.get_running_loop().create_future()
+        ready.add_done_callback(lambda f: f.cancelled() or f.exception())  # never "unretrieved"
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(ready, self._stop))
         try:
-            self._exit_stack = AsyncExitStack()
-            
-            # Start stdio client
-            read, write = await self._exit_stack.enter_async_context(
-                stdio_client(self.server_params)
-            )
-            
-            # Start session
-            self.session = await self._exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            
-            # Initialize with timeout
-            await asyncio.wait_for(self.session.initialize(), timeout=10.0)
-            logger.info(f"Connected to MCP Server: {self.name}")
-            
-            # List tools immediately with timeout
-            await asyncio.wait_for(self.refresh_tools(), timeout=10.0)
-            
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout connecting to MCP Server {self.name}")
-            await self.disconnect()
-            raise RuntimeError(f"Timeout connecting to server {self.name}")
-        except Exception as e:
-            logger.error(f"Failed to connect to MCP Server {self.name}: {e}")
+            await asyncio.shield(ready)
+        except asyncio.CancelledError:
+            # Caller gave up (e.g. startup timeout): don't leave a half-started subprocess behind
             await self.disconnect()
             raise
 
+    async def _run(self, ready: asyncio.Future, stop: asyncio.Event):
+        try:
+            async with AsyncExitStack() as stack:
+                # Start stdio client (or the in-process server)
+                if self.server is not None:
+                    read, write = await stack.enter_async_context(inprocess_transport(self.server))
+                elif self.url:
+                    if self._http is None:
+                        # Same timeouts as the SDK's default client: responses may stream for a while
+                        self._http = httpx.AsyncClient(headers=self.headers, timeout=httpx.Timeout(30.0, read=300.0))
+                    read, write, _ = await stack.enter_async_context(streamable_http_client(self.url, http_client=self._http))
+                else:
+                    read, write = await stack.enter_async_context(stdio_client(self.server_params))
+
+                # Start session
+                session = await stack.enter_async_context(ClientSession(read, write, message_handler=self._on_message))
+
+                # Initialize + list tools with timeout
+                await asyncio.wait_for(session.initialize(), timeout=self.connect_timeout)
+                self.session = session
+                logger.info(f"Connected to MCP Server: {self.name}")
+                if self.fetch_tools:
+                    await asyncio.wait_for(self.refresh_tools(), timeout=self.connect_timeout)
+
+                self.connected_at = time.monotonic()
+                ready.set_result(True)
+                await stop.wait()
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout connecting to MCP Server {self.name}")
+            if not ready.done():
+                ready.set_exception(RuntimeError(f"Timeout connecting to server {self.name}"))
+        except BaseException as e:
+            if not ready.done():
+                cause = _single_cause(e)
+                logger.error(f"Failed to connect to MCP Server {self.name}: {type(cause).__name__} {cause}")
+                ready.set_exception(cause if isinstance(cause, Exception) else RuntimeError(str(cause)))
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.session = None
+            self.connected_at = None
+            if ready.done() and not ready.cancelled() and ready.exception() is None and not stop.is_set():
+                logger.warning(f"Connection to MCP Server {self.name} was lost")
+                self.connection_lost = True
+
     async def disconnect(self):
         """Disconnect and cleanup"""
-        if self._exit_stack:
-            await self._exit_stack.aclose()
+        runner, self._runner = self._runner, None
+        if runner and not runner.done():
+            self._stop.set()
+            if self.session is None:
+                runner.cancel()  # still starting up: nothing to wind down gracefully
+            try:
+                await asyncio.wait_for(runner, timeout=5.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            except Exception as e:
+                logger.warning(f"Error while closing MCP Server {self.name}: {e}")
         self.session = None
-        self._exit_stack = None
         logger.info(f"Disconnected from MCP Server: {self.name}")
 
+    async def close(self):
+        """Disconnect for good, releasing pooled HTTP connections too"""
+        await self.disconnect()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def ensure_connected(self) -> bool:
+        """Start the server if it isn't running; concurrent callers share one spawn. True if this call spawned it."""
+        if self.connected:
+            return False
+        async with self._lifecycle_lock:
+            if self.connected:
+                return False
+            await self.connect()
+            return True
+
+    async def restart(self):
+        """Tear down a broken connection and start a fresh subprocess"""
+        async with self._lifecycle_lock:
+            await self.disconnect()
+            await self.connect()
+
+    async def ping(self, timeout: float):
+        if not self.session:
+            raise RuntimeError(f"Client {self.name} is not connected")
+        await asyncio.wait_for(self._unless_lost(self.session.send_ping()), timeout=timeout)
+
+    @property
+    def uptime(self) -> Optional[float]:
+        return time.monotonic() - self.connected_at if self.connected_at is not None else None
+
+    async def stop_if_idle(self, idle_timeout: float) -> bool:
+        """Stop the subprocess if nothing used it for idle_timeout seconds; tools stay advertised."""
+        async with self._lifecycle_lock:
+            if not self.connected or self.active_calls or time.monotonic() - self.last_used < idle_timeout:
+                return False
+            await self.disconnect()
+            return True
+
+    async def _on_message(self, message: Any):
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            if not self.fetch_tools:
+                return
+            # This runs on the session's receive loop, which must stay free to read the list_tools reply
+            if self._refresh_task and not self._refresh_task.done():
+                self._refresh_again = True
+            else:
+                self._refresh_task = asyncio.create_task(self._refresh_on_change())
+
+    async def _refresh_on_change(self):
+        self._refresh_again = True
+        while self._refresh_again and self.session:
+            self._refresh_again = False  # notifications arriving mid-refresh trigger one more pass
+            try:
+                await asyncio.wait_for(self.refresh_tools(), timeout=self.connect_timeout)
+            except Exception as e:
+                logger.warning(f"Failed to refresh tools of {self.name} after list_changed: {e}")
+                return
+            if self.on_tools_changed:
+                self.on_tools_changed(self)
+
     async def refresh_tools(self):
         """Fetch available tools from the server"""
         if not self.session:
             raise RuntimeError(f"Client {self.name} is not connected")
-        
+
         result = await self.session.list_tools()
         self.tools = result.tools
         logger.info(f"Fetched {len(self.tools)} tools from {self.name}")
         return self.tools
 
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None):
+    async def _unless_lost(self, request):
+        """
+        Await a request, failing it as soon as the connection ends. Over HTTP a failed POST
+        tears the transport down without answering the requests still waiting on it.
+        """
+        runner = self._runner
+        pending = asyncio.ensure_future(request)
+        try:
+            if runner is not None:
+                await asyncio.wait({pending, runner}, return_when=asyncio.FIRST_COMPLETED)
+            if not pending.done():
+                raise McpError(ErrorData(code=CONNECTION_CLOSED, message=f"Connection to {self.name} closed"))
+            return pending.result()
+        finally:
+            pending.cancel()
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None, timeout: float = 30.0):
         """Call a specific tool"""
         if not self.session:
+            if self.connection_lost:
+                # Nothing was sent: the caller may reconnect and resend
+                raise anyio.ClosedResourceError(f"Connection to {self.name} was lost")
             raise RuntimeError(f"Client {self.name} is not connected")
-            
-        # Add 30s timeout for tool execution
+
         try:
             result = await asyncio.wait_for(
-                self.session.call_tool(tool_name, arguments or {}), 
-                timeout=30.0
+                self._unless_lost(self.session.call_tool(tool_name, arguments or {})),
+                timeout=timeout
             )
             return result
         except asyncio.TimeoutError:
-            raise RuntimeError(f"Tool execution timed out ({30}s)")
+            raise RuntimeError(f"Tool execution timed out ({timeout}s)")
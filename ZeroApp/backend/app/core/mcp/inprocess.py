@@ -0,0 +1,103 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import anyio
+from mcp.server import Server
+from mcp.shared.memory import create_client_server_memory_streams
+
+logger = logging.getLogger(__name__)
+
+# script path -> (env it was imported with, module); restarts and lazy respawns reuse the module
+# and its state, while a changed env (e.g. a new GITHUB_TOKEN) replaces it on the next reload
+_modules: Dict[str, Tuple[Tuple[Tuple[str, str], ...], Any]] = {}
+_closing = set()  # keeps the replaced modules' client shutdowns alive until they finish
+
+
+@contextmanager
+def _environ(env: Dict[str, str]):
+    """The server modules read their settings from os.environ at import time; don't leak them into ours"""
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _dispose(module: Any):
+    """Close the HTTP client a replaced server module kept (the first-party servers pool one in `_client`)"""
+    close = getattr(getattr(module, "_client", None), "aclose", None)
+    if close is None:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(close())
+    except RuntimeError:
+        return  # no loop to close it on; it goes with the module
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def load_server(args: List[str], env: Optional[Dict[str, str]] = None) -> Server:
+    """
+    Import the server script named in a config entry's args (what `python` would have run)
+    and return its module-level `server`. The env is applied only while the module is
+    imported, so a server must read its settings from os.environ at import time. One module
+    is kept per script: reloading an entry whose env changed imports the script again and
+    replaces the old module instead of keeping the old credentials.
+    """
+    script = next((arg for arg in args if arg.endswith(".py")), None)
+    if script is None:
+        raise ValueError("transport 'inprocess' needs the server's .py file in args")
+    path = os.path.abspath(script)
+    env_key = tuple(sorted((env or {}).items()))
+    loaded = _modules.get(path)
+    module = loaded[1] if loaded and loaded[0] == env_key else None
+    if module is None:
+        module_name = f"mcp_inprocess_{os.path.splitext(os.path.basename(path))[0]}"
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        if spec is None or spec.loader is None:
+            raise ValueError(f"Cannot import MCP server from {path}")
+        module = importlib.util.module_from_spec(spec)
+        # Scripts call logging.basicConfig() for their own process; keep the backend's logging as it is
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        try:
+            with _environ(env or {}):
+                spec.loader.exec_module(module)
+        finally:
+            root.handlers[:], root.level = handlers, level
+        _modules[path] = (env_key, module)
+        if loaded:
+            _dispose(loaded[1])
+        logger.info(f"Loaded in-process MCP server module {module_name} from {path}")
+    server = getattr(module, "server", None)
+    if not isinstance(server, Server):
+        raise ValueError(f"{path} has no module-level MCP Server named 'server'")
+    return server
+
+
+@asynccontextmanager
+async def inprocess_transport(server: Server) -> AsyncIterator[tuple]:
+    """
+    Drop-in for stdio_client: runs the server as a task on this event loop and yields the
+    client's (read, write) memory streams. Its handlers share the backend's loop, so they
+    must not block it.
+    """
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            server_read, server_write = server_streams
+            tg.start_soon(lambda: server.run(
+                server_read, server_write, server.create_initialization_options(), raise_exceptions=False
+            ))
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
@@ -1,10 +1,18 @@
+import asyncio
 import logging
 import json
 import os
+import random
 import sys
+import time
 from typing import Dict, List, Any, Optional
-from .client import MCPClient
+import mcp.types as types
+from .client import MCPClient, is_connection_lost, is_undelivered
+from .inprocess import load_server
+from .policy import ServerPolicy
 from app.core.config import settings
+from app.core.cassette import cassette, fingerprint
+from app.core.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -14,8 +22,25 @@ class MCPManager:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MCPManager, cls).__new__(cls)
-            cls._instance.clients: Dict[str, MCPClient] = {}
+            cls._instance.clients: Dict[str, MCPClient] = {}  # name -> primary replica, owner of the tool list
+            cls._instance.replicas: Dict[str, List[MCPClient]] = {}  # name -> all replicas, primary first
+            cls._instance.status: Dict[str, Dict[str, Any]] = {}  # name -> state / error / timings
+            cls._instance._init_task: Optional[asyncio.Task] = None
+            cls._instance.configs: Dict[str, Dict[str, Any]] = {}  # name -> config entry it was started from
+            cls._instance.policies: Dict[str, ServerPolicy] = {}  # name -> timeouts / limits / breakers
+            cls._instance._idle_timers: Dict[MCPClient, asyncio.TimerHandle] = {}
+            cls._instance._background: set = set()
+            cls._instance._reconnects: Dict[MCPClient, asyncio.Task] = {}
+            cls._instance._supervisor: Optional[asyncio.Task] = None
+            cls._instance._starting: Dict[str, asyncio.Task] = {}
+            # Advertised tools, dumped once per change; tools_version bumps whenever any list changes
+            cls._instance._tool_dumps: Dict[str, List[Dict[str, Any]]] = {}
+            cls._instance._all_tools: Optional[List[Dict[str, Any]]] = None
+            cls._instance.tools_version = 0
+            cls._instance.idempotent_tools: Dict[str, List[str]] = {}
+            cls._instance.flight = SingleFlight("mcp")
             cls._instance.config_path = os.path.join(os.getcwd(), "data", "mcp_config.json")
+            cls._instance.tools_cache_path = os.path.join(os.getcwd(), "data", "mcp_tools_cache.json")
         return cls._instance
 
     def __init__(self):
@@ -40,9 +65,48 @@ class MCPManager:
         with open(self.config_path, "w", encoding="utf-8") as f:
             json.dump(config, f, indent=2)
 
+    def _tools_cache_key(self, command: str, args: List[str]) -> str:
+        # A changed command line invalidates the cached schemas
+        return fingerprint({"command": command, "args": args})
+
+    def load_cached_tools(self, name: str, command: str, args: List[str]) -> Optional[List[types.Tool]]:
+        """Tool schemas recorded the last time this server ran, if still valid for its command line"""
+        if not os.path.exists(self.tools_cache_path):
+            return None
+        try:
+            with open(self.tools_cache_path, "r", encoding="utf-8") as f:
+                entry = json.load(f).get("servers", {}).get(name)
+            if not entry or entry.get("key") != self._tools_cache_key(command, args):
+                return None
+            return [types.Tool.model_validate(tool) for tool in entry["tools"]]
+        except Exception as e:
+            logger.warning(f"Ignoring MCP tools cache for {name}: {e}")
+            return None
+
+    def save_cached_tools(self, name: str, client: MCPClient):
+        """Persist a server's tool schemas so a lazy server can advertise them without running"""
+        cache = {"servers": {}}
+        try:
+            if os.path.exists(self.tools_cache_path):
+                with open(self.tools_cache_path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+        except Exception as e:
+            logger.warning(f"Rebuilding MCP tools cache: {e}")
+        params = client.server_params
+        cache.setdefault("servers", {})[name] = {
+            "key": self._tools_cache_key(params.command, params.args),
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in client.tools],
+            "updated_at": time.time()
+        }
+        os.makedirs(os.path.dirname(self.tools_cache_path), exist_ok=True)
+        tmp_path = self.tools_cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, self.tools_cache_path)
+
     def _resolve_config(self, cfg: Dict[str, Any]) -> tuple[str, List[str], Dict[str, str]]:
         """Helper to resolve command, args, and env from config dict"""
-        command = cfg.get("command")
+        command = cfg.get("command") or cfg.get("url", "")  # HTTP servers are identified by their URL
         args = cfg.get("args", [])
         env = cfg.get("env", {})
         
@@ -76,25 +140,64 @@ class MCPManager:
             
         return command, resolved_args, final_env
 
+    def _set_status(self, name: str, state: str, **details):
+        self.status[name] = {"state": state, "since": time.time(), **details}
+
+    async def _start_server(self, name: str, cfg: Dict[str, Any]):
+        """Connect one configured server, bounded by its startup timeout; failures only affect its status."""
+        timeout = cfg.get("startup_timeout", settings.MCP_STARTUP_TIMEOUT)
+        start = time.perf_counter()
+        try:
+            logger.info(f"Initializing MCP Server: {name}")
+            await asyncio.wait_for(self.register_from_config(name, cfg), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"MCP Server {name} did not start within {timeout}s")
+            self._set_status(name, "failed", error=f"Startup timed out after {timeout}s")
+            self._unpublish_tools(name)
+        except Exception as e:
+            logger.error(f"Failed to initialize server {name}: {e}")
+            self._set_status(name, "failed", error=str(e))
+            self._unpublish_tools(name)
+        else:
+            if self.clients[name].connected:
+                self.status[name]["connect_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
     async def initialize_from_config(self):
-        """Initialize and connect servers based on stored config"""
+        """Initialize and connect servers based on stored config, all at once"""
         config = self.load_config()
         servers = config.get("servers", {})
-        
+
+        pending = []
         for name, cfg in servers.items():
             if not cfg.get("enabled", True):
+                self._set_status(name, "disabled")
                 continue
-                
+
             # Skip if already running to avoid unnecessary restarts during full init
-            if name in self.clients:
+            if name in self.clients or name in self._starting:
                 continue
+            self._set_status(name, "connecting")
+            # Cold start: advertise the tools it had last time while it connects
+            command, resolved_args, _ = self._resolve_config(cfg)
+            cached = self.load_cached_tools(name, command, resolved_args)
+            if cached is not None:
+                self._publish_tools(name, cached)
+            task = asyncio.create_task(self._start_server(name, cfg))
+            self._starting[name] = task
+            task.add_done_callback(lambda t, name=name: self._starting.pop(name, None) if self._starting.get(name) is t else None)
+            pending.append(task)
 
-            try:
-                command, resolved_args, final_env = self._resolve_config(cfg)
-                logger.info(f"Initializing MCP Server: {name}")
-                await self.register_server(name, command, resolved_args, final_env)
-            except Exception as e:
-                logger.error(f"Failed to initialize server {name}: {e}")
+        # Each server is bounded by its own timeout, so one slow server can't hold up the others
+        await asyncio.gather(*pending)
+
+    def start_background_initialization(self) -> asyncio.Task:
+        """
+        Kick off initialize_from_config without waiting for it (app startup). Servers come
+        online one by one; /mcp/servers shows each one's state in the meantime.
+        """
+        if self._init_task is None or self._init_task.done():
+            self._init_task = asyncio.create_task(self.initialize_from_config())
+        return self._init_task
 
     async def reload_server_from_config(self, name: str):
         """Reload a specific server from config (force restart)"""
@@ -111,54 +214,420 @@ class MCPManager:
              return
 
         try:
-            command, resolved_args, final_env = self._resolve_config(cfg)
             logger.info(f"Reloading MCP Server: {name}")
+            self._set_status(name, "connecting")
             # register_server handles disconnect/reconnect if exists
-            await self.register_server(name, command, resolved_args, final_env)
+            await self.register_from_config(name, cfg)
         except Exception as e:
             logger.error(f"Failed to reload server {name}: {e}")
+            self._set_status(name, "failed", error=str(e))
             raise e
 
-    async def register_server(self, name: str, command: str, args: List[str] = [], env: Dict[str, str] = None):
-        """Register and connect to a new MCP server"""
+    async def register_from_config(self, name: str, cfg: Dict[str, Any]):
+        """
+        Register a server from its mcp_config.json entry.
+
+        "lifecycle": "lazy" servers with cached tool schemas are registered without being
+        spawned; they start on their first call_tool and stop again after "idle_timeout"
+        seconds without calls. Lazy servers seen for the first time are spawned once to
+        learn their tools.
+
+        "transport": "inprocess" imports a first-party Python server (the .py file in args)
+        into the backend and talks to it over memory streams instead of a subprocess pipe.
+        Its handlers then run on the backend's event loop, so they must be non-blocking.
+        "transport": "http" connects to an already running server at "url" over streamable
+        HTTP (optional "headers"), so all backend workers share one server process.
+        """
+        command, resolved_args, final_env = self._resolve_config(cfg)
+        lazy = cfg.get("lifecycle", "eager") == "lazy"
+        cached = self.load_cached_tools(name, command, resolved_args) if lazy else None
+        transport = cfg.get("transport", "stdio")
+        server = load_server(resolved_args, final_env) if transport == "inprocess" else None
+        url = cfg.get("url") if transport == "http" else None
+        if transport == "http" and not url:
+            raise ValueError(f"MCP Server {name} uses transport 'http' but has no url")
+        replicas = cfg.get("replicas", 1)
+        if server is not None and replicas > 1:
+            logger.warning(f"MCP Server {name} runs in-process; ignoring replicas={replicas}")
+            replicas = 1
+        self.configs[name] = cfg
+        policy = ServerPolicy(name, cfg)
+        if name in self.policies:
+            policy.carry_over(self.policies[name])  # a reload doesn't forget a sick server
+        self.policies[name] = policy
+        client = await self.register_server(name, command, resolved_args, final_env, cfg.get("idempotent_tools"),
+                                            tools=cached, replicas=replicas, server=server, url=url,
+                                            headers=cfg.get("headers"))
+        if lazy:
+            for replica in self.replicas[name]:
+                if replica.connected:
+                    self._arm_idle_timer(name, replica)
+        return client
+
+    async def register_server(self, name: str, command: str, args: List[str] = [], env: Dict[str, str] = None,
+                              idempotent_tools: List[str] = None, tools: Optional[List[types.Tool]] = None,
+                              replicas: int = 1, server: Any = None, url: Optional[str] = None,
+                              headers: Optional[Dict[str, str]] = None):
+        """
+        Register and connect to a new MCP server; with `tools` it is registered stopped, advertising those.
+
+        replicas > 1 runs that many subprocesses of the server; calls go to the replica with the
+        fewest outstanding calls. Only the primary (first) replica lists tools. `server` is an
+        imported MCP Server to run in-process instead of spawning `command`; `url` connects to
+        a shared server over streamable HTTP instead.
+        """
         if name in self.clients:
             logger.warning(f"MCP Server {name} already registered. Reconnecting...")
-            await self.clients[name].disconnect()
+            await self._disconnect_replicas(name)
 
-        client = MCPClient(name, command, args, env)
-        await client.connect()
+        pool = [MCPClient(name, command, args, env, fetch_tools=(i == 0), server=server, url=url, headers=headers)
+                for i in range(max(1, replicas))]
+        client = pool[0]
+        if tools is None:
+            results = await asyncio.gather(*[replica.connect() for replica in pool], return_exceptions=True)
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                await asyncio.gather(*[replica.close() for replica in pool])
+                raise errors[0]
+            self.save_cached_tools(name, client)
+            self._set_status(name, "connected", tools=len(client.tools))
+        else:
+            client.tools = tools
+            self._set_status(name, "idle", tools=len(tools))
         self.clients[name] = client
+        self.replicas[name] = pool
+        self.idempotent_tools[name] = idempotent_tools or []
+        client.on_tools_changed = lambda changed: self._on_tools_changed(name, changed)
+        self._publish_tools(name, client.tools)
         return client
 
+    def _publish_tools(self, name: str, tools: List[Any]):
+        dumped = [tool.model_dump() if hasattr(tool, "model_dump") else dict(tool) for tool in tools]
+        if self._tool_dumps.get(name) != dumped:
+            self._tool_dumps[name] = dumped
+            self._tools_updated()
+
+    def _unpublish_tools(self, name: str):
+        if self._tool_dumps.pop(name, None) is not None:
+            self._tools_updated()
+
+    def _tools_updated(self):
+        self._all_tools = None
+        self.tools_version += 1
+
+    def _on_tools_changed(self, name: str, client: MCPClient):
+        """The server sent tools/list_changed and the client re-listed its tools"""
+        if self.clients.get(name) is not client:
+            return
+        logger.info(f"Tool list of MCP Server {name} changed ({len(client.tools)} tools)")
+        self.save_cached_tools(name, client)
+        self._publish_tools(name, client.tools)
+        if name in self.status:
+            self.status[name]["tools"] = len(client.tools)
+
+    async def _disconnect_replicas(self, name: str):
+        pool = self.replicas.pop(name, None) or ([self.clients[name]] if name in self.clients else [])
+        for replica in pool:
+            self._cancel_idle_timer(replica)
+            self._cancel_reconnect(replica)
+        await asyncio.gather(*[replica.close() for replica in pool])
+
+    def _pick_replica(self, name: str) -> MCPClient:
+        """Least outstanding calls first; a lazy pool spawns another replica only when the running ones are busy"""
+        pool = self.replicas.get(name) or [self.clients[name]]
+        if len(pool) == 1:
+            return pool[0]
+        ready = [c for c in pool if c.connected and c not in self._reconnects]
+        best = min(ready, key=lambda c: c.active_calls, default=None)
+        if best is not None and (best.active_calls == 0 or not self.is_lazy(name)):
+            return best
+        stopped = [c for c in pool if not c.connected and c not in self._reconnects]
+        if stopped and self.is_lazy(name):
+            return stopped[0]  # a burst shares the spawn already under way
+        if best is not None:
+            return best
+        return min(pool, key=lambda c: c.active_calls)  # all reconnecting: queue or fail on one of them
+
+    def is_lazy(self, name: str) -> bool:
+        return self.configs.get(name, {}).get("lifecycle", "eager") == "lazy"
+
+    async def _wake(self, name: str, client: MCPClient):
+        """Spawn a stopped lazy server; concurrent callers wait on the same spawn"""
+        timeout = self.configs.get(name, {}).get("startup_timeout", settings.MCP_STARTUP_TIMEOUT)
+        start = time.perf_counter()
+        self._set_status(name, "connecting")
+        try:
+            spawned = await asyncio.wait_for(client.ensure_connected(), timeout=timeout)
+        except Exception as e:
+            self._set_status(name, "failed", error=str(e) or type(e).__name__)
+            raise RuntimeError(f"Failed to start MCP Server {name}: {e}")
+        if spawned:
+            logger.info(f"Spawned lazy MCP Server {name} in {time.perf_counter() - start:.2f}s")
+            if client.fetch_tools:
+                self.save_cached_tools(name, client)
+                self._publish_tools(name, client.tools)
+            self._set_status(name, "connected", tools=len(self.clients[name].tools),
+                             connect_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def _arm_idle_timer(self, name: str, client: MCPClient):
+        idle_timeout = self.configs.get(name, {}).get("idle_timeout", settings.MCP_IDLE_TIMEOUT)
+        if not idle_timeout or idle_timeout <= 0:
+            return
+        self._cancel_idle_timer(client)
+        self._idle_timers[client] = asyncio.get_running_loop().call_later(idle_timeout, self._on_idle, name, client, idle_timeout)
+
+    def _cancel_idle_timer(self, client: MCPClient):
+        timer = self._idle_timers.pop(client, None)
+        if timer:
+            timer.cancel()
+
+    def _on_idle(self, name: str, client: MCPClient, idle_timeout: float):
+        self._idle_timers.pop(client, None)
+        task = asyncio.create_task(self._stop_idle(name, client, idle_timeout))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _stop_idle(self, name: str, client: MCPClient, idle_timeout: float):
+        if client not in self.replicas.get(name, []):
+            return
+        if await client.stop_if_idle(idle_timeout):
+            logger.info(f"Stopped idle MCP Server {name} after {idle_timeout}s")
+            if not any(replica.connected for replica in self.replicas.get(name, [])):
+                self._set_status(name, "idle", tools=len(self.clients[name].tools))
+        elif client.connected and not client.active_calls:
+            self._arm_idle_timer(name, client)  # fired a hair early
+
+    def start_supervisor(self) -> Optional[asyncio.Task]:
+        """Ping running servers every MCP_HEALTH_INTERVAL seconds and reconnect the ones that died"""
+        if settings.MCP_HEALTH_INTERVAL > 0 and (self._supervisor is None or self._supervisor.done()):
+            self._supervisor = asyncio.create_task(self._supervise())
+        return self._supervisor
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(settings.MCP_HEALTH_INTERVAL)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"MCP health check failed: {e}")
+
+    async def check_health(self):
+        """Ping every running server; a server that doesn't answer gets reconnected"""
+        targets = [(name, client) for name, pool in self.replicas.items() for client in pool
+                   if (client.connected or client.connection_lost) and client not in self._reconnects]
+        results = await asyncio.gather(*[client.ping(settings.MCP_PING_TIMEOUT) for _, client in targets],
+                                       return_exceptions=True)
+        for (name, client), result in zip(targets, results):
+            # A lazy server stopped for idleness mid-ping isn't broken
+            if isinstance(result, BaseException) and (client.connected or client.connection_lost):
+                self._schedule_reconnect(name, client, f"ping failed: {type(result).__name__} {result}".strip())
+
+    def _schedule_reconnect(self, name: str, client: MCPClient, reason: str):
+        if client not in self.replicas.get(name, []) or client in self._reconnects:
+            return
+        logger.warning(f"MCP Server {name} is unhealthy ({reason}), reconnecting")
+        client.last_error = reason
+        self._set_status(name, "reconnecting", error=reason)
+        task = asyncio.create_task(self._reconnect(name, client))
+        self._reconnects[client] = task
+        task.add_done_callback(lambda t: self._reconnects.pop(client, None) if self._reconnects.get(client) is t else None)
+
+    def _cancel_reconnect(self, client: MCPClient):
+        task = self._reconnects.pop(client, None)
+        if task:
+            task.cancel()
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # Exponential with equal jitter: servers that died together don't retry in lockstep
+        ceiling = min(settings.MCP_RECONNECT_MAX_DELAY, settings.MCP_RECONNECT_BASE_DELAY * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    async def _reconnect(self, name: str, client: MCPClient):
+        timeout = self.configs.get(name, {}).get("startup_timeout", settings.MCP_STARTUP_TIMEOUT)
+        attempt = 0
+        while client in self.replicas.get(name, []):
+            try:
+                await asyncio.wait_for(client.restart(), timeout=timeout)
+            except Exception as e:
+                attempt += 1
+                delay = self._backoff(attempt)
+                logger.warning(f"Reconnect {attempt} to MCP Server {name} failed ({e}), retrying in {delay:.1f}s")
+                self._set_status(name, "reconnecting", error=client.last_error, attempts=attempt,
+                                 last_attempt_error=str(e) or type(e).__name__)
+                await asyncio.sleep(delay)
+                continue
+            client.restarts += 1
+            logger.info(f"Reconnected to MCP Server {name} (restart #{client.restarts})")
+            if client.fetch_tools:
+                self.save_cached_tools(name, client)
+                self._publish_tools(name, client.tools)
+            self._set_status(name, "connected", tools=len(self.clients[name].tools))
+            if self.is_lazy(name) and not client.active_calls:
+                self._arm_idle_timer(name, client)
+            return
+
+    async def _ensure_available(self, name: str, client: MCPClient):
+        """Hold (or fast-fail) a call while its server reconnects; spawn stopped lazy servers"""
+        reconnect = self._reconnects.get(client)
+        if reconnect:
+            cfg = self.configs.get(name, {})
+            if cfg.get("on_unavailable", settings.MCP_ON_UNAVAILABLE) == "fail":
+                raise RuntimeError(f"MCP Server {name} is reconnecting")
+            timeout = cfg.get("queue_timeout", settings.MCP_QUEUE_TIMEOUT)
+            await asyncio.wait({reconnect}, timeout=timeout)
+            if not client.connected:
+                raise RuntimeError(f"MCP Server {name} is still unavailable after {timeout}s")
+        elif not client.connected and self.is_lazy(name):
+            await self._wake(name, client)
+
+    def policy(self, name: str) -> ServerPolicy:
+        if name not in self.policies:
+            self.policies[name] = ServerPolicy(name, self.configs.get(name, {}))
+        return self.policies[name]
+
+    def server_status(self, name: str) -> Dict[str, Any]:
+        """Status entry plus live lifecycle / health counters and breaker state"""
+        detail = dict(self.status.get(name, {}))
+        if name in self.policies:
+            detail["policy"] = self.policies[name].snapshot()
+        pool = self.replicas.get(name)
+        if pool:
+            uptimes = [c.uptime for c in pool if c.uptime is not None]
+            running = sum(c.connected for c in pool)
+            if detail.get("state") == "reconnecting" and running:
+                detail["state"] = "degraded"  # some replicas are down, the rest keep serving
+            detail.update({
+                "lifecycle": self.configs.get(name, {}).get("lifecycle", "eager"),
+                "transport": pool[0].transport,
+                "running": running > 0,
+                "spawns": sum(c.spawns for c in pool),
+                "active_calls": sum(c.active_calls for c in pool),
+                "uptime_s": round(min(uptimes), 1) if uptimes else None,
+                "restarts": sum(c.restarts for c in pool),
+                "last_error": next((c.last_error for c in pool if c.last_error), None)
+            })
+            if len(pool) > 1:
+                detail["replicas"] = [{
+                    "running": c.connected,
+                    "reconnecting": c in self._reconnects,
+                    "active_calls": c.active_calls,
+                    "restarts": c.restarts
+                } for c in pool]
+        return detail
+
     async def remove_server(self, name: str):
         """Disconnect and remove a server"""
+        self.configs.pop(name, None)
+        self.policies.pop(name, None)
         if name in self.clients:
-            await self.clients[name].disconnect()
+            await self._disconnect_replicas(name)
             del self.clients[name]
+        self.idempotent_tools.pop(name, None)
+        self.status.pop(name, None)
+        self._unpublish_tools(name)
+
+    def is_idempotent(self, server_name: str, tool_name: str) -> bool:
+        """
+        A tool is safe to coalesce when the config lists it under "idempotent_tools"
+        or the server annotates it readOnlyHint / idempotentHint.
+        """
+        if tool_name in self.idempotent_tools.get(server_name, []):
+            return True
+        client = self.clients.get(server_name)
+        for tool in client.tools if client else []:
+            if tool.name == tool_name:
+                annotations = getattr(tool, "annotations", None)
+                return bool(annotations and (annotations.readOnlyHint or annotations.idempotentHint))
+        return False
 
     def get_all_tools(self) -> List[Dict[str, Any]]:
-        """Get flattened list of all tools from all servers"""
-        all_tools = []
-        for client_name, client in self.clients.items():
-            for tool in client.tools:
-                # Add client namespace to tool metadata if needed, 
-                # or just return the raw tool structure
-                tool_dict = tool.model_dump() if hasattr(tool, "model_dump") else tool
-                tool_dict["_server"] = client_name
-                all_tools.append(tool_dict)
+        """
+        Get flattened list of all tools from all servers (treat the dicts as read-only).
+        Rebuilt only when tools_version changes; servers still starting up advertise the
+        tools cached from their last run.
+        """
+        if self._all_tools is None:
+            self._all_tools = [{**tool, "_server": name} for name, tools in self._tool_dumps.items() for tool in tools]
+        all_tools = list(self._all_tools)
+
+        if cassette.recording:
+            cassette.record_tools(all_tools)
+        elif cassette.replaying and not all_tools:
+            # Offline replay: advertise the tool list the session was recorded with
+            all_tools = cassette.replay_tools() or []
         return all_tools
 
     async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any] = None):
         """Call a tool on a specific server"""
+        if cassette.replaying:
+            return await cassette.replay_tool_call(server_name, tool_name, arguments)
+
+        starting = self._starting.get(server_name)
+        if server_name not in self.clients and starting:
+            # Advertised from the cold-start cache: wait for the connection (bounded by its startup timeout)
+            await asyncio.wait({starting})
+            if server_name not in self.clients:
+                raise RuntimeError(f"MCP Server {server_name} failed to start: {self.status.get(server_name, {}).get('error')}")
+
         if server_name not in self.clients:
             raise ValueError(f"Server {server_name} not found")
-        
-        return await self.clients[server_name].call_tool(tool_name, arguments)
+
+        # Open breaker: fail now with a message the model can act on; else wait for a slot
+        async with self.policy(server_name).guard(tool_name) as timeout:
+            client = self._pick_replica(server_name)
+            try:
+                return await self._call_on(server_name, client, tool_name, arguments, timeout)
+            except Exception as e:
+                if not is_connection_lost(e):
+                    raise
+                self._schedule_reconnect(server_name, client, f"{tool_name}: {type(e).__name__} {e}".strip())
+                # Resend only what certainly didn't run, or what is safe to run twice; another
+                # replica takes it if one is healthy, otherwise it waits for the reconnect
+                if not (is_undelivered(e) or self.is_idempotent(server_name, tool_name)):
+                    raise
+                return await self._call_on(server_name, self._pick_replica(server_name), tool_name, arguments, timeout)
+
+    async def _call_on(self, server_name: str, client: MCPClient, tool_name: str, arguments: Optional[Dict[str, Any]],
+                       timeout: Optional[float] = None):
+        timeout = settings.MCP_TOOL_TIMEOUT if timeout is None else timeout
+        # Counted before any await so an idle stop can't slip in between spawn and call,
+        # and so concurrent callers see this replica as busy
+        client.active_calls += 1
+        self._cancel_idle_timer(client)
+        try:
+            await self._ensure_available(server_name, client)
+            return await self._dispatch(server_name, client, tool_name, arguments, timeout)
+        finally:
+            client.active_calls -= 1
+            client.last_used = time.monotonic()
+            if not client.active_calls and self.is_lazy(server_name) and client in self.replicas.get(server_name, []):
+                self._arm_idle_timer(server_name, client)
+
+    async def _dispatch(self, server_name: str, client: MCPClient, tool_name: str, arguments: Optional[Dict[str, Any]],
+                        timeout: float):
+        call = lambda name, args: client.call_tool(name, args, timeout=timeout)
+        if cassette.recording:
+            return await cassette.record_tool_call(server_name, tool_name, arguments, call)
+
+        if settings.LLM_SINGLE_FLIGHT and self.is_idempotent(server_name, tool_name):
+            key = f"{server_name}|{tool_name}|{fingerprint(arguments or {})}"
+            return await self.flight.do(key, lambda: call(tool_name, arguments))
+        return await call(tool_name, arguments)
 
     async def shutdown(self):
         """Shutdown all connections"""
-        for name in list(self.clients.keys()):
-            await self.remove_server(name)
+        if self._init_task and not self._init_task.done():
+            self._init_task.cancel()
+        if self._supervisor and not self._supervisor.done():
+            self._supervisor.cancel()
+        for task in list(self._starting.values()):
+            task.cancel()
+        for client in list(self._idle_timers):
+            self._cancel_idle_timer(client)
+        await asyncio.gather(*[self.remove_server(name) for name in list(self.clients.keys())])
+        for name in list(self._tool_dumps):
+            self._unpublish_tools(name)  # cold-start entries of servers that never connected
 
 # Global Instance
 mcp_manager = MCPManager()
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a tool whose breaker is open; the message is shown to the model."""
+
+    def __init__(self, target: str, retry_after: float, reason: str):
+        self.target = target
+        self.retry_after = retry_after
+        super().__init__(
+            f"{target} is temporarily unavailable ({reason}). "
+            f"Not calling it for another {math.ceil(retry_after)}s; continue without it or try a different tool."
+        )
+
+
+class CircuitBreaker:
+    """
+    Opens when the failure ratio over a sliding window crosses `failure_ratio` (with at
+    least `min_calls` calls in it). After `open_seconds` it lets `half_open_probes` trial
+    calls through: if they all succeed it closes, any failure opens it again.
+    """
+
+    def __init__(self, target: str, cfg: Dict[str, Any]):
+        self.target = target
+        self.failure_ratio = cfg.get("failure_ratio", settings.MCP_BREAKER_FAILURE_RATIO)
+        self.min_calls = cfg.get("min_calls", settings.MCP_BREAKER_MIN_CALLS)
+        self.window_seconds = cfg.get("window", settings.MCP_BREAKER_WINDOW)
+        self.open_seconds = cfg.get("open_seconds", settings.MCP_BREAKER_OPEN_SECONDS)
+        self.half_open_probes = max(1, cfg.get("half_open_probes", settings.MCP_BREAKER_HALF_OPEN_PROBES))
+        self.outcomes: deque = deque()  # (timestamp, ok)
+        self._state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def settings(self) -> tuple:
+        return (self.failure_ratio, self.min_calls, self.window_seconds, self.open_seconds, self.half_open_probes)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self.probes_in_flight = self.probe_successes = 0
+        return self._state
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self.outcomes and self.outcomes[0][0] < cutoff:
+            self.outcomes.popleft()
+
+    def _failure_stats(self) -> tuple:
+        self._prune()
+        failures = sum(1 for _, ok in self.outcomes if not ok)
+        return failures, len(self.outcomes)
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError; in half-open state this reserves a probe."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and self.probes_in_flight + self.probe_successes < self.half_open_probes:
+            self.probes_in_flight += 1
+            return
+        self.rejected += 1
+        failures, calls = self._failure_stats()
+        retry_after = max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+        raise CircuitOpenError(self.target, retry_after or 1.0, f"{failures} of its last {calls} calls failed")
+
+    def record(self, ok: bool):
+        state = self.state
+        if state == HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            if not ok:
+                self._open()
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.half_open_probes:
+                logger.info(f"Circuit for {self.target} closed after {self.probe_successes} successful probe(s)")
+                self._state = CLOSED
+                self.outcomes.clear()
+            return
+        if state == OPEN:
+            return  # straggler that started before the breaker opened
+        self.outcomes.append((time.monotonic(), ok))
+        failures, calls = self._failure_stats()
+        if not ok and calls >= self.min_calls and failures / calls >= self.failure_ratio:
+            self._open()
+
+    def abandon(self):
+        """A half-open probe was cancelled before it produced an outcome."""
+        if self._state == HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _open(self):
+        self._state = OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning(f"Circuit for {self.target} opened for {self.open_seconds}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        failures, calls = self._failure_stats()
+        return {
+            "state": state,
+            "failures": failures,
+            "calls": calls,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in_s": round(self.opened_at + self.open_seconds - time.monotonic(), 1) if state == OPEN else None
+        }
+
+
+class _Limit:
+    """Concurrency cap (0 = unlimited) with a count of running calls."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.running = 0
+
+
+class ServerPolicy:
+    """
+    Timeouts, concurrency limits and circuit breakers for one MCP server, from its
+    mcp_config.json entry:
+
+        "timeout": 20, "max_concurrency": 8,
+        "circuit_breaker": {"failure_ratio": 0.5, "min_calls": 5, "window": 60,
+                            "open_seconds": 30, "half_open_probes": 1},
+        "tools": {"search_repositories": {"timeout": 10, "max_concurrency": 2,
+                                          "circuit_breaker": {...}}}
+
+    The server-wide limit and breaker cover every call; a tool entry adds its own on top.
+    Only exceptions (timeouts, dead servers, transport errors) count as breaker failures,
+    not tool results flagged isError - those are usually bad arguments, not a sick server.
+    """
+
+    def __init__(self, server: str, cfg: Dict[str, Any]):
+        self.server = server
+        self.timeout = cfg.get("timeout", settings.MCP_TOOL_TIMEOUT)
+        self.limit = _Limit(cfg.get("max_concurrency", settings.MCP_MAX_CONCURRENCY))
+        self.breaker = CircuitBreaker(f"MCP server '{server}'", cfg.get("circuit_breaker") or {})
+        self.tool_configs: Dict[str, Dict[str, Any]] = cfg.get("tools") or {}
+        self.tool_limits: Dict[str, _Limit] = {}
+        self.tool_breakers: Dict[str, CircuitBreaker] = {}
+        for tool, tool_cfg in self.tool_configs.items():
+            if tool_cfg.get("max_concurrency"):
+                self.tool_limits[tool] = _Limit(tool_cfg["max_concurrency"])
+            if tool_cfg.get("circuit_breaker") is not None:
+                self.tool_breakers[tool] = CircuitBreaker(f"Tool '{tool}' on MCP server '{server}'", tool_cfg["circuit_breaker"])
+
+    def carry_over(self, previous: "ServerPolicy"):
+        """Keep the breakers of the policy this one replaces (on a config reload) whose settings didn't change."""
+        if previous.breaker.settings == self.breaker.settings:
+            self.breaker = previous.breaker
+        for tool, breaker in self.tool_breakers.items():
+            old = previous.tool_breakers.get(tool)
+            if old is not None and old.settings == breaker.settings:
+                self.tool_breakers[tool] = old
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.tool_configs.get(tool_name, {}).get("timeout", self.timeout)
+
+    @asynccontextmanager
+    async def guard(self, tool_name: str) -> AsyncIterator[float]:
+        """
+        Admit one call: fail fast on an open breaker, wait (at most the tool timeout) for a
+        concurrency slot, then yield the execution timeout and record the outcome.
+        """
+        timeout = self.timeout_for(tool_name)
+        breakers = [self.breaker] + ([self.tool_breakers[tool_name]] if tool_name in self.tool_breakers else [])
+        admitted: List[CircuitBreaker] = []
+        try:
+            for breaker in breakers:
+                breaker.before_call()
+                admitted.append(breaker)
+        except CircuitOpenError:
+            for breaker in admitted:
+                breaker.abandon()
+            raise
+
+        limits = [self.limit] + ([self.tool_limits[tool_name]] if tool_name in self.tool_limits else [])
+        acquired: List[_Limit] = []
+        recorded = False
+        try:
+            for limit in limits:
+                if limit.semaphore is not None:
+                    try:
+                        await asyncio.wait_for(limit.semaphore.acquire(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        raise RuntimeError(
+                            f"{tool_name} on {self.server} is busy ({limit.running} calls running, "
+                            f"limit {limit.max_concurrency}); gave up after {timeout}s"
+                        )
+                limit.running += 1
+                acquired.append(limit)
+            try:
+                yield timeout
+            except Exception:
+                for breaker in breakers:
+                    breaker.record(False)
+                recorded = True
+                raise
+            for breaker in breakers:
+                breaker.record(True)
+            recorded = True
+        finally:
+            for limit in acquired:
+                limit.running -= 1
+                if limit.semaphore is not None:
+                    limit.semaphore.release()
+            if not recorded:
+                for breaker in breakers:
+                    breaker.abandon()
+
+    def snapshot(self) -> Dict[str, Any]:
+        tools = {}
+        for tool in sorted(set(self.tool_configs) | set(self.tool_limits) | set(self.tool_breakers)):
+            entry: Dict[str, Any] = {"timeout": self.timeout_for(tool)}
+            if tool in self.tool_limits:
+                entry["running"] = self.tool_limits[tool].running
+                entry["max_concurrency"] = self.tool_limits[tool].max_concurrency
+            if tool in self.tool_breakers:
+                entry["circuit"] = self.tool_breakers[tool].snapshot()
+            tools[tool] = entry
+        return {
+            "timeout": self.timeout,
+            "running": self.limit.running,
+            "max_concurrency": self.limit.max_concurrency or None,
+            "circuit": self.breaker.snapshot(),
+            "tools": tools
+        }
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.cassette import fingerprint, normalize_request
+
+
+def canonical(value: Any) -> Any:
+    """Recursively sort dict keys so equal schemas serialize to identical bytes."""
+    if isinstance(value, dict):
+        return {k: canonical(value[k]) for k in sorted(value)}
+    if isinstance(value, list):
+        return [canonical(v) for v in value]
+    return value
+
+
+def prefix_hashes(model: str, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> List[str]:
+    """
+    Rolling hashes of a request in the order a provider prompt cache reads it: entry 0 covers
+    model and tool schemas, entry i adds messages[i - 1]. Two requests share a cacheable
+    prefix exactly as far as their lists agree.
+    """
+    digest = fingerprint({"model": model, "tools": tools or []})
+    chain = [digest]
+    for message in normalize_request({"messages": messages})["messages"]:
+        digest = fingerprint([digest, message])
+        chain.append(digest)
+    return chain
+
+
+class PrefixTracker:
+    """
+    Measures how much of a conversation's previous request its next request resends unchanged.
+    A turn is stable when everything but the previous request's last message (the newest user
+    turn, carrying that turn's volatile context) is still a prefix; truncated history, a changed
+    system prompt or reordered tools count as changed.
+    """
+
+    def __init__(self, max_keys: int = 1000):
+        self.max_keys = max_keys
+        self._last: OrderedDict = OrderedDict()  # key -> (hash chain, seen_at)
+        self.turns = 0
+        self.stable = 0
+        self.changed = 0
+        self.shared_total = 0.0  # sum over turns of the shared fraction of the previous request
+
+    def observe(self, key: str, chain: List[str]) -> Optional[bool]:
+        """Returns True/False for stable/changed, None for the first turn of `key`."""
+        previous = self._last.pop(key, None)
+        self._last[key] = (chain, time.time())
+        if len(self._last) > self.max_keys:
+            self._last.popitem(last=False)
+        if previous is None:
+            return None
+        before = previous[0]
+        shared = 0
+        while shared < min(len(before), len(chain)) and before[shared] == chain[shared]:
+            shared += 1
+        self.turns += 1
+        self.shared_total += shared / len(before)
+        if shared >= len(before) - 1:
+            self.stable += 1
+            return True
+        self.changed += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._last),
+            "turns": self.turns,
+            "stable": self.stable,
+            "changed": self.changed,
+            "stable_rate": round(self.stable / self.turns, 3) if self.turns else None,
+            "shared_prefix_rate": round(self.shared_total / self.turns, 3) if self.turns else None
+        }
+
+
+# Global Instance
+prefix_tracker = PrefixTracker()
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0  # user is watching a response (chat, agent)
+PRIORITY_NORMAL = 1       # explicit but non-streaming work (research, writing)
+PRIORITY_BACKGROUND = 2   # nobody is waiting (tag generation)
+
+# How much of an advertised limit we plan to use; keeps a margin for clock skew
+HEADER_LIMIT_FACTOR = 0.95
+# Multiplicative decrease applied on a 429 that carries no limit headers
+BACKOFF_FACTOR = 0.8
+# Additive recovery towards the configured ceiling per successful request
+RECOVERY_STEP = 0.01
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|s|m|h)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Retry-After style values: '2', '1.5', '20ms', '6m0s' -> seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * units[u] for n, u in parts)
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Rough prompt + completion estimate (~4 chars per token) used before the real usage is known."""
+    chars = sum(len(str(m.get("content") or "")) if isinstance(m, dict) else len(str(getattr(m, "content", "") or ""))
+                for m in request.get("messages", []))
+    if request.get("tools"):
+        chars += len(str(request["tools"]))
+    return int(chars / 4) + int(request.get("max_tokens") or 512)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at capacity-per-minute."""
+
+    def __init__(self, per_minute: float):
+        self.ceiling = per_minute   # configured upper bound
+        self.capacity = per_minute  # current (adapted) size
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.ceiling <= 0
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.unlimited:
+            return 0.0
+        self.refill()
+        # A single request bigger than the bucket may proceed once the bucket is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+
+    def consume(self, amount: float):
+        if not self.unlimited:
+            self.tokens -= min(amount, self.capacity)
+
+    def resize(self, capacity: float):
+        if self.unlimited or capacity <= 0:
+            return
+        self.refill()
+        self.capacity = max(1.0, min(capacity, self.ceiling))
+        self.tokens = min(self.tokens, self.capacity)
+
+
+class RateLimiter:
+    """
+    Client-side limiter for one provider key: a requests/min and a tokens/min bucket,
+    a priority queue in front of them, and adaptation to what the provider reports.
+
+    Waiters are served strictly by (priority, arrival): only the head of the queue
+    may consume tokens, so background work never overtakes an interactive request.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+        self._cond_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self.rate_limited = 0
+
+    def _condition(self) -> asyncio.Condition:
+        """
+        The Condition for the running loop, created on first use. A Condition binds to the
+        loop that first waits on it, and the module-level routers outlive any one loop
+        (tests, TestClient); waiters queued on a previous loop can never run, so they are dropped.
+        """
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._cond_loop is not loop:
+            self._cond, self._cond_loop = asyncio.Condition(), loop
+            self._queue.clear()
+        return self._cond
+
+    def _wait_time(self, amount: int) -> float:
+        return max(self.blocked_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(amount))
+
+    async def acquire(self, amount: int, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Wait for capacity; returns the seconds spent queued."""
+        start = time.monotonic()
+        if self.requests.unlimited and self.tokens.unlimited and not self._queue and self.blocked_until <= start:
+            return 0.0
+
+        entry = (priority, next(self._seq))
+        cond = self._condition()
+        async with cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if self._queue[0] == entry:
+                        wait = self._wait_time(amount)
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self.requests.consume(1)
+                            self.tokens.consume(amount)
+                            cond.notify_all()
+                            return time.monotonic() - start
+                    else:
+                        wait = None  # not our turn; woken when the head leaves
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                # Cancelled while queued: leave the queue and let the next waiter in
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    cond.notify_all()
+                raise
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Correct the token bucket once real usage is known."""
+        if actual is None or self.tokens.unlimited:
+            return
+        self.tokens.refill()
+        self.tokens.tokens = min(self.tokens.capacity, self.tokens.tokens + estimated - actual)
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Adopt the provider's advertised limits / remaining quota (OpenAI-style x-ratelimit-* headers)."""
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            try:
+                if limit:
+                    bucket.resize(float(limit) * HEADER_LIMIT_FACTOR)
+                elif not bucket.unlimited and bucket.capacity < bucket.ceiling:
+                    bucket.resize(bucket.capacity + bucket.ceiling * RECOVERY_STEP)
+                if remaining and not bucket.unlimited:
+                    bucket.refill()
+                    bucket.tokens = min(bucket.tokens, float(remaining))
+            except ValueError:
+                continue
+
+    def on_rate_limited(self, headers: Mapping[str, str]) -> float:
+        """Handle a 429: pause every waiter until the provider says we may retry. Returns the pause."""
+        self.rate_limited += 1
+        delay = parse_duration(headers.get("retry-after-ms"))
+        delay = delay / 1000 if delay is not None else parse_duration(headers.get("retry-after"))
+        if delay is None:
+            resets = [parse_duration(headers.get(f"x-ratelimit-reset-{k}")) for k in ("requests", "tokens")]
+            resets = [r for r in resets if r is not None]
+            delay = max(resets) if resets else None
+
+        if "x-ratelimit-limit-requests" in headers or "x-ratelimit-limit-tokens" in headers:
+            self.observe_headers(headers)
+        else:
+            # No advertised limit: we are above the real ceiling, shrink (AIMD)
+            for bucket in (self.requests, self.tokens):
+                bucket.resize(bucket.capacity * BACKOFF_FACTOR)
+
+        delay = delay if delay is not None else 1.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        logger.warning(f"Rate limited by provider; pausing {delay:.2f}s")
+        return delay
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rpm_capacity": None if self.requests.unlimited else round(self.requests.capacity, 1),
+            "tpm_capacity": None if self.tokens.unlimited else round(self.tokens.capacity, 1),
+            "queued": len(self._queue),
+            "rate_limited": self.rate_limited
+        }
@@ -0,0 +1,188 @@
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cassette import fingerprint, normalize_request
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """
+    CPU-only hashing embedding: word unigrams + character trigrams, signed feature
+    hashing (crc32, stable across processes), L2-normalized. No model download,
+    ~tens of microseconds per prompt, and handles CJK text via the character n-grams.
+    """
+    text = " ".join(text.lower().split())
+    features = _WORD.findall(text)
+    padded = f" {text} "
+    features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    if not features:
+        return np.zeros(dim, dtype=np.float32)
+
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint64, count=len(features))
+    indices = (hashes % dim).astype(np.int64)
+    signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+    vector = np.bincount(indices, weights=signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _Group:
+    """Entries sharing one scope + identical non-user context, stored as a ring buffer matrix."""
+
+    def __init__(self, capacity: int, dim: int):
+        self.capacity = capacity
+        self.vectors = np.zeros((min(capacity, 16), dim), dtype=np.float32)  # grows by doubling
+        self.answers: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.created: List[float] = [0.0] * capacity
+        self.count = 0
+        self.next = 0
+        self.updated = 0.0  # newest entry's creation time
+
+    def nearest(self, query: np.ndarray) -> Tuple[int, float]:
+        if self.count == 0:
+            return -1, 0.0
+        scores = self.vectors[:self.count] @ query
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def add(self, vector: np.ndarray, answer: Dict[str, Any]):
+        slot = self.next
+        if slot >= len(self.vectors):
+            grown = np.zeros((min(len(self.vectors) * 2, self.capacity), self.vectors.shape[1]), dtype=np.float32)
+            grown[:len(self.vectors)] = self.vectors
+            self.vectors = grown
+        self.vectors[slot] = vector
+        self.answers[slot] = answer
+        self.created[slot] = self.updated = time.time()
+        self.next = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+
+class SemanticCache:
+    """
+    Near-duplicate prompt cache in front of the LLM layer.
+
+    Only applies to stateless calls (no assistant/tool turns, a single user message)
+    that pass a `semantic_scope` such as "chat_send:default". Everything except the
+    user message (model, system prompt, tools, temperature, ...) must match exactly;
+    the user message matches by cosine similarity >= LLM_SEMANTIC_CACHE_THRESHOLD.
+    Scopes suit messages that are mostly the user's own words; a long fixed template
+    around a small variable part embeds close to every other fill of that template.
+
+    Groups (one per scope + system prompt) are bounded like the exact cache: at most
+    LLM_SEMANTIC_CACHE_MAX_GROUPS, least recently used dropped first, and a group whose
+    newest entry is older than LLM_CACHE_TTL is dropped outright.
+
+    Modes: off | shadow (look up and count would-be hits, but always call the LLM) | on.
+    """
+
+    def __init__(self):
+        self._groups: "OrderedDict[str, _Group]" = OrderedDict()  # least recently used first
+        self.evictions = 0
+        self.lookups = 0
+        self.hits = 0
+        self.shadow_hits = 0
+        self.stores = 0
+        self.similarities: List[float] = []
+
+    @property
+    def mode(self) -> str:
+        return settings.LLM_SEMANTIC_CACHE_MODE
+
+    def _split(self, kwargs: Dict[str, Any], scope: str) -> Optional[Tuple[str, str]]:
+        """Return (group key, user text) for stateless requests, else None."""
+        request = normalize_request(kwargs)
+        messages = request.get("messages", [])
+        users = [m for m in messages if m.get("role") == "user"]
+        if len(users) != 1 or any(m.get("role") not in ("system", "user") for m in messages):
+            return None
+        text = users[0].get("content")
+        if not isinstance(text, str) or not text.strip():
+            return None
+        context = dict(request, messages=[m for m in messages if m.get("role") == "system"])
+        return f"{scope}:{fingerprint(context)}", text
+
+    def lookup(self, kwargs: Dict[str, Any], scope: Optional[str]) -> Tuple[Optional[Any], Optional[tuple]]:
+        """
+        Returns (cached response or None, store token). Pass the token to store()
+        after a real call so the answer becomes available for later lookups.
+        """
+        from openai.types.chat import ChatCompletion
+
+        if self.mode == "off" or not scope or kwargs.get("stream"):
+            return None, None
+        split = self._split(kwargs, scope)
+        if split is None:
+            return None, None
+
+        group_key, text = split
+        vector = embed(text, settings.LLM_SEMANTIC_CACHE_DIM)
+        group = self._groups.get(group_key)
+        self.lookups += 1
+        if group is not None and time.time() - group.updated > settings.LLM_CACHE_TTL:
+            del self._groups[group_key]
+            self.evictions += 1
+            group = None
+        if group is not None:
+            self._groups.move_to_end(group_key)
+            slot, similarity = group.nearest(vector)
+            fresh = slot >= 0 and time.time() - group.created[slot] <= settings.LLM_CACHE_TTL
+            if fresh and similarity >= settings.LLM_SEMANTIC_CACHE_THRESHOLD:
+                self.similarities = (self.similarities + [similarity])[-1000:]
+                if self.mode == "on":
+                    self.hits += 1
+                    return ChatCompletion.model_validate(group.answers[slot]), None
+                self.shadow_hits += 1
+                logger.info(f"Semantic cache shadow hit in {scope} (similarity {similarity:.3f})")
+        return None, (group_key, vector)
+
+    def store(self, token: Optional[tuple], response: Any):
+        if token is None:
+            return
+        group_key, vector = token
+        group = self._groups.get(group_key)
+        if group is None:
+            group = _Group(settings.LLM_SEMANTIC_CACHE_MAX_ENTRIES, settings.LLM_SEMANTIC_CACHE_DIM)
+            self._groups[group_key] = group
+        self._groups.move_to_end(group_key)
+        group.add(vector, response.model_dump())
+        self.stores += 1
+        self._evict()
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, g in self._groups.items() if now - g.updated > settings.LLM_CACHE_TTL]:
+            del self._groups[key]
+            self.evictions += 1
+        while len(self._groups) > settings.LLM_SEMANTIC_CACHE_MAX_GROUPS:
+            self._groups.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        would_hit = self.hits + self.shadow_hits
+        return {
+            "mode": self.mode,
+            "threshold": settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+            "groups": len(self._groups),
+            "evictions": self.evictions,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "shadow_hits": self.shadow_hits,
+            "stores": self.stores,
+            "would_be_hit_rate": round(would_hit / self.lookups, 3) if self.lookups else 0.0,
+            "mean_hit_similarity": round(float(np.mean(self.similarities)), 3) if self.similarities else None
+        }
+
+
+# Global Instance
+semantic_cache = SemanticCache()
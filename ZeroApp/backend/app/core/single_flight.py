@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Broadcast:
+    """One upstream stream fanned out to every subscriber; late joiners replay from the first chunk."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.opened: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+
+    async def pump(self, opener: Callable[[], Awaitable[Any]]):
+        try:
+            source = await opener()
+        except BaseException as e:
+            self.opened.set_exception(e)
+            self.opened.exception()  # mark retrieved: waiters may all be gone
+            self.done = True
+            return
+        self.opened.set_result(True)
+
+        try:
+            async for chunk in source:
+                async with self.changed:
+                    self.chunks.append(chunk)
+                    self.changed.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            close = getattr(source, "aclose", None) or getattr(source, "close", None)
+            if close:
+                await close()
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def replay(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: self.done or len(self.chunks) > index)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index == len(self.chunks):
+                if self.error is not None and not isinstance(self.error, asyncio.CancelledError):
+                    raise self.error
+                return
+
+    def release(self):
+        self.subscribers -= 1
+        if self.subscribers == 0 and not self.task.done():
+            # Everyone hung up: stop paying for tokens nobody reads
+            self.task.cancel()
+
+
+class _Subscription:
+    """
+    One caller's iterator over a _Broadcast. Its seat is released when the iterator is
+    exhausted, fails, is closed, or is dropped without ever being iterated.
+    """
+
+    def __init__(self, broadcast: _Broadcast):
+        self._broadcast = broadcast
+        self._chunks = broadcast.replay()
+        self._released = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._chunks.__anext__()
+        except BaseException:
+            self.release()
+            raise
+
+    async def aclose(self):
+        try:
+            await self._chunks.aclose()
+        finally:
+            self.release()
+
+    close = aclose
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._broadcast.release()
+
+    def __del__(self):
+        try:
+            self.release()
+        except RuntimeError:
+            pass  # the loop that ran the broadcast is already closed
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight async calls: the first caller for a key runs the
+    call, concurrent callers with the same key await the same result (or exception).
+    Nothing is remembered once the call finishes - this is not a cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None or task.done():  # a finished call is not "in flight", even before its cleanup runs
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key) if self._calls.get(key) is done else None)
+        else:
+            self.coalesced += 1
+            logger.info(f"[SingleFlight:{self.name}] Joined in-flight call")
+        # One waiter being cancelled must not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def stream(self, key: str, opener: Callable[[], Awaitable[Any]]) -> AsyncIterator[Any]:
+        """
+        Like do(), for calls returning an async iterator. `opener` is awaited once;
+        each caller gets its own iterator over the same chunk sequence.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None or broadcast.done:
+            self.leaders += 1
+            broadcast = _Broadcast()
+            broadcast.task = asyncio.ensure_future(broadcast.pump(opener))
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(
+                lambda _, b=broadcast: self._streams.pop(key) if self._streams.get(key) is b else None)
+        else:
+            self.coalesced += 1
+            logger.info(f"[SingleFlight:{self.name}] Joined in-flight stream")
+
+        broadcast.subscribers += 1
+        try:
+            await asyncio.shield(broadcast.opened)
+        except BaseException:
+            broadcast.subscribers -= 1
+            raise
+        return _Subscription(broadcast)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
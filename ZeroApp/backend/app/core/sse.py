@@ -0,0 +1,72 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+def sse_frame(event: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def coalesce_deltas(events: AsyncIterator[Dict[str, Any]], window_ms: float, max_bytes: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Merge consecutive {"type": "content_delta"} events into one.
+
+    A merged delta is emitted once `window_ms` has passed since its first piece or once it
+    reaches `max_bytes`, even if upstream stalls. Any other event (tool_start, tool_end,
+    error, ...) flushes the pending text first, so ordering is preserved; so does the end
+    of the stream. window_ms <= 0 or max_bytes <= 0 disables merging.
+    """
+    if window_ms <= 0 or max_bytes <= 0:
+        async for event in events:
+            yield event
+        return
+
+    window = window_ms / 1000.0
+    iterator = events.__aiter__()
+    pending_text = []
+    pending_bytes = 0
+    deadline: Optional[float] = None
+    next_event: Optional[asyncio.Task] = None
+
+    def flush() -> Dict[str, Any]:
+        nonlocal pending_text, pending_bytes, deadline
+        event = {"type": "content_delta", "content": "".join(pending_text)}
+        pending_text, pending_bytes, deadline = [], 0, None
+        return event
+
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(iterator.__anext__())
+            if deadline is not None:
+                # Wait for upstream, but no longer than the open window
+                done, _ = await asyncio.wait({next_event}, timeout=max(0.0, deadline - time.monotonic()))
+                if not done:
+                    yield flush()
+                    continue
+            task, next_event = next_event, None
+            try:
+                event = await task
+            except StopAsyncIteration:
+                break
+
+            if event.get("type") == "content_delta":
+                content = event.get("content") or ""
+                pending_text.append(content)
+                pending_bytes += len(content.encode("utf-8"))
+                if deadline is None:
+                    deadline = time.monotonic() + window
+                if pending_bytes >= max_bytes:
+                    yield flush()
+                continue
+
+            if pending_text:
+                yield flush()
+            yield event
+
+        if pending_text:
+            yield flush()
+    finally:
+        if next_event is not None and not next_event.done():
+            next_event.cancel()
@@ -4,6 +4,8 @@ from app.core.config import settings
 from app.api.endpoints import chat, agent, hunt, files, settings as api_settings, mcp
 
 from app.core.mcp.manager import mcp_manager
+from app.core.llm import LLMFactory
+from app.core.http_pool import llm_http_pool
 import os
 import sys
 
@@ -25,12 +27,18 @@ def create_app() -> FastAPI:
     # Startup Event
     @app.on_event("startup")
     async def startup_event():
-        print("[MCP] Initializing from configuration...")
-        try:
-            await mcp_manager.initialize_from_config()
-            print("[MCP] Initialization complete.")
-        except Exception as e:
-            print(f"[MCP] Critical initialization error: {e}")
+        # MCP servers connect concurrently in the background; the API serves right away
+        print("[MCP] Initializing from configuration (background)...")
+        mcp_manager.start_background_initialization()
+        mcp_manager.start_supervisor()
+
+        # Pre-open LLM connections so the first chat doesn't pay the TLS handshake
+        await LLMFactory.warmup()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        await mcp_manager.shutdown()
+        await llm_http_pool.close()
 
     # CORS 配置
     if settings.BACKEND_CORS_ORIGINS:
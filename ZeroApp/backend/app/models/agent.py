@@ -48,4 +48,17 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     content: str
     messages: Optional[List[Dict[str, Any]]] = None # Full history including tool calls
+    usage: Optional[Dict[str, int]] = None # Token usage summed over all agent steps
+    error: Optional[str] = None # Set when the agent failed; content then carries the user-facing message
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None # Stable id used to resume; defaults to "item-<index>"
+    messages: List[ChatMessage]
+    module_name: Optional[str] = None # Falls back to BatchRequest.module_name
+
+class BatchRequest(BaseModel):
+    batch_id: Optional[str] = None # Re-send the same id after a disconnect to resume
+    items: List[BatchItem]
+    module_name: str = "default"
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Max items running in parallel")
 
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.rate_limiter import PRIORITY_BACKGROUND
+from app.models.agent import BatchItem, BatchRequest
+
+BATCHES_DIR = "data/batches"
+
+
+class BatchRun:
+    """
+    Runtime state of one batch. Results are appended to a JSONL file as they finish,
+    so a reconnecting client (or a restarted process) can pick up where it left off.
+    """
+
+    def __init__(self, batch_id: str, path: str, concurrency: int):
+        self.batch_id = batch_id
+        self.path = path
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.listeners: List[asyncio.Queue] = []
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from a crash
+                self.results[result["id"]] = result
+
+    def record(self, result: Dict[str, Any]):
+        self.results[result["id"]] = result
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        for queue in self.listeners:
+            queue.put_nowait(result)
+
+
+class BatchRunner:
+    """
+    Runs many independent chats through ZeroAgent with bounded concurrency.
+
+    Items execute in background tasks that are not tied to the HTTP connection:
+    if the client disconnects, running items still complete and are persisted.
+    Re-posting the same batch_id replays finished items and only starts the rest.
+    """
+
+    def __init__(self, agent, storage_dir: str = BATCHES_DIR):
+        self.agent = agent
+        self.storage_dir = storage_dir
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self.runs: Dict[str, BatchRun] = {}
+
+    def _resolve_concurrency(self, requested: Optional[int]) -> int:
+        concurrency = requested or settings.AGENT_BATCH_CONCURRENCY
+        return max(1, min(concurrency, settings.AGENT_BATCH_MAX_CONCURRENCY))
+
+    def prepare(self, request: BatchRequest) -> Tuple[BatchRun, List[Tuple[str, BatchItem]]]:
+        """
+        Validate the request and attach it to a (new or resumed) run.
+        Raises ValueError on invalid input so the endpoint can reject it before streaming.
+        """
+        batch_id = request.batch_id or str(uuid.uuid4())
+        if not all(c.isalnum() or c in ("-", "_") for c in batch_id):
+            raise ValueError("batch_id may only contain letters, digits, '-' and '_'")
+
+        items = [(item.id or f"item-{i}", item) for i, item in enumerate(request.items)]
+        ids = [item_id for item_id, _ in items]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate item ids in batch")
+
+        run = self.runs.get(batch_id)
+        if run is None:
+            path = os.path.join(self.storage_dir, f"{batch_id}.jsonl")
+            run = BatchRun(batch_id, path, self._resolve_concurrency(request.concurrency))
+            run.load()
+            self.runs[batch_id] = run
+        return run, items
+
+    async def stream(self, run: BatchRun, items: List[Tuple[str, BatchItem]], default_module: str = "default") -> AsyncIterator[str]:
+        """Yield NDJSON lines: a batch header, one result per item as it finishes, then a summary."""
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        run.listeners.append(queue)
+        try:
+            yield self._line({"type": "batch", "batch_id": run.batch_id, "total": len(items)})
+
+            pending = set()
+            for item_id, item in items:
+                if item_id in run.results:
+                    yield self._line({**run.results[item_id], "resumed": True})
+                    continue
+                pending.add(item_id)
+                if item_id not in run.tasks:
+                    run.tasks[item_id] = asyncio.create_task(
+                        self._run_item(run, item_id, item, item.module_name or default_module)
+                    )
+
+            while pending:
+                result = await queue.get()
+                if result["id"] in pending:
+                    pending.discard(result["id"])
+                    yield self._line(result)
+
+            failed = sum(1 for item_id, _ in items if run.results[item_id]["status"] != "ok")
+            yield self._line({
+                "type": "done",
+                "batch_id": run.batch_id,
+                "completed": len(items) - failed,
+                "failed": failed,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+        finally:
+            run.listeners.remove(queue)
+            self._maybe_evict(run)
+
+    async def _run_item(self, run: BatchRun, item_id: str, item: BatchItem, module_name: str):
+        enqueued = time.perf_counter()
+        messages = [m.model_dump(exclude_none=True) for m in item.messages]
+        async with run.semaphore:
+            started = time.perf_counter()
+            try:
+                # Nightly batches must not starve interactive chats sharing the provider key
+                response = await self.agent.chat(messages, module_name=module_name, priority=PRIORITY_BACKGROUND)
+                if response.error:
+                    # ZeroAgent reports LLM/tool failures in the response rather than raising
+                    print(f"[Batch] Item {item_id} in {run.batch_id} failed: {response.error}")
+                    result = {"type": "result", "id": item_id, "status": "error", "error": response.error,
+                              "usage": response.usage or {}}
+                else:
+                    result = {
+                        "type": "result",
+                        "id": item_id,
+                        "status": "ok",
+                        "content": response.content,
+                        "usage": response.usage or {}
+                    }
+            except Exception as e:
+                print(f"[Batch] Item {item_id} in {run.batch_id} failed: {e}")
+                result = {"type": "result", "id": item_id, "status": "error", "error": str(e), "usage": {}}
+            finished = time.perf_counter()
+
+        result["timings"] = {
+            "queue_ms": round((started - enqueued) * 1000, 1),
+            "run_ms": round((finished - started) * 1000, 1)
+        }
+        run.record(result)
+        run.tasks.pop(item_id, None)
+        self._maybe_evict(run)
+
+    def _maybe_evict(self, run: BatchRun):
+        # Finished runs live on disk only; a later resume reloads them from the JSONL file
+        if not run.listeners and not run.tasks:
+            self.runs.pop(run.batch_id, None)
+
+    @staticmethod
+    def _line(payload: Dict[str, Any]) -> str:
+        return json.dumps(payload, ensure_ascii=False) + "\n"
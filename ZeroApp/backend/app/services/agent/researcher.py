@@ -1,6 +1,7 @@
 from typing import List
 from app.models.agent import TrendReport, SearchResult, WritingMethod
 from app.core.llm import LLMFactory
+from app.core.rate_limiter import PRIORITY_NORMAL
 import json
 
 # Mock Research Agent
@@ -46,7 +47,12 @@ Output JSON format:
                 response = await client.chat.completions.create(
                     model=model,
                     messages=[{"role": "user", "content": prompt}],
-                    response_format={ "type": "json_object" }
+                    response_format={ "type": "json_object" },
+                    priority=PRIORITY_NORMAL,
+                    # Exact match only: the fixed template dominates a semantic embedding, so
+                    # analyses of different search results would look like near-duplicates
+                    cache=True, # Same search results -> same analysis
+                    caller="research"
                 )
                 
                 data = json.loads(response.choices[0].message.content)
@@ -86,7 +92,10 @@ Output JSON format:
                 response = await client.chat.completions.create(
                     model=model,
                     messages=[{"role": "user", "content": prompt}],
-                    response_format={ "type": "json_object" }
+                    response_format={ "type": "json_object" },
+                    priority=PRIORITY_NORMAL,
+                    cache=True, # Same search results -> same analysis
+                    caller="research"
                 )
                 
                 data = json.loads(response.choices[0].message.content)
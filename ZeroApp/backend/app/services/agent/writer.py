@@ -1,5 +1,6 @@
 from app.models.agent import TrendReport, WritingMethod
 from app.core.llm import LLMFactory
+from app.core.rate_limiter import PRIORITY_NORMAL
 import json
 
 class WriterAgent:
@@ -35,7 +36,9 @@ REQUIREMENTS:
 """
             response = await client.chat.completions.create(
                 model=model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                priority=PRIORITY_NORMAL,
+                caller="write"
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -73,7 +76,9 @@ REQUIREMENTS:
 """
             response = await client.chat.completions.create(
                 model=model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                priority=PRIORITY_NORMAL,
+                caller="write"
             )
             return response.choices[0].message.content
         except Exception as e:
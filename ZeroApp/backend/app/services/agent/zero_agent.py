@@ -6,6 +6,8 @@ from app.core.llm import LLMFactory
 from app.core.mcp.manager import mcp_manager
 from app.models.agent import ChatMessage, ChatResponse
 from app.services.agent.internal_tools import INTERNAL_TOOLS, execute_internal_tool
+from app.core.rate_limiter import PRIORITY_INTERACTIVE
+from app.core.prompt_prefix import canonical, prefix_hashes, prefix_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,8 @@ class ZeroAgent:
     
     def __init__(self):
         self.max_steps = 10  # Max conversation turns to prevent infinite loops
+        # include_internal -> (mcp_manager.tools_version, mcp_tools, openai_tools)
+        self._tool_schemas: Dict[bool, tuple] = {}
 
     def _load_file(self, path: str) -> str:
         try:
@@ -52,9 +56,12 @@ class ZeroAgent:
         Discard middle messages if too long.
         Assumes ~4 chars per token.
         """
-        # Always keep system messages
-        system_msgs = [m for m in messages if m["role"] == "system"]
-        other_msgs = [m for m in messages if m["role"] != "system"]
+        # Always keep the leading system prompt
+        lead = 0
+        while lead < len(messages) and messages[lead]["role"] == "system":
+            lead += 1
+        system_msgs = messages[:lead]
+        other_msgs = messages[lead:]
         
         # Calculate rough token usage
         total_chars = sum(len(str(m.get("content", ""))) for m in messages)
@@ -78,6 +85,19 @@ class ZeroAgent:
         print(f"ZeroAgent: Context truncated. Original: {len(messages)}, Kept: {len(system_msgs) + len(kept_msgs)}")
         return system_msgs + kept_msgs
 
+    @staticmethod
+    def _add_context(messages: List[Dict[str, Any]], context: str):
+        """Prefix the newest user message with `context` (a copy; the caller's history is untouched)"""
+        last_user = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=None)
+        if last_user is None:
+            messages.append({"role": "user", "content": context})
+        elif isinstance(messages[last_user].get("content"), str):
+            message = messages[last_user]
+            messages[last_user] = {**message, "content": f"{context}\n\n{message['content']}"}
+        else:
+            # Multi-part content: the context goes in as its own user turn just before it
+            messages.insert(last_user, {"role": "user", "content": context})
+
     async def chat_generator(self, messages: List[Dict[str, Any]], module_name: str = "default", context_data: str = None, conversation_id: str = None, history_service: Any = None):
         """
         Generator that yields streaming updates from the agent's thought process.
@@ -92,34 +112,33 @@ class ZeroAgent:
             return
 
         try:
-            mcp_tools = mcp_manager.get_all_tools()
-            openai_tools = self._convert_mcp_to_openai_tools(mcp_tools)
-            
-            # Merge Internal Tools
-            if not openai_tools:
-                openai_tools = []
-            openai_tools.extend(INTERNAL_TOOLS)
-            
+            # MCP tools merged with internal tools
+            mcp_tools, openai_tools = self._get_tools(include_internal=True)
         except Exception as e:
             yield {"type": "error", "content": f"Error fetching tools: {e}"}
             return
         
         current_messages = messages.copy()
         
+        # Layout for provider prefix caching: [persona + module] [tools] [history...] stay
+        # byte-identical between turns; anything volatile goes after them.
         if not any(m["role"] == "system" for m in current_messages):
-            system_prompt = self._build_system_prompt(module_name)
-            
-            # Inject Context if provided
-            if context_data:
-                system_prompt += f"\n\n---\n[SHORT TERM MEMORY / CONTEXT]\n{context_data}\n---"
-                
             current_messages.insert(0, {
                 "role": "system", 
-                "content": system_prompt
+                "content": self._build_system_prompt(module_name)
             })
 
+        # Inject Context if provided (timestamps change every turn) as a preamble of the newest user
+        # message: it stays out of the reusable prefix, and providers that reject a system message
+        # after the first turn accept it
+        if context_data:
+            self._add_context(current_messages, f"[SHORT TERM MEMORY / CONTEXT]\n{context_data}")
+
         # Apply Truncation before sending to LLM
         truncated_messages = self._truncate_messages(current_messages)
+        # Without a conversation id there is no previous turn to compare with
+        if conversation_id:
+            prefix_tracker.observe(conversation_id, prefix_hashes(model, truncated_messages, openai_tools))
 
         step_count = 0
         while step_count < self.max_steps:
@@ -130,13 +149,16 @@ class ZeroAgent:
                     messages=truncated_messages, # Use truncated list for context
                     tools=openai_tools if openai_tools else None,
                     tool_choice="auto" if openai_tools else None,
-                    stream=True
+                    stream=True,
+                    caller="chat_stream"
                 )
                 
                 full_content = ""
                 tool_calls_dict = {} # Map index to tool call object
                 
                 async for chunk in stream:
+                    if not chunk.choices:
+                        continue  # trailing usage chunk
                     delta = chunk.choices[0].delta
                     
                     # Handle Text Content
@@ -282,9 +304,10 @@ class ZeroAgent:
         yield {"type": "content", "content": "\n[System: Max conversation steps reached]"}
         return
 
-    async def chat(self, messages: List[Dict[str, Any]], module_name: str = "default") -> ChatResponse:
+    async def chat(self, messages: List[Dict[str, Any]], module_name: str = "default", priority: int = PRIORITY_INTERACTIVE) -> ChatResponse:
         """
         Process a chat request with MCP tool capabilities.
+        `priority` positions the LLM calls in the rate-limiter queue (batch jobs pass a lower one).
         """
         print(f"ZeroAgent: Chat request received. Module: {module_name}")
         client = LLMFactory.get_client()
@@ -292,17 +315,16 @@ class ZeroAgent:
         
         if not client:
             print("ZeroAgent: Error - LLM Client not initialized.")
-            return ChatResponse(content="System Error: LLM Client not initialized.")
+            return ChatResponse(content="System Error: LLM Client not initialized.", error="LLM client not initialized")
 
         try:
             # 1. Get Tools from MCP Manager and convert to OpenAI format
             print("ZeroAgent: Fetching MCP tools...")
-            mcp_tools = mcp_manager.get_all_tools()
-            openai_tools = self._convert_mcp_to_openai_tools(mcp_tools)
+            mcp_tools, openai_tools = self._get_tools(include_internal=False)
             print(f"ZeroAgent: Available tools count: {len(openai_tools)}")
         except Exception as e:
             print(f"ZeroAgent: Error fetching tools: {e}")
-            return ChatResponse(content=f"Error fetching tools: {e}")
+            return ChatResponse(content=f"Error fetching tools: {e}", error=str(e))
         
         current_messages = messages.copy()
         
@@ -315,6 +337,7 @@ class ZeroAgent:
             })
 
         step_count = 0
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
         
         while step_count < self.max_steps:
             try:
@@ -324,9 +347,16 @@ class ZeroAgent:
                     model=model,
                     messages=current_messages,
                     tools=openai_tools if openai_tools else None,
-                    tool_choice="auto" if openai_tools else None
+                    tool_choice="auto" if openai_tools else None,
+                    priority=priority,
+                    caller="agent_chat"
                 )
                 
+                # Accumulate token usage across steps (not every provider reports it)
+                if getattr(response, "usage", None):
+                    for key in usage:
+                        usage[key] += getattr(response.usage, key, 0) or 0
+                
                 response_message = response.choices[0].message
                 print(f"ZeroAgent: LLM Response received. Content: {response_message.content[:50] if response_message.content else 'None'}...")
                 
@@ -435,13 +465,30 @@ class ZeroAgent:
                             except:
                                 serializable_messages.append(str(m))
 
-                    return ChatResponse(content=response_message.content, messages=serializable_messages)
+                    return ChatResponse(content=response_message.content, messages=serializable_messages, usage=usage)
 
             except Exception as e:
                 print(f"ZeroAgent Chat Error: {e}")
-                return ChatResponse(content=f"An error occurred: {str(e)}", messages=[])
+                return ChatResponse(content=f"An error occurred: {str(e)}", messages=[], usage=usage, error=str(e))
         
-        return ChatResponse(content="Max conversation steps reached.", messages=[])
+        return ChatResponse(content="Max conversation steps reached.", messages=[], usage=usage, error="max_steps reached")
+
+    def _get_tools(self, include_internal: bool) -> tuple:
+        """
+        MCP tools and their OpenAI-format schemas, converted again only when the manager's
+        tools_version moved (a server connected, left, or sent tools/list_changed).
+        """
+        version = mcp_manager.tools_version
+        cached = self._tool_schemas.get(include_internal)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+        mcp_tools = mcp_manager.get_all_tools()
+        openai_tools = self._convert_mcp_to_openai_tools(mcp_tools)
+        if include_internal:
+            openai_tools = openai_tools + INTERNAL_TOOLS
+        openai_tools = self._stable_tools(openai_tools)
+        self._tool_schemas[include_internal] = (version, mcp_tools, openai_tools)
+        return mcp_tools, openai_tools
 
     def _convert_mcp_to_openai_tools(self, mcp_tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -464,3 +511,11 @@ class ZeroAgent:
             }
             openai_tools.append(openai_tool)
         return openai_tools
+
+    @staticmethod
+    def _stable_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Sort tools by name with canonical key order, so the schema block is byte-identical
+        no matter which MCP server connected first (keeps provider prompt caches warm).
+        """
+        return [canonical(t) for t in sorted(tools, key=lambda t: t["function"]["name"])]
@@ -9,6 +9,7 @@ CONVERSATIONS_DIR = "data/conversations"
 
 # We use a flexible Dict for messages to accommodate OpenAI ChatMessage structure (content, tool_calls, etc.)
 from app.core.llm import LLMFactory
+from app.core.rate_limiter import PRIORITY_BACKGROUND
 
 class Conversation(BaseModel):
     id: str
@@ -186,7 +187,9 @@ Conversation:
                 model=LLMFactory.get_model(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
-                max_tokens=100
+                max_tokens=100,
+                priority=PRIORITY_BACKGROUND,
+                caller="tags"
             )
             
             response_text = completion.choices[0].message.content.strip()
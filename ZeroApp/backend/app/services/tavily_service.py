@@ -1,11 +1,14 @@
+import asyncio
 from tavily import TavilyClient
 from app.core.config import settings
+from app.core.single_flight import SingleFlight
 from typing import List, Dict, Any
 
 class TavilyService:
     def __init__(self):
         self.client = None
         self.last_api_key = None
+        self.flight = SingleFlight("tavily")
 
     def _get_client(self):
         current_key = settings.TAVILY_API_KEY
@@ -22,6 +25,7 @@ class TavilyService:
         """
         Execute a search query using Tavily.
         Returns a list of results with title, content, and url.
+        Identical searches already in flight (e.g. several tabs hunting the same topic) share one request.
         """
         client = self._get_client()
         
@@ -29,8 +33,18 @@ class TavilyService:
             # Mock mode if no API key
             return self._mock_search(query)
 
+        if not settings.LLM_SINGLE_FLIGHT:
+            return await self._search(client, query, search_depth, max_results)
+        key = f"{query.strip()}|{search_depth}|{max_results}"
+        results = await self.flight.do(key, lambda: self._search(client, query, search_depth, max_results))
+        # Callers annotate their results in place (hunt adds "entropy"): each gets its own dicts
+        return [dict(r) for r in results]
+
+    async def _search(self, client: TavilyClient, query: str, search_depth: str, max_results: int) -> List[Dict[str, Any]]:
         try:
-            response = client.search(
+            # TavilyClient is synchronous; keep it off the event loop
+            response = await asyncio.to_thread(
+                client.search,
                 query=query,
                 search_depth=search_depth,
                 max_results=max_results,
@@ -0,0 +1,262 @@
+"""
+Mock OpenAI-compatible LLM server for offline load testing.
+
+    python mock_llm_server.py --port 8001 --ttft 0.4 --tps 60 --error-rate 0.02 --rate-limit-rate 0.05
+
+Then point the backend at it (Settings UI or data/user_settings.json):
+    LLM_BASE_URL = http://127.0.0.1:8001/v1, LLM_API_KEY = anything
+
+Knobs can also be changed at runtime with POST /mock/config, and GET /mock/stats
+reports what was served. A tool-call script (--script file.json) is a list of turns,
+picked by the number of assistant turns since the last user message:
+
+    [{"tool_calls": [{"name": "read_memory", "arguments": {"filename": "a.md"}}]},
+     {"content": "Done."}]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_REPLY = (
+    "Signal received. The void hums at a steady frequency tonight; entropy is low, "
+    "curiosity is high, and every trend you feed me becomes a new thread to pull."
+)
+
+
+@dataclass
+class MockConfig:
+    ttft: float = 0.3  # seconds before the first token
+    ttft_jitter: float = 0.0  # uniform +/- seconds
+    slow_rate: float = 0.0  # fraction of requests that take slow_ttft instead (tail latency)
+    slow_ttft: float = 3.0
+    slow_marker: Optional[str] = None  # prompts containing this take slow_ttft on their first attempt only
+    tokens_per_second: float = 50.0  # 0 = emit everything at once
+    error_rate: float = 0.0  # fraction answered with error_status
+    error_status: int = 500
+    rate_limit_rate: float = 0.0  # fraction answered with 429 + retry-after
+    retry_after: float = 1.0
+    reply: str = DEFAULT_REPLY
+    script: List[Dict[str, Any]] = field(default_factory=list)
+    seed: Optional[int] = None
+
+
+class MockStats:
+    def __init__(self):
+        self.requests = 0
+        self.streams = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.tool_turns = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+def _tokens(text: str) -> List[str]:
+    """Whitespace-preserving word pieces, roughly one model token each."""
+    pieces, current = [], ""
+    for ch in text:
+        current += ch
+        if ch == " ":
+            pieces.append(current)
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _turn(config: MockConfig, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pick the scripted turn for this conversation; default to a plain reply."""
+    step = 0
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            break
+        if message.get("role") == "assistant":
+            step += 1
+    if step < len(config.script):
+        return config.script[step]
+    return {"content": config.reply}
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+    app.state.config = config or MockConfig()
+    app.state.stats = MockStats()
+    app.state.rng = random.Random(app.state.config.seed)
+    app.state.slow_seen = set()  # prompts whose slow first attempt was already served
+
+    def chunk(body: Dict[str, Any], completion_id: str, delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+        payload = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    def first_token_delay(cfg: MockConfig, rng: random.Random, body: Dict[str, Any]) -> float:
+        if cfg.slow_marker:
+            # Deterministic tail: a retry or hedge of the same prompt is served at normal speed
+            prompt = json.dumps(body.get("messages", []), sort_keys=True)
+            if cfg.slow_marker in prompt and prompt not in app.state.slow_seen:
+                app.state.slow_seen.add(prompt)
+                return cfg.slow_ttft
+        if cfg.slow_rate and rng.random() < cfg.slow_rate:
+            return cfg.slow_ttft
+        return max(0.0, cfg.ttft + rng.uniform(-cfg.ttft_jitter, cfg.ttft_jitter))
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/mock/stats")
+    async def stats():
+        return app.state.stats.snapshot()
+
+    @app.post("/mock/config")
+    async def update_config(updates: Dict[str, Any]):
+        known = {f.name for f in fields(MockConfig)}
+        for key, value in updates.items():
+            if key in known:
+                setattr(app.state.config, key, value)
+        if "seed" in updates:
+            app.state.rng = random.Random(updates["seed"])
+        return asdict(app.state.config)
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        cfg: MockConfig = app.state.config
+        stats: MockStats = app.state.stats
+        rng: random.Random = app.state.rng
+        stats.requests += 1
+
+        roll = rng.random()
+        if roll < cfg.rate_limit_rate:
+            stats.rate_limited += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"retry-after-ms": str(int(cfg.retry_after * 1000)), "x-ratelimit-remaining-requests": "0"}
+            )
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            stats.errors += 1
+            return JSONResponse({"error": {"message": "Injected failure (mock)"}}, status_code=cfg.error_status)
+
+        turn = _turn(cfg, body.get("messages", []))
+        tool_calls = [
+            {"id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+             "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}}
+            for call in turn.get("tool_calls", [])
+        ]
+        if tool_calls:
+            stats.tool_turns += 1
+        content = turn.get("content")
+        pieces = _tokens(content) if content else []
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces) + len(tool_calls),
+                 "total_tokens": prompt_tokens + len(pieces) + len(tool_calls)}
+        finish = "tool_calls" if tool_calls else "stop"
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        delay = first_token_delay(cfg, rng, body)
+        interval = 1.0 / cfg.tokens_per_second if cfg.tokens_per_second > 0 else 0.0
+
+        if not body.get("stream"):
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(delay + interval * max(len(pieces) - 1, 0))
+            finally:
+                stats.in_flight -= 1
+            message = {"role": "assistant", "content": content}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "finish_reason": finish, "message": message}],
+                "usage": usage
+            }
+
+        stats.streams += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        async def events():
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(delay)
+                yield chunk(body, completion_id, {"role": "assistant", "content": ""})
+                for i, piece in enumerate(pieces):
+                    if i and interval:
+                        await asyncio.sleep(interval)
+                    yield chunk(body, completion_id, {"content": piece})
+                for index, call in enumerate(tool_calls):
+                    arguments = call["function"]["arguments"]
+                    half = len(arguments) // 2
+                    # Arguments arrive in fragments, like real providers
+                    yield chunk(body, completion_id, {"tool_calls": [{
+                        "index": index, "id": call["id"], "type": "function",
+                        "function": {"name": call["function"]["name"], "arguments": arguments[:half]}}]})
+                    yield chunk(body, completion_id, {"tool_calls": [{
+                        "index": index, "function": {"arguments": arguments[half:]}}]})
+                yield chunk(body, completion_id, {}, finish)
+                if include_usage:
+                    payload = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                               "model": body.get("model", "mock"), "choices": [], "usage": usage}
+                    yield f"data: {json.dumps(payload)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats.in_flight -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--ttft-jitter", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests using --slow-ttft")
+    parser.add_argument("--slow-ttft", type=float, default=3.0)
+    parser.add_argument("--slow-marker", help="prompts containing this are slow on their first attempt only")
+    parser.add_argument("--tps", type=float, default=50.0, help="tokens per second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    parser.add_argument("--script", help="JSON file with scripted assistant turns")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    script = []
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    config = MockConfig(
+        ttft=args.ttft, ttft_jitter=args.ttft_jitter, slow_rate=args.slow_rate, slow_ttft=args.slow_ttft,
+        slow_marker=args.slow_marker, tokens_per_second=args.tps, error_rate=args.error_rate,
+        error_status=args.error_status, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        reply=args.reply, script=script, seed=args.seed
+    )
+    print(f"[Mock LLM] Serving on http://{args.host}:{args.port}/v1 ({asdict(config)})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Stub MCP server for tests and local benchmarks (stdio transport).
+
+    python mock_mcp_server.py --startup-delay 2 --tool-latency 0.1 [--blocking] [--port 8931]
+
+Imported in-process ("transport": "inprocess") it serves the module-level `server`,
+built with the defaults.
+
+--blocking spends the tool latency in time.sleep, like a handler calling a sync SDK
+client: the process then serves one call at a time. --port serves streamable HTTP on
+http://127.0.0.1:<port>/mcp instead of stdio.
+
+Tools:
+- echo(text): returns "<text> (pid <pid>)"
+- sleep(seconds): waits, then returns "slept"
+- fail(): always raises
+- add_tool(name): advertises one more tool (an echo) and sends tools/list_changed
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import mcp.types as types
+from mcp.server import NotificationOptions, Server
+from mcp.server.models import InitializationOptions
+from mcp.server.stdio import stdio_server
+
+
+def build_server(name: str, tool_latency: float, blocking: bool = False) -> Server:
+    server = Server(name)
+    extra_tools: list[str] = []
+
+    @server.list_tools()
+    async def handle_list_tools() -> list[types.Tool]:
+        return [
+            types.Tool(
+                name=extra,
+                description="Added at runtime",
+                inputSchema={"type": "object", "properties": {"text": {"type": "string"}}}
+            )
+            for extra in extra_tools
+        ] + [
+            types.Tool(
+                name="echo",
+                description="Echo the text back with the server pid",
+                inputSchema={"type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]},
+                annotations=types.ToolAnnotations(readOnlyHint=True)
+            ),
+            types.Tool(
+                name="sleep",
+                description="Wait for the given number of seconds",
+                inputSchema={"type": "object", "properties": {"seconds": {"type": "number"}}}
+            ),
+            types.Tool(
+                name="fail",
+                description="Always fails",
+                inputSchema={"type": "object", "properties": {}}
+            ),
+            types.Tool(
+                name="add_tool",
+                description="Advertise one more tool and notify the client",
+                inputSchema={"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+            ),
+        ]
+
+    @server.call_tool()
+    async def handle_call_tool(name: str, arguments: dict | None) -> list[types.TextContent]:
+        arguments = arguments or {}
+        if blocking:
+            time.sleep(tool_latency)
+        else:
+            await asyncio.sleep(tool_latency)
+        if name == "echo":
+            return [types.TextContent(type="text", text=f"{arguments.get('text', '')} (pid {os.getpid()})")]
+        if name == "sleep":
+            await asyncio.sleep(float(arguments.get("seconds", 1)))
+            return [types.TextContent(type="text", text="slept")]
+        if name == "fail":
+            raise RuntimeError("stub failure")
+        if name == "add_tool":
+            extra_tools.append(arguments["name"])
+            await server.request_context.session.send_tool_list_changed()
+            return [types.TextContent(type="text", text=f"added {arguments['name']}")]
+        if name in extra_tools:
+            return [types.TextContent(type="text", text=arguments.get("text", ""))]
+        raise ValueError(f"Unknown tool: {name}")
+
+    return server
+
+
+server = build_server("mock-mcp", 0.0)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Stub MCP server")
+    parser.add_argument("--name", default="mock-mcp")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="seconds before serving (slow boot)")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="added to every tool call")
+    parser.add_argument("--blocking", action="store_true", help="tool latency blocks the event loop")
+    parser.add_argument("--port", type=int, help="serve streamable HTTP on this port instead of stdio")
+    args = parser.parse_args()
+
+    await asyncio.sleep(args.startup_delay)
+    server = build_server(args.name, args.tool_latency, args.blocking)
+    if args.port:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp_servers"))
+        from http_transport import serve_http
+        await serve_http(server, args.port)
+        return
+    async with stdio_server() as (read, write):
+        await server.run(
+            read_stream=read,
+            write_stream=write,
+            initialization_options=InitializationOptions(
+                server_name=args.name,
+                server_version="0.1.0",
+                capabilities=server.get_capabilities(
+                    notification_options=NotificationOptions(tools_changed=True),
+                    experimental_capabilities={},
+                ),
+            ),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
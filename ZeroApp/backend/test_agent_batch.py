@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import shutil
+from app.core.llm import LLMClient, LLMFactory
+from app.models.agent import BatchRequest, ChatResponse
+from app.services.agent.batch_runner import BatchRunner
+from app.services.agent.zero_agent import ZeroAgent
+
+class FakeAgent:
+    def __init__(self):
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def chat(self, messages, module_name="default", priority=0):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        if messages[-1]["content"] == "boom":
+            raise RuntimeError("boom")
+        return ChatResponse(
+            content=f"[{module_name}] {messages[-1]['content']}",
+            usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        )
+
+class DownRouter:
+    """Every provider failing: ZeroAgent catches this and answers with an error message"""
+    async def create(self, priority=0, **kwargs):
+        raise ConnectionError("all providers unavailable")
+
+async def collect(runner, request):
+    run, items = runner.prepare(request)
+    return [json.loads(line) async for line in runner.stream(run, items, request.module_name)]
+
+async def run_batch_flow():
+    print("Testing Batch Runner...")
+    test_dir = "data/test_batches"
+    if os.path.exists(test_dir):
+        shutil.rmtree(test_dir)
+
+    agent = FakeAgent()
+    runner = BatchRunner(agent, storage_dir=test_dir)
+
+    items = [{"id": f"t{i}", "messages": [{"role": "user", "content": f"topic {i}"}]} for i in range(6)]
+    items.append({"id": "bad", "messages": [{"role": "user", "content": "boom"}]})
+    request = BatchRequest(batch_id="nightly", items=items, module_name="script", concurrency=2)
+
+    # 1. Full run: header + 7 results + summary, concurrency respected
+    lines = await collect(runner, request)
+    print(f"Lines: {len(lines)}, max parallel: {agent.max_running}")
+    assert lines[0]["type"] == "batch" and lines[0]["batch_id"] == "nightly"
+    assert lines[-1]["type"] == "done"
+    assert lines[-1]["completed"] == 6 and lines[-1]["failed"] == 1
+    results = {l["id"]: l for l in lines if l["type"] == "result"}
+    assert len(results) == 7
+    assert results["t0"]["content"] == "[script] topic 0"
+    assert results["t0"]["usage"]["total_tokens"] == 15
+    assert "run_ms" in results["t0"]["timings"]
+    assert results["bad"]["status"] == "error"
+    assert agent.max_running <= 2
+
+    # 2. Resume: finished items are replayed from disk, nothing re-runs
+    calls_before = agent.calls
+    runner = BatchRunner(agent, storage_dir=test_dir)
+    lines = await collect(runner, request)
+    replayed = [l for l in lines if l["type"] == "result"]
+    assert all(l.get("resumed") for l in replayed)
+    assert agent.calls == calls_before
+
+    # 3. Resume with extra items: only the new one runs
+    request.items.append(request.items[0].model_copy(update={"id": "t-new"}))
+    lines = await collect(runner, request)
+    assert agent.calls == calls_before + 1
+
+    # 4. Duplicate ids are rejected up-front
+    try:
+        runner.prepare(BatchRequest(items=[items[0], items[0]]))
+        assert False, "duplicate ids should be rejected"
+    except ValueError:
+        pass
+
+    # 5. The real agent swallows LLM errors into its reply; the batch still counts them as failed
+    original_client = LLMFactory.get_client
+    LLMFactory.get_client = classmethod(lambda cls: LLMClient(DownRouter()))
+    try:
+        runner = BatchRunner(ZeroAgent(), storage_dir=test_dir)
+        lines = await collect(runner, BatchRequest(batch_id="down", items=items[:2]))
+    finally:
+        LLMFactory.get_client = original_client
+    print("With the LLM down:", lines[-1])
+    assert all(l["status"] == "error" and "all providers unavailable" in l["error"] for l in lines[1:-1])
+    assert lines[-1]["completed"] == 0 and lines[-1]["failed"] == 2
+
+    if os.path.exists(test_dir):
+        shutil.rmtree(test_dir)
+
+    print("All tests passed!")
+
+def test_batch_flow():
+    asyncio.run(run_batch_flow())
+
+if __name__ == "__main__":
+    test_batch_flow()
@@ -0,0 +1,85 @@
+import os
+import random
+import time
+import numpy as np
+from app.core.entropy import EntropyEstimator, byte_histogram, entropy_estimator
+
+# The formulas the estimator replaced, for comparison
+HEURISTICS = {
+    "chat /send": lambda s: min(1.0, len(s) / 100.0) + (0.3 if "help" in s or "error" in s else 0.0),
+    "hunt": lambda s: min(1.0, len(s) / 200.0),
+    "files": lambda s: 0.8 + min(0.2, len(s) / 10000.0),
+}
+
+MB = 1024 * 1024
+# Scoring a 10 MB upload targets ~100 ms; the assert leaves room for loaded CI machines
+BUDGET_MS = 100
+SLACK = 10
+
+def best_ms(fn, data, repeat=3):
+    fn(data)  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def check_scores():
+    with open(__file__, encoding="utf-8") as f:
+        code = f.read()
+    rng = random.Random(7)
+    words = "the engine hunts fresh trends and burns them as fuel while carbon builds up".split()
+    prose = " ".join(rng.choice(words) for _ in range(600))
+    samples = {
+        "hi": "hi",
+        "prose": prose,
+        "code": code,
+        "cjk": "今天我们讨论一下人工智能的发展趋势以及它对社会的影响，还有开源社区的未来。" * 4,
+        "spam": "help " * 1000,
+        "random": os.urandom(50_000),
+    }
+    scores = {name: entropy_estimator.estimate(data) for name, data in samples.items()}
+    print("Scores:", {k: round(v, 3) for k, v in scores.items()})
+    print("chat /send heuristic:", {k: round(HEURISTICS["chat /send"](v), 3) for k, v in samples.items() if isinstance(v, str)})
+    assert all(0.0 <= s <= 1.0 for s in scores.values())
+    assert scores["random"] > 0.95
+    assert scores["spam"] < 0.2 and scores["hi"] < scores["prose"] < scores["random"]
+    assert 0.3 < scores["code"] < 0.7 and 0.3 < scores["cjk"] < 0.7
+    # The length heuristic maxed out on spam; the estimator doesn't
+    assert HEURISTICS["chat /send"](samples["spam"]) >= 1.0
+    assert entropy_estimator.estimate("") == 0.0 and entropy_estimator.estimate(b"\x00" * 1000) < 0.01
+
+    # Vectorized histogram matches a plain count, including odd lengths
+    for n in (0, 1, 2, 999, 4096):
+        raw = os.urandom(n)
+        assert (byte_histogram(raw) == np.bincount(np.frombuffer(raw, dtype=np.uint8), minlength=256)).all()
+    detail = EntropyEstimator().breakdown(prose)
+    assert detail["size"] == len(prose) and detail["compression"] is not None
+
+def benchmark():
+    with open(__file__, encoding="utf-8") as f:
+        code = f.read()
+    text = {size: (code * (size // len(code) + 1))[:size] for size in (100, 10_000, MB, 10 * MB)}
+    print(f"{'input':>14} {'estimator':>10} " + " ".join(f"{name:>11}" for name in HEURISTICS))
+    for size, data in text.items():
+        ours = best_ms(entropy_estimator.estimate, data)
+        theirs = [best_ms(h, data) for h in HEURISTICS.values()]
+        print(f"{f'text {size}B':>14} {ours:>8.3f}ms " + " ".join(f"{t:>9.4f}ms" for t in theirs))
+    upload = os.urandom(10 * MB)
+    upload_ms = best_ms(entropy_estimator.estimate, upload)
+    cjk_ms = best_ms(entropy_estimator.estimate, "人工智能的发展趋势" * (10 * MB // 27))
+    mixed_ms = best_ms(entropy_estimator.estimate, text[10 * MB])
+    print(f"10 MB binary upload: {upload_ms:.1f}ms, CJK text: {cjk_ms:.1f}ms, mixed-script text: {mixed_ms:.1f}ms "
+          f"(budget {BUDGET_MS}ms)")
+    assert max(upload_ms, cjk_ms, mixed_ms) < BUDGET_MS * SLACK, (upload_ms, cjk_ms, mixed_ms)
+    # Past MAX_HISTOGRAM_CHARS the codepoint histogram is sampled; the score barely moves
+    assert abs(entropy_estimator.estimate(text[10 * MB]) - entropy_estimator.estimate(text[MB])) < 0.02
+
+def test_entropy():
+    check_scores()
+    benchmark()
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_entropy()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from email.utils import formatdate
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from test_llm_router import serve
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp_servers"))
+# github_mcp sets up root logging for its own process; keep ours as it was
+_root = logging.getLogger()
+_handlers, _level = _root.handlers[:], _root.level
+import github_mcp
+_root.handlers[:], _root.level = _handlers, _level
+
+LIMITS = {"core": 5000, "search": 30}
+
+def build_fake_github():
+    """GitHub-shaped fake: ETags, X-RateLimit-* headers per resource, 403 once a window is spent."""
+    app = FastAPI()
+    state = {"windows": {}, "ports": set(), "served": 0, "not_modified": 0, "forbidden": 0, "throttle_next": 0,
+             "retry_after": "1", "edge_error": 0}
+
+    def window(resource):
+        w = state["windows"].get(resource)
+        if w is None or w["reset"] <= time.time():
+            w = state["windows"][resource] = {"remaining": LIMITS[resource], "reset": time.time() + 60}
+        return w
+
+    def answer(request: Request, resource: str, etag: str, payload: dict):
+        state["ports"].add(request.client.port)
+        if state["edge_error"]:
+            state["edge_error"] -= 1
+            return Response("<html><body>502 Bad Gateway</body></html>", status_code=502, media_type="text/html")
+        if state["throttle_next"]:
+            state["throttle_next"] -= 1
+            return JSONResponse({"message": "secondary rate limit"}, status_code=429,
+                                headers={"Retry-After": state["retry_after"]})
+        w = window(resource)
+        headers = {
+            "X-RateLimit-Limit": str(LIMITS[resource]),
+            "X-RateLimit-Resource": resource,
+            "X-RateLimit-Reset": str(w["reset"]),
+            "ETag": etag
+        }
+        if w["remaining"] <= 0:
+            state["forbidden"] += 1
+            headers["X-RateLimit-Remaining"] = "0"
+            return JSONResponse({"message": "API rate limit exceeded"}, status_code=403, headers=headers)
+        if request.headers.get("If-None-Match") == etag:
+            state["not_modified"] += 1
+            headers["X-RateLimit-Remaining"] = str(w["remaining"])
+            return Response(status_code=304, headers=headers)
+        w["remaining"] -= 1
+        state["served"] += 1
+        headers["X-RateLimit-Remaining"] = str(w["remaining"])
+        return JSONResponse(payload, headers=headers)
+
+    @app.get("/search/repositories")
+    async def search(request: Request, q: str, per_page: int = 5):
+        items = [{"full_name": f"zero/{q}-{i}", "html_url": f"https://github.com/zero/{q}-{i}", "stargazers_count": i}
+                 for i in range(per_page)]
+        return answer(request, "search", f'"{q}-{per_page}"', {"items": items})
+
+    @app.get("/user")
+    async def user(request: Request):
+        return answer(request, "core", '"user-v1"', {"login": "zero", "html_url": "https://github.com/zero"})
+
+    return app, state
+
+async def search(query):
+    result = await github_mcp.handle_call_tool("search_repositories", {"query": query, "limit": 2})
+    return result[0].text
+
+async def run_github_mcp(base_url, app_state):
+    github_mcp.API_BASE = base_url
+    github_mcp.RATE_LIMIT_MAX_WAIT = 5.0
+    try:
+        # 1. Conditional requests: the repeat is answered 304 from the ETag cache, without spending quota
+        first = await search("agents")
+        second = await search("agents")
+        assert first == second and "zero/agents-1" in second
+        assert app_state["served"] == 1 and app_state["not_modified"] == 1
+        assert github_mcp.stats["not_modified"] == 1
+        assert github_mcp.rate_limits.windows["search"]["remaining"] == LIMITS["search"] - 1
+
+        # 2. One pooled client: every call rides the same keep-alive connection
+        client = await github_mcp.get_client()
+        for _ in range(10):
+            text = (await github_mcp.handle_call_tool("get_user_info", {}))[0].text
+            assert text.startswith("User: zero")
+        assert await github_mcp.get_client() is client
+        print(f"Connections used for 12 calls: {len(app_state['ports'])}")
+        assert len(app_state["ports"]) == 1
+
+        # 3. 429 + Retry-After: waited out and retried once
+        app_state["throttle_next"] = 1
+        start = time.perf_counter()
+        text = (await github_mcp.handle_call_tool("get_user_info", {}))[0].text
+        assert text.startswith("User: zero") and time.perf_counter() - start >= 0.9
+        assert github_mcp.stats["rate_limited"] == 1
+        # ...also when Retry-After is an HTTP-date
+        app_state["throttle_next"], app_state["retry_after"] = 1, formatdate(time.time() + 2, usegmt=True)
+        text = (await github_mcp.handle_call_tool("get_user_info", {}))[0].text
+        assert text.startswith("User: zero") and github_mcp.stats["rate_limited"] == 2
+
+        # 3b. A non-JSON error page from the edge is reported, not raised
+        app_state["edge_error"] = 1
+        text = (await github_mcp.handle_call_tool("get_user_info", {}))[0].text
+        print(f"Edge error: {text}")
+        assert text.startswith("Failed to get user info") and '"error": 502' in text and "Bad Gateway" in text
+
+        # 4. Nearly spent window: the client waits for the reset instead of collecting a 403
+        app_state["windows"]["search"] = {"remaining": 2, "reset": time.time() + 1.5}
+        await search("a")  # leaves 1
+        start = time.perf_counter()
+        await search("b")
+        waited = time.perf_counter() - start
+        print(f"Waited {waited:.2f}s for the search window to reset; 403s served: {app_state['forbidden']}")
+        assert waited >= 1.0 and app_state["forbidden"] == 0
+
+        # 5. A reset too far away fails fast with a message the model can act on
+        app_state["windows"]["search"] = {"remaining": 2, "reset": time.time() + 600}
+        await search("c")
+        start = time.perf_counter()
+        try:
+            await search("d")
+            assert False, "should refuse to wait 600s"
+        except github_mcp.RateLimitError as e:
+            print(f"Refused in {time.perf_counter() - start:.3f}s: {e}")
+            assert "search rate limit exhausted" in str(e) and time.perf_counter() - start < 0.1
+        assert app_state["forbidden"] == 0
+    finally:
+        if github_mcp._client is not None:
+            await github_mcp._client.aclose()
+            github_mcp._client = None
+
+def test_github_mcp():
+    app, app_state = build_fake_github()
+    server, url = serve(app)
+    try:
+        asyncio.run(run_github_mcp(url[:-len("/v1")], app_state))
+    finally:
+        server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_github_mcp()
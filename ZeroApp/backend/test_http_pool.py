@@ -0,0 +1,88 @@
+import asyncio
+import socket
+import time
+from app.core.config import settings
+from app.core.http_pool import llm_http_pool
+from app.core.llm import LLMFactory
+from test_llm_router import ask, make_mock_provider, reset_llm, serve
+
+def dead_port():
+    """A port nothing listens on: connecting is refused at once"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}/v1"
+
+def silent_server():
+    """Accepts TCP connections (kernel backlog) but never answers: the request hangs"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(16)
+    return sock, f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+
+async def check_reuse(url):
+    settings.LLM_PROVIDERS = [{"name": "live", "provider": "openai", "api_key": "k1", "base_url": url, "model": "m"}]
+    warm_ports, used_ports = set(), set()
+    async def record(response):
+        port = response.extensions["network_stream"].get_extra_info("client_addr")[1]
+        (used_ports if response.request.method == "POST" else warm_ports).add(port)
+    llm_http_pool.client.event_hooks["response"].append(record)
+
+    # 1. Warmup opens LLM_POOL_WARMUP_CONNECTIONS sockets; every chat after it rides on one of them
+    await LLMFactory.warmup()
+    print(f"Warmed ports: {warm_ports}")
+    assert len(warm_ports) == settings.LLM_POOL_WARMUP_CONNECTIONS
+    for _ in range(5):
+        assert await ask(LLMFactory.get_client()) == "live"
+    assert await ask(LLMFactory.get_client(), stream=True) == "live!"
+
+    # 2. A rebuilt client (new key) shares the pool, so the sockets survive the swap
+    first = LLMFactory.get_client()
+    settings.LLM_PROVIDERS = [{**settings.LLM_PROVIDERS[0], "api_key": "k2"}]
+    assert LLMFactory.get_client() is not first
+    for _ in range(3):
+        assert await ask(LLMFactory.get_client()) == "live"
+    print(f"Chat ports: {used_ports}")
+    assert used_ports <= warm_ports and len(used_ports) == 1
+
+async def check_unreachable(silent_url):
+    # 3. Refused and hanging providers: warmup returns within the bound and never raises
+    settings.LLM_POOL_WARMUP_TIMEOUT = 0.5
+    settings.LLM_PROVIDERS = [
+        {"name": "refused", "provider": "openai", "api_key": "k1", "base_url": dead_port(), "model": "m"},
+        {"name": "silent", "provider": "deepseek", "api_key": "k2", "base_url": silent_url, "model": "m"},
+        {"name": "silent-2", "provider": "deepseek", "api_key": "k4", "base_url": silent_url, "model": "m"},
+        {"name": "bad", "provider": "siliconflow", "api_key": "k3", "base_url": "not a url", "model": "m"},
+    ]
+    start = time.perf_counter()
+    await LLMFactory.warmup()
+    elapsed = time.perf_counter() - start
+    print(f"Unreachable warmup took {elapsed:.2f}s")
+    # Providers warm up concurrently: one timeout, not one per provider
+    assert elapsed < 0.5 * 2, elapsed
+
+async def run_pool_flow(url, silent_url):
+    try:
+        await check_reuse(url)
+        await reset_llm()
+        await check_unreachable(silent_url)
+    finally:
+        await reset_llm()
+
+def test_http_pool():
+    print("Testing LLM HTTP pool...")
+    server, url = serve(make_mock_provider("live"))
+    silent, silent_url = silent_server()
+    original_timeout = settings.LLM_POOL_WARMUP_TIMEOUT
+    try:
+        asyncio.run(run_pool_flow(url, silent_url))
+    finally:
+        settings.LLM_POOL_WARMUP_TIMEOUT = original_timeout
+        settings.LLM_PROVIDERS = []
+        silent.close()
+        server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_http_pool()
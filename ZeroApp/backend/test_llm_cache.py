@@ -0,0 +1,90 @@
+import asyncio
+import os
+import shutil
+import time
+from openai.types.chat import ChatCompletion
+from app.core.config import settings
+from app.core.llm import LLMClient
+from app.core.llm_cache import LLMCache
+import app.core.llm as llm_module
+
+class FakeRouter:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, priority=0, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return ChatCompletion.model_validate({
+            "id": f"c{self.calls}", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"answer {self.calls}"}}]
+        })
+
+async def run_cache_flow(test_dir):
+    router = FakeRouter()
+    client = LLMClient(router)
+    ask = lambda content, **kw: client.chat.completions.create(
+        model="m", messages=[{"role": "user", "content": content}], **kw)
+
+    # 1. Low temperature is cached automatically; repeated call is instant
+    first = await ask("trend report", temperature=0.2)
+    start = time.perf_counter()
+    second = await ask("trend report", temperature=0.2)
+    print(f"Cached call took {(time.perf_counter() - start) * 1000:.2f}ms")
+    assert first.choices[0].message.content == second.choices[0].message.content
+    assert router.calls == 1
+
+    # 2. High temperature is not cached unless the caller opts in
+    await ask("chat", temperature=0.9)
+    await ask("chat", temperature=0.9)
+    assert router.calls == 3
+    await ask("analysis", cache=True)
+    await ask("analysis", cache=True)
+    assert router.calls == 4
+
+    # 3. Explicit bypass always reaches the provider
+    await ask("trend report", temperature=0.2, cache=False)
+    assert router.calls == 5
+
+    # 4. Different tools / response_format are different keys
+    await ask("trend report", temperature=0.2, response_format={"type": "json_object"})
+    assert router.calls == 6
+
+    # 5. TTL expiry
+    settings.LLM_CACHE_TTL = 0
+    await ask("trend report", temperature=0.2)
+    assert router.calls == 7
+    settings.LLM_CACHE_TTL = 3600
+
+    stats = llm_module.llm_cache.stats()
+    print(f"Cache stats: {stats}")
+    assert stats["hits"] == 2 and stats["bypassed"] == 1
+
+    # 6. Size bound evicts least recently used, and survives a restart
+    settings.LLM_CACHE_MAX_BYTES = 3000
+    for i in range(10):
+        await ask(f"topic {i}", temperature=0)
+    reloaded = LLMCache(test_dir)
+    assert reloaded.stats()["size_bytes"] <= 3000
+    assert llm_module.llm_cache.stats()["evictions"] > 0
+    await ask("topic 9", temperature=0)  # most recent entry is still there
+    assert router.calls == 17
+
+def test_llm_cache():
+    print("Testing LLM Cache...")
+    test_dir = "data/test_llm_cache"
+    if os.path.exists(test_dir):
+        shutil.rmtree(test_dir)
+    original = llm_module.llm_cache
+    llm_module.llm_cache = LLMCache(test_dir)
+    try:
+        asyncio.run(run_cache_flow(test_dir))
+    finally:
+        llm_module.llm_cache = original
+        settings.LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024
+        shutil.rmtree(test_dir, ignore_errors=True)
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_llm_cache()
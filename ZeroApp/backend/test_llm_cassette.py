@@ -0,0 +1,111 @@
+import asyncio
+import os
+import shutil
+import time
+from types import SimpleNamespace
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from app.core.cassette import CassetteMissError, cassette
+from app.core.llm import LLMClient
+
+def make_completion(text):
+    return ChatCompletion.model_validate({
+        "id": "cmpl-1", "object": "chat.completion", "created": 0, "model": "fake",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+    })
+
+def make_chunk(text):
+    return ChatCompletionChunk.model_validate({
+        "id": "cmpl-2", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+        "choices": [{"index": 0, "delta": {"content": text}}]
+    })
+
+class FakeUpstream:
+    """Mimics AsyncOpenAI: 50ms per non-streaming call, 3 chunks 50ms apart when streaming"""
+    def __init__(self):
+        self.calls = 0
+        self.api_key = "sk-fake"
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if not kwargs.get("stream"):
+            await asyncio.sleep(0.05)
+            return make_completion(f"echo: {kwargs['messages'][-1]['content']}")
+        return self._stream()
+
+    async def _stream(self):
+        for part in ["Hel", "lo", "!"]:
+            await asyncio.sleep(0.05)
+            yield make_chunk(part)
+
+async def collect_stream(client, **kwargs):
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    return "".join([chunk.choices[0].delta.content async for chunk in stream])
+
+async def run_cassette_flow():
+    print("Testing LLM Cassette...")
+    test_dir = "data/test_cassettes"
+    if os.path.exists(test_dir):
+        shutil.rmtree(test_dir)
+    path = os.path.join(test_dir, "session.jsonl")
+
+    upstream = FakeUpstream()
+    client = LLMClient(upstream)
+    request = {"model": "fake", "messages": [{"role": "user", "content": "ping", "timestamp": time.time()}]}
+
+    # 1. Record one plain and one streaming completion
+    cassette.configure("record", path)
+    recorded = await client.chat.completions.create(**request)
+    recorded_stream = await collect_stream(client, **request)
+    assert upstream.calls == 2
+    assert recorded.choices[0].message.content == "echo: ping"
+    assert recorded_stream == "Hello!"
+
+    # 2. Replay in realtime: same content, original pacing, no upstream calls.
+    # The differing history timestamp must not break the fingerprint.
+    request["messages"][0]["timestamp"] = time.time() + 100
+    cassette.configure("replay", path, timing="realtime")
+    replay_client = LLMClient(None)
+    start = time.perf_counter()
+    replayed = await replay_client.chat.completions.create(**request)
+    replayed_stream = await collect_stream(replay_client, **request)
+    realtime_elapsed = time.perf_counter() - start
+    print(f"Realtime replay took {realtime_elapsed * 1000:.0f}ms")
+    assert replayed.choices[0].message.content == "echo: ping"
+    assert replayed.usage.total_tokens == 5
+    assert replayed_stream == "Hello!"
+    assert realtime_elapsed >= 0.18
+    assert upstream.calls == 2
+
+    # 3. Replay as fast as possible
+    cassette.configure("replay", path, timing="fast")
+    start = time.perf_counter()
+    await replay_client.chat.completions.create(**request)
+    assert await collect_stream(replay_client, **request) == "Hello!"
+    fast_elapsed = time.perf_counter() - start
+    print(f"Fast replay took {fast_elapsed * 1000:.1f}ms")
+    assert fast_elapsed < 0.05
+
+    # 4. A prompt that drifted since recording fails the replay, unless explicitly lenient
+    drifted = {"model": "fake", "messages": [{"role": "user", "content": "ping v2"}]}
+    cassette.configure("replay", path, timing="fast")
+    try:
+        await replay_client.chat.completions.create(**drifted)
+        assert False, "a fingerprint miss should raise"
+    except CassetteMissError as e:
+        print(f"Strict replay: {e}")
+    cassette.configure("replay", path, timing="fast", strict=False)
+    assert (await replay_client.chat.completions.create(**drifted)).choices[0].message.content == "echo: ping"
+
+    cassette.configure("off")
+    if os.path.exists(test_dir):
+        shutil.rmtree(test_dir)
+
+    print("All tests passed!")
+
+def test_cassette_flow():
+    asyncio.run(run_cassette_flow())
+
+if __name__ == "__main__":
+    test_cassette_flow()
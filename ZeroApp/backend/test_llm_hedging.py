@@ -0,0 +1,85 @@
+import asyncio
+import time
+from app.core.config import settings
+from app.core.llm import LLMFactory
+from mock_llm_server import MockConfig, create_app
+from test_llm_router import reset_llm, serve
+
+async def timed_stream(client, prompt):
+    start = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model="mock", messages=[{"role": "user", "content": prompt}], stream=True, cache=False)
+    ttft = None
+    text = ""
+    async for chunk in stream:
+        ttft = ttft or time.perf_counter() - start
+        text += chunk.choices[0].delta.content or "" if chunk.choices else ""
+    assert text == "ok"
+    return ttft
+
+def prompt(phase, i):
+    # Every 20th request is slow on its first attempt (5% tail); its hedge is served normally
+    return f"{phase} request {i}" + (" [slow]" if i % 20 == 5 else "")
+
+async def run_phase(client, phase, count=100, parallel=10):
+    samples = []
+    for batch in range(0, count, parallel):
+        samples += await asyncio.gather(*[timed_stream(client, prompt(phase, batch + i)) for i in range(parallel)])
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+async def run_hedging_demo(url, app):
+    settings.LLM_PROVIDERS = [{"name": "mock", "api_key": "k", "base_url": url, "rpm": 0, "tpm": 0}]
+    client = LLMFactory.get_client()
+    # Open the pooled connections first so cold-start samples don't skew the TTFT percentiles
+    await run_phase(client, "warmup", count=9)
+    client.router.primary.stats.ttft.clear()
+
+    # Baseline: 5% of requests sit 1s before their first token
+    settings.LLM_HEDGE_ENABLED = False
+    p50, p99 = await run_phase(client, "baseline")
+    print(f"Without hedging: p50 {p50 * 1000:.0f}ms, p99 {p99 * 1000:.0f}ms")
+
+    settings.LLM_HEDGE_ENABLED = True
+    hedged_p50, hedged_p99 = await run_phase(client, "hedged")
+    hedging = client.router.hedging.snapshot()
+    print(f"With hedging:    p50 {hedged_p50 * 1000:.0f}ms, p99 {hedged_p99 * 1000:.0f}ms")
+    print(f"Hedging stats: { {k: v for k, v in hedging.items() if k != 'recent'} }")
+
+    assert p99 >= 1.0
+    assert hedged_p99 < p99 * 0.6
+    assert hedging["hedged"] > 0 and hedging["hedge_won"] > 0
+    # Budget: never more hedges than LLM_HEDGE_MAX_RATE of eligible requests (+1 for rounding)
+    assert hedging["hedged"] <= settings.LLM_HEDGE_MAX_RATE * hedging["eligible"] + 1
+    assert hedging["recent"][-1]["delay_ms"] >= settings.LLM_HEDGE_MIN_DELAY * 1000
+
+    # Losers were cancelled: nothing is left streaming on the mock server
+    await asyncio.sleep(0.1)
+    assert app.state.stats.in_flight == 0
+
+async def run_with_cleanup(url, app):
+    try:
+        await run_hedging_demo(url, app)
+    finally:
+        await reset_llm()
+
+def test_llm_hedging():
+    print("Testing LLM request hedging...")
+    app = create_app(MockConfig(ttft=0.04, ttft_jitter=0.01, slow_marker="[slow]", slow_ttft=1.0, reply="ok"))
+    server, url = serve(app)
+    original = (settings.LLM_HEDGE_ENABLED, settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_MIN_DELAY, settings.LLM_HEDGE_MAX_RATE)
+    # A floor well above the normal TTFT keeps scheduler hiccups from spending the hedge budget
+    settings.LLM_HEDGE_PERCENTILE = 0.9
+    settings.LLM_HEDGE_MIN_DELAY = 0.15
+    settings.LLM_HEDGE_MAX_RATE = 0.15
+    try:
+        asyncio.run(run_with_cleanup(url, app))
+    finally:
+        (settings.LLM_HEDGE_ENABLED, settings.LLM_HEDGE_PERCENTILE,
+         settings.LLM_HEDGE_MIN_DELAY, settings.LLM_HEDGE_MAX_RATE) = original
+        settings.LLM_PROVIDERS = []
+        server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_llm_hedging()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.config import settings
+from app.core.http_pool import llm_http_pool
+from app.core.llm import LLMFactory
+
+def make_mock_provider(name, ttft=0.0, fail_status=None):
+    """Minimal OpenAI-compatible /chat/completions that answers with its own name"""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    async def completions(body: dict):
+        app.state.calls += 1
+        if fail_status:
+            return JSONResponse({"error": {"message": "upstream down"}}, status_code=fail_status)
+        await asyncio.sleep(ttft)
+        if not body.get("stream"):
+            return {
+                "id": "c", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": name}}]
+            }
+
+        async def events():
+            for part in [name, "!"]:
+                chunk = {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                         "choices": [{"index": 0, "delta": {"content": part}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+async def reset_llm():
+    """Teardown: the factory's client and the pooled sockets belong to this test's event loop"""
+    await llm_http_pool.close()
+    LLMFactory._client = None
+    LLMFactory._signature = None
+
+def serve(app):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="error"))
+    threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+
+async def ask(client, stream=False):
+    kwargs = {"model": LLMFactory.get_model(), "messages": [{"role": "user", "content": "hi"}]}
+    if not stream:
+        response = await client.chat.completions.create(**kwargs)
+        return response.choices[0].message.content
+    chunks = await client.chat.completions.create(stream=True, **kwargs)
+    return "".join([c.choices[0].delta.content async for c in chunks])
+
+async def run_router_flow(urls, apps):
+    settings.LLM_FIRST_BYTE_TIMEOUT = 0.5
+    settings.LLM_PROVIDERS = [
+        {"name": "broken", "provider": "openai", "api_key": "k1", "base_url": urls["broken"], "weight": 5},
+        {"name": "slow", "provider": "deepseek", "api_key": "k2", "base_url": urls["slow"], "model": "slow-model"},
+        {"name": "fast", "provider": "siliconflow", "api_key": "k3", "base_url": urls["fast"], "model": "fast-model"},
+    ]
+    client = LLMFactory.get_client()
+
+    # 1. Highest weight goes first, 5xx fails over; slow provider hits the first-byte timeout
+    assert await ask(client, stream=True) == "fast!"
+    assert apps["broken"].state.calls == 1 and apps["slow"].state.calls == 1
+    status = {p["name"]: p for p in client.router.status()}
+    print(f"Router status: {json.dumps(status)}")
+    assert status["broken"]["error_rate"] == 1.0
+    assert status["fast"]["ttft_median_ms"] is not None
+
+    # 2. Healthiest provider now routed first; unhealthy ones are not touched
+    assert client.router.ranked()[0].name == "fast"
+    for _ in range(3):
+        assert await ask(client) == "fast"
+    assert apps["broken"].state.calls == 1 and apps["slow"].state.calls == 1
+
+    # 3. Config reload keeps the rolling stats
+    settings.LLM_PROVIDERS = list(settings.LLM_PROVIDERS)
+    settings.LLM_PROVIDERS[2] = {**settings.LLM_PROVIDERS[2], "weight": 2}
+    client = LLMFactory.get_client()
+    assert client.router.ranked()[0].name == "fast"
+
+async def run_with_cleanup(urls, apps):
+    try:
+        await run_router_flow(urls, apps)
+    finally:
+        await reset_llm()
+
+def test_router_failover():
+    print("Testing LLM Router...")
+    apps = {
+        "broken": make_mock_provider("broken", fail_status=503),
+        "slow": make_mock_provider("slow", ttft=2.0),
+        "fast": make_mock_provider("fast"),
+    }
+    servers, urls = [], {}
+    for name, app in apps.items():
+        server, urls[name] = serve(app)
+        servers.append(server)
+    try:
+        asyncio.run(run_with_cleanup(urls, apps))
+    finally:
+        settings.LLM_PROVIDERS = []
+        for server in servers:
+            server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_router_failover()
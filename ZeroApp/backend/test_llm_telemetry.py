@@ -0,0 +1,83 @@
+import asyncio
+import tempfile
+import uuid
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.llm import LLMFactory
+from app.core.llm_cache import LLMCache
+import app.core.llm as llm_module
+from app.core.llm_telemetry import llm_telemetry
+from app.main import app
+from app.services.agent.writer import WriterAgent
+from mock_llm_server import MockConfig, create_app
+from test_llm_router import reset_llm, serve
+
+async def run_workloads():
+    try:
+        await workloads(LLMFactory.get_client())
+    finally:
+        await reset_llm()
+
+async def workloads(client):
+    messages = [{"role": "user", "content": "hi"}]
+
+    # First stream pays one-off openai import costs; keep it out of the measured workload
+    async for _ in await client.chat.completions.create(model="mock", messages=messages, stream=True, caller="warmup"):
+        pass
+
+    # Streaming call: TTFT is the first content chunk, throughput counts the rest
+    question = [{"role": "user", "content": "what is trending in open source this week?"}]
+    stream = await client.chat.completions.create(model="mock", messages=question, stream=True, caller="chat_stream")
+    async for _ in stream:
+        pass
+
+    # Non-streaming calls tagged by their workload
+    for _ in range(3):
+        await client.chat.completions.create(model="mock", messages=messages, caller="agent_chat", cache=False)
+    fresh = [{"role": "user", "content": f"analysis {uuid.uuid4()}"}]
+    await client.chat.completions.create(model="mock", messages=fresh, temperature=0.0, caller="research")
+    await client.chat.completions.create(model="mock", messages=fresh, temperature=0.0, caller="research")
+
+    # A real service call site carries its own tag
+    await WriterAgent().refine_script("INT. LIGHTHOUSE - NIGHT", "make it darker")
+
+def test_llm_telemetry():
+    print("Testing LLM telemetry...")
+    mock = create_app(MockConfig(ttft=0.1, tokens_per_second=100, reply="a b c d e f g h i j"))
+    server, url = serve(mock)
+    settings.LLM_PROVIDERS = [{"name": "mock", "api_key": "k", "base_url": url}]
+    llm_telemetry.reset()
+    original_cache = llm_module.llm_cache
+    llm_module.llm_cache = LLMCache(tempfile.mkdtemp())  # keep test entries out of data/llm_cache
+    try:
+        asyncio.run(run_workloads())
+        metrics = TestClient(app).get("/api/v1/settings/llm-metrics").json()
+    finally:
+        llm_module.llm_cache = original_cache
+        settings.LLM_PROVIDERS = []
+        server.should_exit = True
+
+    callers = metrics["callers"]
+    print(f"Callers: {sorted(callers)}")
+    stream = callers["chat_stream"]
+    print(f"chat_stream: ttft {stream['ttft_ms']['p50']}ms, duration {stream['duration_ms']['p50']}ms, "
+          f"{stream['tokens_per_second']['p50']} tok/s")
+    assert 100 <= stream["ttft_ms"]["p50"] < 300
+    assert stream["duration_ms"]["p50"] >= 190  # 9 more tokens at 100/s after the first
+    assert 50 < stream["tokens_per_second"]["p50"] < 150
+    assert stream["models"] == {"mock/mock": 1}
+    # Streams ask for the trailing usage chunk, so both token counts are the provider's
+    assert stream["prompt_tokens"] == 10 and stream["completion_tokens"] == 10
+
+    agent = callers["agent_chat"]
+    assert agent["calls"] == 3 and agent["completion_tokens"] == 30
+    assert agent["ttft_ms"]["count"] == 3 and agent["queue_ms"]["p50"] is not None
+
+    # The second research call is answered by the response cache and tagged as such
+    assert callers["research"]["sources"] == {"upstream": 1, "cache": 1}
+    assert callers["write"]["calls"] == 1
+    assert metrics["recent"][-1]["caller"] in callers
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_llm_telemetry()
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from app.api.endpoints.mcp import BatchToolCall, ToolCallBatchRequest, call_tool_batch
+from app.core.mcp.manager import mcp_manager
+from test_mcp_startup import MOCK_SERVER, write_config
+
+def batch(*calls, stream=False):
+    return ToolCallBatchRequest(calls=[BatchToolCall(server=s, tool=t, arguments=a) for s, t, a in calls], stream=stream)
+
+SLEEPS = [("limited", "sleep", {"seconds": 0.3})] * 6
+
+async def run_call_batch():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({
+        "limited": {"command": sys.executable, "args": [MOCK_SERVER], "max_concurrency": 3},
+        "fast": {"command": sys.executable, "args": [MOCK_SERVER]}
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    try:
+        await mcp_manager.initialize_from_config()
+
+        # 1. One request, concurrent within each server's limit, results in request order
+        start = time.perf_counter()
+        response = await call_tool_batch(batch(
+            *SLEEPS,
+            ("fast", "echo", {"text": "hi"}),
+            ("fast", "fail", {}),
+            ("missing", "echo", {"text": "x"})
+        ))
+        elapsed = time.perf_counter() - start
+        results = response["results"]
+        print(f"9 calls in {elapsed:.2f}s (6 x 0.3s sleeps, 3 at a time): "
+              f"{[(r['index'], r['status'], r['duration_ms']) for r in results]}")
+        assert [r["index"] for r in results] == list(range(9))
+        assert 0.6 <= elapsed < 1.2, elapsed  # two waves of three, not six sequential sleeps
+        assert all(r["status"] == "ok" and r["result"]["content"][0]["text"] == "slept" for r in results[:6])
+        assert results[6]["result"]["content"][0]["text"].startswith("hi")
+        assert results[7]["status"] == "error" and results[7]["result"]["isError"]
+        assert results[8]["error_type"] == "not_found" and "missing" in results[8]["error"]
+        assert response["completed"] == 7 and response["failed"] == 2
+        assert mcp_manager.policies["limited"].limit.running == 0
+
+        # 2. Streaming: lines arrive as calls finish, tagged with their index, then a summary
+        response = await call_tool_batch(batch(*SLEEPS[:2], ("fast", "echo", {"text": "first"}), stream=True))
+        lines = [json.loads(line) async for line in response.body_iterator]
+        print("Streamed:", [(line["type"], line.get("index")) for line in lines])
+        assert lines[0]["index"] == 2 and lines[0]["status"] == "ok"
+        assert sorted(line["index"] for line in lines[:3]) == [0, 1, 2]
+        assert lines[-1] == {"type": "done", "completed": 3, "failed": 0, "duration_ms": lines[-1]["duration_ms"]}
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_call_batch():
+    asyncio.run(run_call_batch())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_call_batch()
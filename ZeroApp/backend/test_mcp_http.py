@@ -0,0 +1,98 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from app.core.mcp.client import MCPClient
+from app.core.mcp.manager import mcp_manager
+from test_mcp_startup import MOCK_SERVER, write_config
+from test_mcp_supervisor import pid_of, wait_for
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def start_http_server(port):
+    """The shared server: one long-lived process that every worker connects to"""
+    process = subprocess.Popen([sys.executable, MOCK_SERVER, "--port", str(port)])
+    async with httpx.AsyncClient() as probe:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                await probe.get(f"http://127.0.0.1:{port}/mcp")
+                return process
+            except httpx.TransportError:
+                assert time.monotonic() < deadline and process.poll() is None
+                await asyncio.sleep(0.05)
+
+def stop(process):
+    process.terminate()
+    process.wait()
+
+async def run_http():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/mcp"
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({"shared": {"transport": "http", "url": url}})
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    process = await start_http_server(port)
+    other_worker = MCPClient("shared", url, url=url)
+    try:
+        await mcp_manager.initialize_from_config()
+        status = mcp_manager.server_status("shared")
+        assert status["state"] == "connected" and status["transport"] == "http"
+        assert "echo" in [t["name"] for t in mcp_manager.get_all_tools() if t["_server"] == "shared"]
+
+        # 1. Two workers, one server process
+        await other_worker.connect()
+        mine = pid_of(await mcp_manager.call_tool("shared", "echo", {"text": "a"}))
+        theirs = pid_of(await other_worker.call_tool("echo", {"text": "b"}))
+        assert mine == theirs == process.pid
+
+        # 2. Calls reuse one keep-alive connection (the notification stream holds another)
+        client = mcp_manager.clients["shared"]
+        local_ports = set()
+        async def record(response):
+            if response.request.method == "POST":
+                local_ports.add(response.extensions["network_stream"].get_extra_info("client_addr")[1])
+        client._http.event_hooks["response"].append(record)
+        start = time.perf_counter()
+        for i in range(50):
+            await mcp_manager.call_tool("shared", "echo", {"text": f"c{i}"})
+        print(f"50 calls over HTTP in {time.perf_counter() - start:.2f}s on {len(local_ports)} connection(s)")
+        assert len(local_ports) == 1
+
+        # 3. Server restarted between calls: its 404 for our old session means the call never
+        #    ran, so the manager reconnects and resends it
+        stop(process)
+        process = await start_http_server(port)
+        assert pid_of(await mcp_manager.call_tool("shared", "echo", {"text": "d"})) == process.pid
+        await wait_for(lambda: mcp_manager.server_status("shared")["state"] == "connected")
+        assert mcp_manager.server_status("shared")["restarts"] == 1
+
+        # 4. Server down: the call fails fast instead of hanging, then waits for the reconnect
+        stop(process)
+        call = asyncio.create_task(mcp_manager.call_tool("shared", "echo", {"text": "e"}))
+        await asyncio.sleep(0.5)
+        assert not call.done() and mcp_manager.server_status("shared")["state"] == "reconnecting"
+        process = await start_http_server(port)
+        assert pid_of(await call) == process.pid
+        print("After two server restarts:", {k: v for k, v in mcp_manager.server_status("shared").items()
+                                               if k in ("state", "restarts", "last_error")})
+    finally:
+        await other_worker.close()
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+        stop(process)
+
+def test_mcp_http():
+    asyncio.run(run_http())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_http()
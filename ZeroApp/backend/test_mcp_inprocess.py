@@ -0,0 +1,87 @@
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from app.core.mcp import inprocess
+from app.core.mcp.manager import mcp_manager
+from test_mcp_startup import MOCK_SERVER, mock_server, write_config
+
+CALLS = 200
+
+async def latencies(server):
+    samples = []
+    for i in range(CALLS):
+        start = time.perf_counter()
+        await mcp_manager.call_tool(server, "echo", {"text": f"p{i}"})
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def run_inprocess():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({
+        "piped": mock_server(0),
+        "local": {"command": "python", "args": [MOCK_SERVER], "transport": "inprocess"},
+        "github": {"command": "python", "args": ["../mcp_servers/github_mcp.py"],
+                   "env": {"GITHUB_TOKEN": "ghp-inprocess"}, "transport": "inprocess", "lifecycle": "lazy"}
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    token_before = os.environ.get("GITHUB_TOKEN")
+    try:
+        await mcp_manager.initialize_from_config()
+        assert all(mcp_manager.status[n]["state"] in ("connected", "idle") for n in ("piped", "local", "github"))
+
+        # 1. Same tools and answers, but no subprocess: the handler runs in this process
+        tools = lambda server: sorted(t["name"] for t in mcp_manager.get_all_tools() if t["_server"] == server)
+        assert tools("local") == tools("piped")
+        result = await mcp_manager.call_tool("local", "echo", {"text": "hi"})
+        assert result.content[0].text == f"hi (pid {os.getpid()})"
+        assert mcp_manager.server_status("local")["transport"] == "inprocess"
+        assert mcp_manager.server_status("piped")["transport"] == "stdio"
+
+        # 2. Latency comparison over the full manager call path
+        await latencies("piped")  # warm up both
+        await latencies("local")
+        piped, local = await latencies("piped"), await latencies("local")
+        for label, samples in (("stdio", piped), ("inprocess", local)):
+            p95 = statistics.quantiles(samples, n=20)[-1]
+            print(f"{label:>9}: median {statistics.median(samples):.3f}ms, p95 {p95:.3f}ms over {CALLS} calls")
+        assert statistics.median(local) < statistics.median(piped)
+
+        # 3. Restart and lazy stop/start work the same; a real first-party server loads with its env
+        client = mcp_manager.clients["local"]
+        await client.restart()
+        assert (await mcp_manager.call_tool("local", "echo", {"text": "again"})).content[0].text.startswith("again")
+        assert "search_repositories" in tools("github")
+        github = lambda: next(m for path, (env, m) in inprocess._modules.items()
+                              if path.endswith("github_mcp.py") and mcp_manager.clients["github"].server is m.server)
+        assert github().GITHUB_TOKEN == "ghp-inprocess" and os.environ.get("GITHUB_TOKEN") == token_before
+        assert await mcp_manager.clients["github"].stop_if_idle(0)
+        assert not mcp_manager.clients["github"].connected
+
+        # 4. A reload with a rotated token imports the server again and replaces the old module
+        previous = github()
+        pooled = await previous.get_client()
+        config = mcp_manager.load_config()
+        config["servers"]["github"]["env"]["GITHUB_TOKEN"] = "ghp-rotated"
+        mcp_manager.config_path = write_config(config["servers"])
+        await mcp_manager.reload_server_from_config("github")
+        assert github().GITHUB_TOKEN == "ghp-rotated" and os.environ.get("GITHUB_TOKEN") == token_before
+        assert all(m is not previous for _, m in inprocess._modules.values())
+        await asyncio.sleep(0.05)
+        assert pooled.is_closed  # the replaced module's HTTP pool is shut down, not leaked
+        local = lambda: next(m for path, (env, m) in inprocess._modules.items() if path.endswith("mock_mcp_server.py"))
+        module = local()
+        await mcp_manager.reload_server_from_config("local")  # unchanged env: same module, same state
+        assert local() is module
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_inprocess():
+    asyncio.run(run_inprocess())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_inprocess()
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import tempfile
+from app.core.mcp.manager import mcp_manager
+from test_mcp_startup import mock_server, write_config
+
+async def wait_for_state(name, state, timeout=10.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while mcp_manager.server_status(name).get("state") != state:
+        assert loop.time() < deadline, mcp_manager.server_status(name)
+        await asyncio.sleep(0.05)
+
+async def run_lifecycle():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({
+        "lazy": mock_server(0, lifecycle="lazy", idle_timeout=1.0),
+        "eager": mock_server(0)
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    try:
+        # 1. No cached schemas yet: the lazy server is spawned once to learn its tools, then stops when idle
+        await mcp_manager.initialize_from_config()
+        status = mcp_manager.server_status("lazy")
+        print("First start:", status)
+        assert status["running"] and status["spawns"] == 1 and os.path.exists(mcp_manager.tools_cache_path)
+        await wait_for_state("lazy", "idle")
+        assert not mcp_manager.clients["lazy"].connected
+        assert mcp_manager.server_status("eager")["running"]
+
+        # 2. Cold start with cached schemas: tools are advertised, nothing is spawned
+        await mcp_manager.shutdown()
+        await mcp_manager.initialize_from_config()
+        status = mcp_manager.server_status("lazy")
+        print("Cold start:", status)
+        assert status["state"] == "idle" and status["spawns"] == 0 and not status["running"]
+        lazy_tools = sorted(t["name"] for t in mcp_manager.get_all_tools() if t["_server"] == "lazy")
+        assert lazy_tools == ["add_tool", "echo", "fail", "sleep"], lazy_tools
+        assert mcp_manager.is_idempotent("lazy", "echo")
+
+        # 3. A burst of first calls pays for one spawn
+        results = await asyncio.gather(*[mcp_manager.call_tool("lazy", "echo", {"text": f"m{i}"}) for i in range(8)])
+        pids = {r.content[0].text.split("pid ")[1] for r in results}
+        status = mcp_manager.server_status("lazy")
+        print("After burst:", status)
+        assert len(pids) == 1 and status["spawns"] == 1 and status["state"] == "connected"
+
+        # 4. Calls keep it alive; a long call isn't interrupted by the idle timer
+        await mcp_manager.call_tool("lazy", "sleep", {"seconds": 1.5})
+        assert mcp_manager.clients["lazy"].connected
+
+        # 5. Idle shutdown, then the next call spawns again
+        await wait_for_state("lazy", "idle")
+        result = await mcp_manager.call_tool("lazy", "echo", {"text": "again"})
+        assert result.content[0].text.split("pid ")[1] not in pids
+        assert mcp_manager.server_status("lazy")["spawns"] == 2
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_lifecycle():
+    asyncio.run(run_lifecycle())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_lifecycle()
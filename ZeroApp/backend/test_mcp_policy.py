@@ -0,0 +1,127 @@
+import asyncio
+import os
+import tempfile
+import time
+from fastapi import HTTPException
+from app.api.endpoints.mcp import ToolCallRequest, call_tool, list_servers
+from app.core.mcp.manager import mcp_manager
+from app.core.mcp.policy import CircuitBreaker, CircuitOpenError, ServerPolicy
+from test_mcp_startup import mock_server, write_config
+
+def check_breaker():
+    breaker = CircuitBreaker("t", {"failure_ratio": 0.5, "min_calls": 4, "window": 60, "open_seconds": 0.2, "half_open_probes": 2})
+    for ok in (True, False, True):
+        breaker.before_call()
+        breaker.record(ok)
+    assert breaker.state == "closed"  # 1 of 3 failed, and too few calls anyway
+    breaker.before_call()
+    breaker.record(False)
+    assert breaker.state == "open"  # 2 of 4
+    try:
+        breaker.before_call()
+        assert False, "open breaker should reject"
+    except CircuitOpenError as e:
+        assert "2 of its last 4 calls failed" in str(e)
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    breaker.before_call()
+    try:
+        breaker.before_call()  # only two probes at a time
+        assert False
+    except CircuitOpenError:
+        pass
+    breaker.record(True)
+    breaker.abandon()  # second probe was cancelled: its slot frees up
+    breaker.before_call()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.snapshot()["calls"] == 0
+
+    breaker._open()
+    time.sleep(0.25)
+    breaker.before_call()
+    breaker.record(False)  # a failed probe opens it again
+    assert breaker.state == "open" and breaker.trips == 3
+
+async def run_policy():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({
+        "svc": mock_server(0, timeout=5, tools={
+            "sleep": {"timeout": 0.3, "max_concurrency": 1,
+                      "circuit_breaker": {"min_calls": 2, "failure_ratio": 0.5, "open_seconds": 0.5}}
+        })
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    try:
+        await mcp_manager.initialize_from_config()
+
+        # 1. Per-tool timeout: a slow call gives up at 0.3s, not the default 30s
+        start = time.perf_counter()
+        try:
+            await mcp_manager.call_tool("svc", "sleep", {"seconds": 2})
+            assert False, "should time out"
+        except RuntimeError as e:
+            elapsed = time.perf_counter() - start
+            print(f"Timed out after {elapsed:.2f}s: {e}")
+            assert "0.3s" in str(e) and elapsed < 1.0
+
+        # 2. Per-tool concurrency limit: calls run one at a time
+        start = time.perf_counter()
+        await asyncio.gather(*[mcp_manager.call_tool("svc", "sleep", {"seconds": 0.1}) for _ in range(2)])
+        assert time.perf_counter() - start >= 0.2
+        assert mcp_manager.policies["svc"].tool_limits["sleep"].running == 0
+
+        # 3. Failures trip the tool's breaker: further calls fail instantly, other tools are unaffected
+        for _ in range(2):
+            try:
+                await mcp_manager.call_tool("svc", "sleep", {"seconds": 2})
+            except (RuntimeError, CircuitOpenError):
+                pass
+        start = time.perf_counter()
+        try:
+            await mcp_manager.call_tool("svc", "sleep", {"seconds": 0})
+            assert False, "breaker should be open"
+        except CircuitOpenError as e:
+            print(f"Rejected in {(time.perf_counter() - start) * 1000:.1f}ms: {e}")
+            assert time.perf_counter() - start < 0.01 and "try a different tool" in str(e)
+        assert (await mcp_manager.call_tool("svc", "echo", {"text": "ok"})).content[0].text.startswith("ok")
+
+        # 4. Breaker state is visible on /mcp/servers; /mcp/call answers 503 + Retry-After
+        servers = await list_servers()
+        policy = servers[0]["detail"]["policy"]
+        print("Policy:", policy)
+        assert policy["tools"]["sleep"]["circuit"]["state"] == "open"
+        assert policy["circuit"]["state"] == "closed" and policy["timeout"] == 5
+        try:
+            await call_tool(ToolCallRequest(server_name="svc", tool_name="sleep", arguments={"seconds": 0}))
+            assert False
+        except HTTPException as e:
+            assert e.status_code == 503 and int(e.headers["Retry-After"]) >= 1
+
+        # A reload with the same breaker settings keeps the open breaker; changed settings start fresh
+        breaker = mcp_manager.policies["svc"].tool_breakers["sleep"]
+        await mcp_manager.reload_server_from_config("svc")
+        assert mcp_manager.policies["svc"].tool_breakers["sleep"] is breaker
+        assert breaker.state != "closed"  # open, or half-open if the restart outlasted open_seconds
+        changed = ServerPolicy("svc", {"tools": {"sleep": {"circuit_breaker": {"min_calls": 3}}}})
+        changed.carry_over(mcp_manager.policies["svc"])
+        assert changed.tool_breakers["sleep"].state == "closed"
+        assert changed.breaker is mcp_manager.policies["svc"].breaker  # server-wide settings unchanged
+
+        # 5. After open_seconds one probe goes through and closes it
+        await asyncio.sleep(0.55)
+        await mcp_manager.call_tool("svc", "sleep", {"seconds": 0})
+        assert mcp_manager.server_status("svc")["policy"]["tools"]["sleep"]["circuit"]["state"] == "closed"
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_policy():
+    check_breaker()
+    asyncio.run(run_policy())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_policy()
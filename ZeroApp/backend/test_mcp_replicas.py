@@ -0,0 +1,67 @@
+import asyncio
+import os
+import signal
+import tempfile
+import time
+from app.core.mcp.manager import mcp_manager
+from test_mcp_startup import MOCK_SERVER, write_config
+from test_mcp_supervisor import pid_of, wait_for
+
+CALLS = 24
+LATENCY = 0.1
+
+def blocking_server(**extra):
+    # Each process handles one call at a time, like a handler wrapping a sync SDK client
+    return {"command": "python", "args": [MOCK_SERVER, "--tool-latency", str(LATENCY), "--blocking"], **extra}
+
+async def burst(server):
+    start = time.perf_counter()
+    results = await asyncio.gather(*[mcp_manager.call_tool(server, "echo", {"text": f"q{i}"}) for i in range(CALLS)])
+    return time.perf_counter() - start, [pid_of(r) for r in results]
+
+async def run_replicas():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({
+        "single": blocking_server(),
+        "pooled": blocking_server(replicas=4)
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    try:
+        await mcp_manager.initialize_from_config()
+        status = mcp_manager.server_status("pooled")
+        assert status["state"] == "connected" and len(status["replicas"]) == 4
+        # One tool list, fetched by the primary only
+        assert len([t for t in mcp_manager.get_all_tools() if t["_server"] == "pooled"]) == 4
+        assert all(not c.tools for c in mcp_manager.replicas["pooled"][1:])
+
+        # 1. Throughput scales with replicas; calls spread evenly (least outstanding first)
+        single_s, _ = await burst("single")
+        pooled_s, pids = await burst("pooled")
+        spread = sorted(pids.count(p) for p in set(pids))
+        print(f"{CALLS} calls x {LATENCY * 1000:.0f}ms: 1 replica {single_s:.2f}s ({CALLS / single_s:.0f}/s), "
+              f"4 replicas {pooled_s:.2f}s ({CALLS / pooled_s:.0f}/s), calls per replica {spread}")
+        assert spread == [6, 6, 6, 6]
+        assert single_s / pooled_s > 2.5, (single_s, pooled_s)
+
+        # 2. A dead replica is routed around while the supervisor restarts it
+        victim = mcp_manager.replicas["pooled"][1]
+        victim_pid = pid_of(await mcp_manager._call_on("pooled", victim, "echo", {"text": "x"}))
+        os.kill(victim_pid, signal.SIGTERM)
+        await asyncio.sleep(0.3)
+        await mcp_manager.check_health()
+        assert mcp_manager.server_status("pooled")["state"] == "degraded"
+        _, pids = await burst("pooled")
+        assert victim_pid not in pids
+        await wait_for(lambda: mcp_manager.server_status("pooled")["restarts"] == 1)
+        assert mcp_manager.server_status("pooled")["state"] == "connected"
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_replicas():
+    asyncio.run(run_replicas())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_replicas()
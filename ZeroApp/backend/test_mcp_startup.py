@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from app.core.mcp.manager import mcp_manager
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_mcp_server.py")
+
+def mock_server(delay, **extra):
+    return {"command": sys.executable, "args": [MOCK_SERVER, "--startup-delay", str(delay)], **extra}
+
+def write_config(servers):
+    path = os.path.join(tempfile.mkdtemp(), "mcp_config.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"servers": servers}, f)
+    return path
+
+async def run_startup():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({
+        "a": mock_server(1.0),
+        "b": mock_server(1.0),
+        "c": mock_server(1.0),
+        "slow": mock_server(10.0, startup_timeout=2.0),
+        "off": mock_server(0, enabled=False)
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    try:
+        # 1. Startup returns immediately; servers show up as connecting
+        start = time.perf_counter()
+        task = mcp_manager.start_background_initialization()
+        assert time.perf_counter() - start < 0.05
+        await asyncio.sleep(0)
+        print("Status right after startup:", {n: s["state"] for n, s in mcp_manager.status.items()})
+        assert mcp_manager.status["a"]["state"] == "connecting"
+        assert mcp_manager.status["off"]["state"] == "disabled"
+        assert mcp_manager.start_background_initialization() is task
+
+        # 2. Servers connect concurrently: ~max(delay), not the sum
+        while any(mcp_manager.status[n]["state"] == "connecting" for n in "abc"):
+            await asyncio.sleep(0.05)
+        healthy = time.perf_counter() - start
+        connect_s = sum(mcp_manager.status[n]["connect_ms"] for n in "abc") / 1000
+        print(f"a/b/c connected after {healthy:.2f}s (sequential would take {connect_s:.2f}s)")
+        assert all(mcp_manager.status[n]["state"] == "connected" for n in "abc")
+        assert healthy < 0.6 * connect_s, (healthy, connect_s)
+
+        # 3. A server that misses its startup timeout fails without holding up the rest
+        await task
+        total = time.perf_counter() - start
+        print(f"Init finished after {total:.2f}s:", mcp_manager.status["slow"])
+        assert mcp_manager.status["slow"]["state"] == "failed"
+        assert "timed out" in mcp_manager.status["slow"]["error"]
+        assert "slow" not in mcp_manager.clients
+        assert total < healthy + 1.0, (total, healthy)  # did not wait out the slow server's boot
+
+        # 4. Connected servers work, and can be closed from a task other than the one that opened them
+        result = await mcp_manager.call_tool("a", "echo", {"text": "hi"})
+        assert result.content[0].text.startswith("hi")
+        await asyncio.create_task(mcp_manager.remove_server("b"))
+        assert "b" not in mcp_manager.clients and "b" not in mcp_manager.status
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_startup():
+    asyncio.run(run_startup())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_startup()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import signal
+import tempfile
+import time
+from mcp.shared.exceptions import McpError
+from app.core.config import settings
+from app.core.mcp.manager import mcp_manager
+from test_mcp_startup import mock_server, write_config
+
+def pid_of(result):
+    return int(result.content[0].text.split("pid ")[1].rstrip(")"))
+
+async def crash(server):
+    pid = pid_of(await mcp_manager.call_tool(server, "echo", {"text": "whoami"}))
+    os.kill(pid, signal.SIGTERM)
+    await asyncio.sleep(0.3)  # let the pipes close
+    return pid
+
+async def wait_for(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.05)
+
+async def run_supervisor():
+    original = (mcp_manager.config_path, mcp_manager.tools_cache_path, settings.MCP_HEALTH_INTERVAL)
+    mcp_manager.config_path = write_config({
+        "queued": mock_server(0),
+        "fast_fail": mock_server(0, on_unavailable="fail")
+    })
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    settings.MCP_HEALTH_INTERVAL = 0.2
+    try:
+        await mcp_manager.initialize_from_config()
+
+        # 1. Backoff grows exponentially with jitter and is capped
+        for attempt in range(1, 12):
+            ceiling = min(settings.MCP_RECONNECT_MAX_DELAY, settings.MCP_RECONNECT_BASE_DELAY * 2 ** (attempt - 1))
+            assert ceiling / 2 <= mcp_manager._backoff(attempt) <= ceiling
+
+        # 2. Calls hitting a dead server trigger one reconnect, wait for it and then succeed
+        old_pid = await crash("queued")
+        results = await asyncio.gather(
+            *[mcp_manager.call_tool("queued", "echo", {"text": f"m{i}"}) for i in range(5)],
+            mcp_manager.call_tool("queued", "sleep", {"seconds": 0}),  # not idempotent, but never delivered
+            return_exceptions=True
+        )
+        print("After crash:", [r if isinstance(r, BaseException) else r.content[0].text for r in results])
+        assert not [r for r in results if isinstance(r, BaseException)]
+        assert {pid_of(r) for r in results[:5]} != {old_pid}
+        status = mcp_manager.server_status("queued")
+        print("Status:", status)
+        assert status["state"] == "connected" and status["restarts"] == 1 and status["uptime_s"] < 5
+
+        # 3. The supervisor finds a dead server with no traffic at all
+        mcp_manager.start_supervisor()
+        await crash("queued")
+        await wait_for(lambda: mcp_manager.server_status("queued")["restarts"] == 2)
+        assert "ping failed" in mcp_manager.server_status("queued")["last_error"]
+
+        # 4. A non-idempotent call in flight during the crash may have run, so it is not resent
+        pid = pid_of(await mcp_manager.call_tool("queued", "echo", {"text": "x"}))
+        call = asyncio.create_task(mcp_manager.call_tool("queued", "sleep", {"seconds": 5}))
+        await asyncio.sleep(0.3)
+        os.kill(pid, signal.SIGTERM)
+        try:
+            await call
+            assert False, "in-flight call should fail"
+        except McpError as e:
+            print("In-flight call:", e)
+        await wait_for(lambda: mcp_manager.server_status("queued")["restarts"] == 3)
+
+        # 5. on_unavailable=fail: calls during the reconnect fail fast instead of queueing
+        await crash("fast_fail")
+        start = time.perf_counter()
+        try:
+            await mcp_manager.call_tool("fast_fail", "sleep", {"seconds": 0})
+            assert False, "should fail fast"
+        except RuntimeError as e:
+            print(f"Fast fail after {(time.perf_counter() - start) * 1000:.0f}ms: {e}")
+            assert "reconnecting" in str(e) and time.perf_counter() - start < 0.1
+        await wait_for(lambda: mcp_manager.server_status("fast_fail")["restarts"] == 1)
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path, settings.MCP_HEALTH_INTERVAL = original
+
+def test_mcp_supervisor():
+    asyncio.run(run_supervisor())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_supervisor()
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from app.core.mcp.manager import mcp_manager
+from app.services.agent.zero_agent import ZeroAgent
+from test_mcp_startup import mock_server, write_config
+
+def advertised(server):
+    return sorted(t["name"] for t in mcp_manager.get_all_tools() if t["_server"] == server)
+
+async def run_tool_schemas():
+    original_paths = mcp_manager.config_path, mcp_manager.tools_cache_path
+    mcp_manager.config_path = write_config({"svc": mock_server(1.5)})
+    mcp_manager.tools_cache_path = os.path.join(tempfile.mkdtemp(), "mcp_tools_cache.json")
+    agent = ZeroAgent()
+    try:
+        # First run learns the tools and persists them
+        await mcp_manager.initialize_from_config()
+        tools = advertised("svc")
+        await mcp_manager.shutdown()
+        assert advertised("svc") == []
+
+        # 1. Cold start: cached tools are advertised before the server has connected...
+        mcp_manager.start_background_initialization()
+        await asyncio.sleep(0)
+        assert mcp_manager.status["svc"]["state"] == "connecting"
+        assert advertised("svc") == tools, advertised("svc")
+        # ...and calling one waits for the connection instead of failing
+        start = time.perf_counter()
+        result = await mcp_manager.call_tool("svc", "echo", {"text": "early"})
+        print(f"Cold-start call answered after {time.perf_counter() - start:.2f}s")
+        assert result.content[0].text.startswith("early")
+
+        # 2. No changes, no work: same version, same converted schemas
+        version = mcp_manager.tools_version
+        _, first = agent._get_tools(include_internal=True)
+        _, second = agent._get_tools(include_internal=True)
+        assert second is first and mcp_manager.tools_version == version
+        assert mcp_manager.get_all_tools() == mcp_manager.get_all_tools()
+
+        # 3. tools/list_changed: the client re-lists, the version moves, the agent and the disk cache follow
+        await mcp_manager.call_tool("svc", "add_tool", {"name": "fresh"})
+        deadline = time.monotonic() + 5
+        while mcp_manager.tools_version == version:
+            assert time.monotonic() < deadline, "no list_changed refresh"
+            await asyncio.sleep(0.02)
+        print(f"Tools version {version} -> {mcp_manager.tools_version}: {advertised('svc')}")
+        assert "fresh" in advertised("svc")
+        _, updated = agent._get_tools(include_internal=True)
+        assert "fresh" in [t["function"]["name"] for t in updated]
+        with open(mcp_manager.tools_cache_path, encoding="utf-8") as f:
+            assert "fresh" in [t["name"] for t in json.load(f)["servers"]["svc"]["tools"]]
+        assert (await mcp_manager.call_tool("svc", "fresh", {"text": "new"})).content[0].text == "new"
+    finally:
+        await mcp_manager.shutdown()
+        mcp_manager.status.clear()
+        mcp_manager.config_path, mcp_manager.tools_cache_path = original_paths
+
+def test_mcp_tool_schemas():
+    asyncio.run(run_tool_schemas())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mcp_tool_schemas()
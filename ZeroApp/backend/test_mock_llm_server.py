@@ -0,0 +1,76 @@
+import asyncio
+import time
+from app.core.config import settings
+from app.core.llm import LLMFactory
+from app.services.agent.zero_agent import ZeroAgent
+from mock_llm_server import MockConfig, create_app
+from test_llm_router import reset_llm, serve
+
+SCRIPT = [
+    {"content": "Let me check.", "tool_calls": [{"name": "read_memory", "arguments": {"filename": "missing_note.md"}}]},
+    {"content": "Nothing stored yet."}
+]
+
+async def run_mock_flow(url, app):
+    settings.LLM_PROVIDERS = [{"name": "mock", "api_key": "k", "base_url": url}]
+    settings.LLM_MAX_ATTEMPTS = 3
+    try:
+        await check_mock_flow(LLMFactory.get_client(), app)
+    finally:
+        await reset_llm()
+
+async def check_mock_flow(client, app):
+    messages = [{"role": "user", "content": "hi"}]
+    # The first stream pays one-off import / model-building costs in the openai client
+    async for _ in await client.chat.completions.create(model="mock", messages=messages, stream=True, cache=False):
+        pass
+
+    # 1. Streaming honours time-to-first-token and tokens/sec
+    start = time.perf_counter()
+    stream = await client.chat.completions.create(model="mock", messages=messages, stream=True, cache=False)
+    first, parts = None, []
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            first = first or time.perf_counter() - start
+            parts.append(chunk.choices[0].delta.content)
+    total = time.perf_counter() - start
+    print(f"TTFT {first * 1000:.0f}ms, {len(parts)} tokens in {total * 1000:.0f}ms")
+    assert "".join(parts) == "one two three four five"
+    assert 0.2 <= first < 0.4
+    assert total >= 0.2 + 4 / 40
+
+    # 2. Scripted tool calls drive the real agent loop
+    app.state.config.script = SCRIPT
+    response = await ZeroAgent().chat([{"role": "user", "content": "what do you remember?"}])
+    tool_messages = [m for m in response.messages if m.get("role") == "tool"]
+    print(f"Agent reply: {response.content!r}, tool results: {len(tool_messages)}")
+    assert response.content == "Nothing stored yet."
+    assert len(tool_messages) == 1
+    assert app.state.stats.tool_turns == 1
+    app.state.config.script = []
+
+    # 3. 429 injection is retried by the router
+    app.state.config.rate_limit_rate = 1.0
+    app.state.config.retry_after = 0.05
+    before = app.state.stats.requests
+    try:
+        await client.chat.completions.create(model="mock", messages=messages, cache=False)
+        assert False, "every attempt was rate limited"
+    except Exception as e:
+        print(f"Rate limited as expected: {type(e).__name__}")
+    assert app.state.stats.requests - before == settings.LLM_MAX_ATTEMPTS
+    assert app.state.stats.rate_limited >= settings.LLM_MAX_ATTEMPTS
+
+def test_mock_llm_server():
+    print("Testing Mock LLM Server...")
+    app = create_app(MockConfig(ttft=0.2, tokens_per_second=40, reply="one two three four five", seed=1))
+    server, url = serve(app)
+    try:
+        asyncio.run(run_mock_flow(url, app))
+    finally:
+        settings.LLM_PROVIDERS = []
+        server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_mock_llm_server()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from app.core.llm import LLMClient, LLMFactory
+from app.core.mcp.manager import mcp_manager
+from app.core.prompt_prefix import PrefixTracker, prefix_hashes
+from app.services.agent.zero_agent import ZeroAgent
+import app.services.agent.zero_agent as agent_module
+from test_single_flight import StreamingRouter
+
+class RecordingRouter(StreamingRouter):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def create(self, priority=0, **kwargs):
+        self.requests.append(json.loads(json.dumps(kwargs, default=str)))
+        return await super().create(priority, **kwargs)
+
+MCP_TOOLS = [
+    {"name": "zeta_search", "description": "z", "inputSchema": {"type": "object", "properties": {"q": {"type": "string"}}}, "_server": "b"},
+    {"name": "alpha_lookup", "description": "a", "inputSchema": {"properties": {"id": {"type": "string"}}, "type": "object"}, "_server": "a"},
+]
+
+async def run_turns(agent, router):
+    history = [{"role": "user", "content": "first question"}]
+    turns = [
+        (MCP_TOOLS, "[10:00:01] Type: DAILY_CHAT\nContent: hello"),
+        # Servers reconnected in the other order and new volatile context
+        (list(reversed(MCP_TOOLS)), "[10:05:42] Type: FRESH_TRENDS\nContent: uploaded file"),
+    ]
+    for tools, context in turns:
+        mcp_manager.get_all_tools = lambda tools=tools: [dict(t) for t in tools]
+        mcp_manager.tools_version += 1  # as if the servers had reconnected
+        async for event in agent.chat_generator(history, module_name="default", context_data=context, conversation_id="conv-1"):
+            if event["type"] == "content_delta":
+                reply = event["content"]
+        assert not history[-1]["content"].startswith("[SHORT TERM MEMORY")  # caller's history untouched
+        history = history + [{"role": "assistant", "content": "answer"}, {"role": "user", "content": "follow up"}]
+    # A one-off request without a conversation id isn't tracked (it would clobber other requests' prefixes)
+    async for _ in agent.chat_generator([{"role": "user", "content": "unrelated"}], module_name="default"):
+        pass
+
+def test_prompt_prefix():
+    print("Testing stable prompt prefix...")
+    router = RecordingRouter()
+    original_client, original_tools = LLMFactory.get_client, mcp_manager.get_all_tools
+    original_tracker = agent_module.prefix_tracker
+    LLMFactory.get_client = classmethod(lambda cls: LLMClient(router))
+    agent_module.prefix_tracker = PrefixTracker()
+    try:
+        asyncio.run(run_turns(ZeroAgent(), router))
+    finally:
+        LLMFactory.get_client = original_client
+        mcp_manager.get_all_tools = original_tools
+
+    first, second, _ = router.requests
+    dump = lambda value: json.dumps(value, ensure_ascii=False)
+    # Persona + module system prompt and tool schemas are byte-identical across turns
+    assert dump(first["messages"][0]) == dump(second["messages"][0])
+    assert dump(first["tools"]) == dump(second["tools"])
+    assert [t["function"]["name"] for t in first["tools"]] == sorted(t["function"]["name"] for t in first["tools"])
+    assert "SHORT TERM MEMORY" not in first["messages"][0]["content"]
+
+    # Volatile context is a preamble of the newest user message, never a mid-conversation system message
+    roles = [m["role"] for m in second["messages"]]
+    print(f"Second turn layout: {roles}")
+    assert roles == ["system", "user", "assistant", "user"]
+    assert second["messages"][3]["content"].startswith("[SHORT TERM MEMORY / CONTEXT]\n[10:05:42]")
+    assert second["messages"][3]["content"].endswith("\n\nfollow up")
+    assert second["messages"][1]["content"] == "first question"
+
+    stats = agent_module.prefix_tracker.stats()
+    agent_module.prefix_tracker = original_tracker
+    print(f"Prefix stats: {stats}")
+    assert stats["turns"] == 1 and stats["stable_rate"] == 1.0
+    # Only the first turn's context-carrying user message fell out of the shared prefix
+    assert stats["shared_prefix_rate"] == round(2 / 3, 3)
+
+    # Anything that breaks the prefix earlier counts as changed
+    tools = [{"type": "function", "function": {"name": "alpha_lookup"}}]
+    base = [{"role": "system", "content": "persona"}, {"role": "user", "content": "q1"},
+            {"role": "assistant", "content": "a1"}, {"role": "user", "content": "q2"}]
+    grown = base + [{"role": "assistant", "content": "a2"}, {"role": "user", "content": "q3"}]
+    variants = {
+        "grown": (True, "m", grown, tools),
+        "system prompt": (False, "m", [{"role": "system", "content": "persona v2"}] + grown[1:], tools),
+        "model": (False, "other", grown, tools),
+        "tools": (False, "m", grown, []),
+        "truncated": (False, "m", grown[:1] + grown[3:], tools),
+    }
+    for name, (expected, model, messages, request_tools) in variants.items():
+        tracker = PrefixTracker()
+        tracker.observe("k", prefix_hashes("m", base, tools))
+        assert tracker.observe("k", prefix_hashes(model, messages, request_tools)) is expected, name
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_prompt_prefix()
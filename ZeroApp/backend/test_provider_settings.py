@@ -0,0 +1,39 @@
+import asyncio
+import os
+import tempfile
+from app.api.endpoints.settings import SettingsUpdate, get_settings, update_settings
+from app.core.config import settings
+
+STORED = [
+    {"name": "main", "provider": "openai", "api_key": "sk-live-1234567890"},
+    {"name": "short", "provider": "deepseek", "api_key": "abc123"},
+    {"name": "spare", "provider": "siliconflow", "api_key": "sf-old-key-0000"},
+]
+
+async def run_round_trip():
+    # What the settings page shows, edited and posted back
+    shown = (await get_settings())["llm_providers"]
+    print("Masked:", [p["api_key"] for p in shown])
+    assert [p["api_key"] for p in shown] == ["sk-...7890", "", "sf-...0000"]
+    shown[2]["api_key"] = "sf-new-key-1111"
+    shown.append({"name": "added", "provider": "openai", "api_key": None})
+    await update_settings(SettingsUpdate(llm_providers=shown))
+
+    keys = {p["name"]: p["api_key"] for p in settings.LLM_PROVIDERS}
+    # Unchanged masked keys (including a short one masked as "") keep the stored secret
+    assert keys == {"main": "sk-live-1234567890", "short": "abc123", "spare": "sf-new-key-1111", "added": ""}
+
+def test_provider_settings():
+    print("Testing provider key round trip...")
+    original_providers, original_cwd = settings.LLM_PROVIDERS, os.getcwd()
+    settings.LLM_PROVIDERS = [dict(p) for p in STORED]
+    os.chdir(tempfile.mkdtemp())  # save_user_settings writes data/user_settings.json under the cwd
+    try:
+        asyncio.run(run_round_trip())
+    finally:
+        os.chdir(original_cwd)
+        settings.LLM_PROVIDERS = original_providers
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_provider_settings()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.llm import LLMFactory
+from app.core.llm_router import StreamRelay
+from app.core.rate_limiter import RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, parse_duration
+from test_llm_router import reset_llm, serve
+
+def make_throttled_provider(rejections):
+    """Answers 429 + Retry-After for the first `rejections` calls, then succeeds with limit headers"""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    async def completions(body: dict):
+        app.state.calls += 1
+        if app.state.calls <= rejections:
+            return JSONResponse({"error": {"message": "slow down"}}, status_code=429, headers={"retry-after-ms": "300"})
+        return JSONResponse({
+            "id": "c", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+        }, headers={"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "42"})
+
+    return app
+
+async def run_priority_order():
+    # 60 rpm = one request per second once the initial burst is spent
+    limiter = RateLimiter(rpm=60, tpm=0)
+    order = []
+
+    async def worker(name, priority, delay):
+        await asyncio.sleep(delay)
+        await limiter.acquire(1, priority)
+        order.append(name)
+
+    limiter.requests.tokens = 0.9  # next token in ~0.1s
+    await asyncio.gather(
+        worker("tags", PRIORITY_BACKGROUND, 0),
+        worker("chat", PRIORITY_INTERACTIVE, 0.02),
+    )
+    print(f"Served order: {order}")
+    assert order == ["chat", "tags"]
+
+async def throttled_wait(limiter):
+    limiter.requests.tokens = 0.9  # next token in ~0.1s, so acquire() waits on the condition
+    await limiter.acquire(1)
+
+class FakeStream:
+    def __init__(self, chunks, error=None):
+        self.chunks, self.error, self.closed = list(chunks), error, False
+
+    async def __anext__(self):
+        if self.chunks:
+            return self.chunks.pop(0)
+        if self.error:
+            raise self.error
+        raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+async def run_stream_settle():
+    limiter = RateLimiter(rpm=0, tpm=600)
+    provider = SimpleNamespace(limiter=limiter, stats=SimpleNamespace(record_failure=lambda: None))
+    chunk = lambda usage=None: SimpleNamespace(choices=[], usage=usage and SimpleNamespace(total_tokens=usage))
+    tokens = lambda: round(limiter.tokens.tokens)
+
+    # Finished stream: the final usage chunk replaces the estimate
+    await limiter.acquire(100)
+    stream = FakeStream([chunk(), chunk(10)])
+    relay = StreamRelay(provider, stream, stream, chunk(), estimate=100)
+    assert len([c async for c in relay]) == 3
+    await relay.aclose()  # settles once only
+    assert tokens() == 590, tokens()
+
+    # Aborted stream: the estimate stands
+    await limiter.acquire(100)
+    stream = FakeStream([chunk()], error=ConnectionError("reset"))
+    relay = StreamRelay(provider, stream, stream, chunk(), estimate=100)
+    try:
+        async for _ in relay:
+            pass
+        assert False, "should raise"
+    except ConnectionError:
+        pass
+    assert tokens() == 490, tokens()
+
+async def run_retry_after(url, app):
+    settings.LLM_PROVIDERS = [{"name": "throttled", "api_key": "k", "base_url": url, "rpm": 1000, "tpm": 0}]
+    try:
+        await check_retry_after(LLMFactory.get_client(), app)
+    finally:
+        await reset_llm()
+
+async def check_retry_after(client, app):
+    start = time.perf_counter()
+    response = await client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+    elapsed = time.perf_counter() - start
+    limiter = client.router.primary.limiter
+    print(f"Recovered after 429 in {elapsed * 1000:.0f}ms, limiter: {limiter.snapshot()}")
+    assert response.choices[0].message.content == "ok"
+    assert app.state.calls == 2
+    assert elapsed >= 0.3
+    assert limiter.rate_limited == 1
+    # Adapted to the advertised limit (95% of 100) and synced to the remaining quota
+    assert limiter.requests.capacity == 95.0
+    assert limiter.requests.tokens <= 42
+
+def test_rate_limiter():
+    print("Testing Rate Limiter...")
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("2") == 2
+
+    asyncio.run(run_priority_order())
+    asyncio.run(run_stream_settle())
+
+    # One limiter, two event loops (module-level routers outlive a test's or TestClient's loop)
+    limiter = RateLimiter(rpm=60, tpm=0)
+    asyncio.run(throttled_wait(limiter))
+    asyncio.run(throttled_wait(limiter))
+
+    app = make_throttled_provider(rejections=1)
+    server, url = serve(app)
+    try:
+        asyncio.run(run_retry_after(url, app))
+    finally:
+        settings.LLM_PROVIDERS = []
+        server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_rate_limiter()
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from app.core.config import settings
+from app.core.llm import LLMClient
+from app.core.semantic_cache import SemanticCache, embed
+import app.core.llm as llm_module
+from test_llm_cache import FakeRouter
+
+SYSTEM = {"role": "system", "content": "You are ZERO."}
+
+async def run_semantic_flow():
+    router = FakeRouter()
+    client = LLMClient(router)
+    ask = lambda content, scope="chat_send:default", **kw: client.chat.completions.create(
+        model="m", messages=[SYSTEM, {"role": "user", "content": content}],
+        temperature=0.7, semantic_scope=scope, **kw)
+
+    # 1. Shadow mode: would-be hits are counted but the LLM is still called
+    settings.LLM_SEMANTIC_CACHE_MODE = "shadow"
+    await ask("what are the latest tech trends?")
+    await ask("what are the newest tech trends?")
+    stats = llm_module.semantic_cache.stats()
+    print(f"Shadow stats: {stats}")
+    assert router.calls == 2
+    assert stats["shadow_hits"] == 1 and stats["would_be_hit_rate"] == 0.5
+
+    # 2. On: near-duplicate is served from the cache
+    settings.LLM_SEMANTIC_CACHE_MODE = "on"
+    response = await ask("What are the latest tech trends ?")
+    assert router.calls == 2
+    assert response.choices[0].message.content.startswith("answer")
+
+    # 3. Unrelated prompt, other module, other system prompt or stateful history all miss
+    await ask("write me a poem about rain")
+    await ask("what are the latest tech trends?", scope="chat_send:writer")
+    await client.chat.completions.create(
+        model="m", messages=[{"role": "system", "content": "Other"}, {"role": "user", "content": "what are the latest tech trends?"}],
+        semantic_scope="chat_send:default")
+    await client.chat.completions.create(
+        model="m", semantic_scope="chat_send:default",
+        messages=[SYSTEM, {"role": "user", "content": "hi"}, {"role": "assistant", "content": "yo"},
+                  {"role": "user", "content": "what are the latest tech trends?"}])
+    assert router.calls == 6
+
+    # 4. No scope or explicit bypass never uses it
+    await ask("what are the latest tech trends?", scope=None)
+    await ask("what are the latest tech trends?", cache=False)
+    assert router.calls == 8
+    print(f"Final stats: {llm_module.semantic_cache.stats()}")
+
+    # 5. Groups are bounded: least recently used system prompts are dropped, stale ones expire
+    cache = llm_module.semantic_cache
+    settings.LLM_SEMANTIC_CACHE_MAX_GROUPS = 3
+    await ask("what are the latest tech trends?")  # refresh the default group
+    for i in range(4):
+        await client.chat.completions.create(
+            model="m", messages=[{"role": "system", "content": f"Persona {i}"}, {"role": "user", "content": "hello"}],
+            semantic_scope="chat_send:default")
+    assert len(cache._groups) == 3 and cache.evictions >= 2
+    calls = router.calls
+    await client.chat.completions.create(
+        model="m", messages=[{"role": "system", "content": "Persona 3"}, {"role": "user", "content": "hello"}],
+        semantic_scope="chat_send:default")
+    assert router.calls == calls  # the most recent group survived
+    settings.LLM_CACHE_TTL = 0.005
+    time.sleep(0.05)
+    await client.chat.completions.create(
+        model="m", messages=[{"role": "system", "content": "Persona 3"}, {"role": "user", "content": "hello"}],
+        semantic_scope="chat_send:default")
+    assert router.calls == calls + 1 and len(cache._groups) == 1
+
+def test_semantic_cache():
+    print("Testing Semantic Cache...")
+    a = embed("latest tech trends", settings.LLM_SEMANTIC_CACHE_DIM)
+    b = embed("newest tech trends", settings.LLM_SEMANTIC_CACHE_DIM)
+    c = embed("recipe for banana bread", settings.LLM_SEMANTIC_CACHE_DIM)
+    print(f"similar: {float(a @ b):.3f}, unrelated: {float(a @ c):.3f}")
+    assert float(a @ b) > float(a @ c) + 0.3
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        embed("what are the latest tech trends in short video?", settings.LLM_SEMANTIC_CACHE_DIM)
+    print(f"Embedding: {(time.perf_counter() - start):.3f}ms per prompt")
+
+    original_cache, original_mode, original_threshold = llm_module.semantic_cache, settings.LLM_SEMANTIC_CACHE_MODE, settings.LLM_SEMANTIC_CACHE_THRESHOLD
+    original_exact = settings.LLM_CACHE_ENABLED
+    original_groups, original_ttl = settings.LLM_SEMANTIC_CACHE_MAX_GROUPS, settings.LLM_CACHE_TTL
+    llm_module.semantic_cache = SemanticCache()
+    settings.LLM_CACHE_ENABLED = False
+    settings.LLM_SEMANTIC_CACHE_THRESHOLD = 0.8
+    try:
+        asyncio.run(run_semantic_flow())
+    finally:
+        llm_module.semantic_cache = original_cache
+        settings.LLM_SEMANTIC_CACHE_MODE = original_mode
+        settings.LLM_SEMANTIC_CACHE_THRESHOLD = original_threshold
+        settings.LLM_CACHE_ENABLED = original_exact
+        settings.LLM_SEMANTIC_CACHE_MAX_GROUPS, settings.LLM_CACHE_TTL = original_groups, original_ttl
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_semantic_cache()
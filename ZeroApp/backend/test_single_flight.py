@@ -0,0 +1,139 @@
+import asyncio
+import gc
+import time
+import mcp.types as types
+from openai.types.chat import ChatCompletionChunk
+from app.core.llm import LLMClient, llm_flight
+from app.core.mcp.manager import mcp_manager
+from app.core.single_flight import SingleFlight
+from app.services.tavily_service import TavilyService
+from test_llm_cache import FakeRouter
+
+class StreamingRouter(FakeRouter):
+    async def create(self, priority=0, **kwargs):
+        if not kwargs.get("stream"):
+            return await super().create(priority, **kwargs)
+        self.calls += 1
+
+        async def chunks():
+            for i in range(5):
+                await asyncio.sleep(0.02)
+                yield ChatCompletionChunk.model_validate({
+                    "id": "s", "object": "chat.completion.chunk", "created": 0, "model": kwargs["model"],
+                    "choices": [{"index": 0, "delta": {"content": f"t{i} "}}]
+                })
+        return chunks()
+
+class SlowTavily:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, **kwargs):
+        self.calls += 1
+        time.sleep(0.2) # the real client blocks
+        return {"results": [{"title": query, "url": "http://x", "content": "c"}]}
+
+class FakeMCPClient:
+    connected = True
+
+    def __init__(self):
+        self.calls = 0
+        self.active_calls = 0
+        self.tools = [
+            types.Tool(name="search", inputSchema={"type": "object"}, annotations=types.ToolAnnotations(readOnlyHint=True)),
+            types.Tool(name="create_issue", inputSchema={"type": "object"})
+        ]
+
+    async def call_tool(self, tool_name, arguments=None, timeout=30.0):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"tool": tool_name, "call": self.calls}
+
+async def run_single_flight():
+    # 1. Plain calls: one execution, shared result and shared error
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    results = await asyncio.gather(*[flight.do("k", work) for _ in range(10)])
+    assert results == ["value"] * 10 and len(runs) == 1
+    assert flight.stats()["coalesced"] == 9 and flight.stats()["in_flight"] == 0
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+    outcomes = await asyncio.gather(*[flight.do("f", fail) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+    # 2. LLM completions: identical requests share one upstream call, streams fan out
+    router = StreamingRouter()
+    client = LLMClient(router)
+    request = {"model": "m", "messages": [{"role": "user", "content": "dashboard refresh"}], "temperature": 0.9}
+    responses = await asyncio.gather(*[client.chat.completions.create(**request) for _ in range(5)])
+    assert router.calls == 1 and len({r.id for r in responses}) == 1
+
+    async def read(stream):
+        return "".join([c.choices[0].delta.content async for c in stream])
+    streams = await asyncio.gather(*[client.chat.completions.create(stream=True, **request) for _ in range(5)])
+    texts = await asyncio.gather(*[read(s) for s in streams])
+    print(f"Fanned-out streams: {texts[0]!r} x {len(texts)}")
+    assert router.calls == 2 and texts == ["t0 t1 t2 t3 t4 "] * 5
+
+    # A subscriber that never iterates still gives its seat back, so a lone reader can hang up
+    reader = await client.chat.completions.create(stream=True, **request)
+    idle = await client.chat.completions.create(stream=True, **request)
+    broadcast = next(iter(llm_flight._streams.values()))
+    assert broadcast.subscribers == 2
+    del idle
+    gc.collect()
+    assert broadcast.subscribers == 1
+    await reader.__anext__()
+    await reader.aclose()
+    assert broadcast.subscribers == 0
+    await asyncio.sleep(0)
+    assert broadcast.task.done() and router.calls == 3
+
+    # cache=False asks for independent samples
+    await asyncio.gather(*[client.chat.completions.create(cache=False, **request) for _ in range(3)])
+    assert router.calls == 6
+
+    # 3. Tavily: concurrent identical searches -> one (non-blocking) request
+    tavily = TavilyService()
+    fake = SlowTavily()
+    tavily._get_client = lambda: fake
+    start = time.perf_counter()
+    hunts = await asyncio.gather(*[tavily.search("latest tech trends") for _ in range(5)], tavily.search("other"))
+    elapsed = time.perf_counter() - start
+    print(f"6 searches, {fake.calls} upstream calls, {elapsed * 1000:.0f}ms")
+    assert fake.calls == 2 and elapsed < 0.35
+    assert hunts[0][0]["title"] == "latest tech trends"
+    # Joined callers don't share result dicts
+    hunts[0][0]["entropy"] = 0.5
+    assert "entropy" not in hunts[1][0]
+
+    # 4. MCP: only tools marked read-only / idempotent are coalesced
+    fake_mcp = FakeMCPClient()
+    mcp_manager.clients["fake"] = fake_mcp
+    try:
+        await asyncio.gather(*[mcp_manager.call_tool("fake", "search", {"q": "x"}) for _ in range(4)])
+        assert fake_mcp.calls == 1
+        await asyncio.gather(*[mcp_manager.call_tool("fake", "create_issue", {"title": "x"}) for _ in range(2)])
+        assert fake_mcp.calls == 3
+        mcp_manager.idempotent_tools["fake"] = ["create_issue"]
+        await asyncio.gather(*[mcp_manager.call_tool("fake", "create_issue", {"title": "x"}) for _ in range(2)])
+        assert fake_mcp.calls == 4
+    finally:
+        mcp_manager.clients.pop("fake", None)
+        mcp_manager.idempotent_tools.pop("fake", None)
+
+def test_single_flight():
+    print("Testing Single Flight...")
+    asyncio.run(run_single_flight())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_single_flight()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.sse import coalesce_deltas
+from app.main import app
+from mock_llm_server import MockConfig, create_app
+from test_llm_router import reset_llm, serve
+
+async def token_stream(tokens, gap=0.0, stall_after=None):
+    for i, token in enumerate(tokens):
+        if stall_after is not None and i == stall_after:
+            await asyncio.sleep(0.2)
+        elif gap:
+            await asyncio.sleep(gap)
+        if token == "TOOL":
+            yield {"type": "tool_start", "tool": "search"}
+        else:
+            yield {"type": "content_delta", "content": token}
+
+async def collect(events, window_ms, max_bytes=512):
+    return [(time.perf_counter(), e) async for e in coalesce_deltas(events, window_ms, max_bytes)]
+
+async def run_coalescer():
+    tokens = [f"w{i} " for i in range(200)]
+
+    # 1. Fast stream collapses into a handful of frames, text preserved
+    frames = await collect(token_stream(tokens), window_ms=40)
+    text = "".join(e["content"] for _, e in frames)
+    print(f"200 deltas -> {len(frames)} frames")
+    assert text == "".join(tokens) and len(frames) < 10
+
+    # 2. Byte threshold caps frame size
+    frames = await collect(token_stream(tokens), window_ms=1000, max_bytes=100)
+    assert all(len(e["content"]) < 110 for _, e in frames) and len(frames) > 5
+
+    # 3. Tool events flush pending text first and keep their order
+    frames = await collect(token_stream(["a", "b", "TOOL", "c"]), window_ms=1000)
+    assert [e for _, e in frames] == [
+        {"type": "content_delta", "content": "ab"},
+        {"type": "tool_start", "tool": "search"},
+        {"type": "content_delta", "content": "c"},
+    ]
+
+    # 4. An upstream stall does not hold text back past the window
+    start = time.perf_counter()
+    frames = await collect(token_stream(["x", "y", "z"], stall_after=2), window_ms=30)
+    assert frames[0][1]["content"] == "xy"
+    assert frames[0][0] - start < 0.1
+
+    # 5. Window 0 passes every event through
+    frames = await collect(token_stream(tokens[:20]), window_ms=0)
+    assert len(frames) == 20
+    # ...and so does a byte cap of 0
+    frames = await collect(token_stream(tokens[:20]), window_ms=1000, max_bytes=0)
+    assert len(frames) == 20
+
+def stream_frames(client, **options):
+    frames = []
+    with client.stream("POST", "/api/v1/chat/stream", json={"message": "hi", **options}) as response:
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                frames.append(json.loads(line[6:]))
+    return frames
+
+def test_sse_coalescing():
+    print("Testing SSE delta coalescing...")
+    asyncio.run(run_coalescer())
+
+    # End to end against the mock LLM: the client negotiates the policy per request
+    mock = create_app(MockConfig(ttft=0.01, tokens_per_second=1000, reply="token " * 150))
+    server, url = serve(mock)
+    settings.LLM_PROVIDERS = [{"name": "mock", "api_key": "k", "base_url": url}]
+    try:
+        with TestClient(app) as client: # one event loop for every request, like the real server
+            raw = stream_frames(client, coalesce_ms=0)
+            merged = stream_frames(client, coalesce_ms=50)
+            unmerged = stream_frames(client, coalesce_ms=50, coalesce_bytes=0)
+        print(f"/chat/stream frames: {len(raw)} raw vs {len(merged)} coalesced, {len(unmerged)} with coalesce_bytes=0")
+        text = lambda frames: "".join(f.get("content", "") for f in frames if f["type"] == "content_delta")
+        assert text(raw) == text(merged) == "token " * 150
+        assert len(merged) * 5 < len(raw)
+        # coalesce_bytes=0 turns merging off rather than falling back to the server default
+        deltas = lambda frames: [f for f in frames if f["type"] == "content_delta"]
+        assert text(unmerged) == text(raw) and len(deltas(unmerged)) == len(deltas(raw))
+    finally:
+        settings.LLM_PROVIDERS = []
+        asyncio.run(reset_llm())  # shutdown closed the pool; drop the client built on that loop
+        server.should_exit = True
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_sse_coalescing()
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp_servers"))
+# tavily_mcp sets up root logging for its own process; keep ours as it was
+_root = logging.getLogger()
+_handlers, _level = _root.handlers[:], _root.level
+import tavily_mcp
+_root.handlers[:], _root.level = _handlers, _level
+
+LATENCY = 0.2
+
+class FakeTavily:
+    """Stands in for AsyncTavilyClient: fixed latency, one page every query finds."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def search(self, query, search_depth, max_results, include_answer):
+        self.calls.append(query)
+        await asyncio.sleep(LATENCY)
+        if query == "boom":
+            raise RuntimeError("upstream 502")
+        results = [{"title": f"{query} {i}", "url": f"https://{query.replace(' ', '-')}.example/{i}",
+                    "content": f"about {query}", "score": 0.5} for i in range(max_results - 1)]
+        results.append({"title": "Overview", "url": "https://wiki.example/Agents/" if len(self.calls) % 2 else "https://WIKI.example/Agents",
+                        "content": "shared page", "score": 0.4})
+        return {"answer": f"{query}!", "results": results}
+
+async def call(name, **arguments):
+    return (await tavily_mcp.handle_call_tool(name, arguments))[0].text
+
+async def run_tavily_mcp():
+    fake = FakeTavily()
+    tavily_mcp._client = fake
+    tavily_mcp.TAVILY_API_KEY = "tvly-test"
+    try:
+        # 1. Searches run concurrently instead of blocking the server one at a time
+        start = time.perf_counter()
+        await asyncio.gather(*[call("tavily_search", query=f"topic {i}", max_results=3) for i in range(4)])
+        elapsed = time.perf_counter() - start
+        print(f"4 searches x {LATENCY * 1000:.0f}ms took {elapsed:.2f}s")
+        assert elapsed < 2 * LATENCY and len(fake.calls) == 4
+
+        # 2. TTL cache keyed on the parameters; concurrent duplicates share one request
+        text = await call("tavily_search", query="  Topic   0 ", max_results=3)
+        assert "topic 0 0" in text and len(fake.calls) == 4
+        await call("tavily_search", query="topic 0", max_results=4)  # different parameters
+        await asyncio.gather(*[call("tavily_search", query="fresh") for _ in range(3)])
+        assert len(fake.calls) == 6
+        assert tavily_mcp.stats["cache_hits"] == 1 and tavily_mcp.stats["in_flight_joins"] == 2
+
+        # A cancelled caller (client gone, tool timeout) doesn't cancel the search it shared
+        leader = asyncio.ensure_future(call("tavily_search", query="shared"))
+        await asyncio.sleep(0.01)
+        joiner = asyncio.ensure_future(call("tavily_search", query="shared"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert "shared 0" in await joiner and fake.calls.count("shared") == 1
+        assert leader.cancelled() and not tavily_mcp._in_flight
+
+        # 3. Batch: one round trip for several queries, merged and de-duplicated by URL
+        start = time.perf_counter()
+        text = await call("tavily_batch_search", queries=["llm agents", "mcp servers", "tool calling", "llm agents"],
+                          max_results=3, include_answer=True)
+        elapsed = time.perf_counter() - start
+        print(f"Batch of 4 queries took {elapsed:.2f}s:", next(l for l in text.splitlines() if l.startswith("**Search Results")))
+        assert elapsed < 2 * LATENCY and len(fake.calls) == 10
+        assert text.count("**Overview**") == 1 and "(matched 3 queries)" in text
+        assert "7 unique from 3 queries" in text and text.count("**Answer for") == 3
+        ranked = [line for line in text.splitlines() if line.startswith("- **")]
+        assert ranked[0] == "- **Overview**"
+
+        # 4. One failing query doesn't sink the batch
+        text = await call("tavily_batch_search", queries=["boom", "mcp servers"])
+        assert '**Error for "boom":** upstream 502' in text and "mcp-servers.example/0" in text
+
+        # 5. Entries expire after the TTL
+        tavily_mcp.CACHE_TTL = 0.05
+        await call("tavily_search", query="short lived")
+        await asyncio.sleep(0.1)
+        await call("tavily_search", query="short lived")
+        assert fake.calls.count("short lived") == 2
+    finally:
+        tavily_mcp._client = None
+        tavily_mcp._cache.clear()
+
+def test_tavily_mcp():
+    asyncio.run(run_tavily_mcp())
+    print("All tests passed!")
+
+if __name__ == "__main__":
+    test_tavily_mcp()
@@ -1,9 +1,14 @@
+import argparse
 import asyncio
 import os
 import json
 import logging
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
 import httpx
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import Server, NotificationOptions
@@ -17,14 +22,153 @@ GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
     logger.warning("GITHUB_TOKEN not found in environment variables. Some features may fail.")
 
-API_BASE = "https://api.github.com"
+API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com")
+
+# Stop and wait for the window to reset when this few requests are left...
+RATE_LIMIT_RESERVE = int(os.environ.get("GITHUB_RATE_LIMIT_RESERVE", "1"))
+# ...but never hold a tool call longer than this; report the limit to the model instead
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("GITHUB_RATE_LIMIT_MAX_WAIT", "20"))
+# Below this share of the window left, space requests out over the time until reset
+RATE_LIMIT_PACE_BELOW = 0.1
+ETAG_CACHE_SIZE = 256
 
 async def get_headers():
-    return {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
+    headers = {
         "Accept": "application/vnd.github.v3+json",
         "User-Agent": "ZeroAgent-MCP"
     }
+    if GITHUB_TOKEN:
+        headers["Authorization"] = f"Bearer {GITHUB_TOKEN}"
+    return headers
+
+class RateLimitError(RuntimeError):
+    pass
+
+class RateLimits:
+    """Last X-RateLimit-* values seen per resource ("core", "search", ...)."""
+
+    def __init__(self):
+        self.windows: Dict[str, Dict[str, float]] = {}
+        self.waited = 0.0
+
+    @staticmethod
+    def resource_for(path: str) -> str:
+        return "search" if path.startswith("/search/") else "core"
+
+    def update(self, response: httpx.Response, resource: str):
+        h = response.headers
+        if "X-RateLimit-Remaining" not in h:
+            return
+        resource = h.get("X-RateLimit-Resource", resource)
+        self.windows[resource] = {
+            "limit": float(h.get("X-RateLimit-Limit", 0)),
+            "remaining": float(h["X-RateLimit-Remaining"]),
+            "reset": float(h.get("X-RateLimit-Reset", 0))
+        }
+
+    async def before_request(self, resource: str):
+        window = self.windows.get(resource)
+        if not window:
+            return
+        until_reset = window["reset"] - time.time()
+        if until_reset <= 0:
+            return
+        if window["remaining"] <= RATE_LIMIT_RESERVE:
+            await self._wait(until_reset, f"GitHub {resource} rate limit exhausted")
+        elif window["limit"] and window["remaining"] < window["limit"] * RATE_LIMIT_PACE_BELOW:
+            await self._wait(min(until_reset / window["remaining"], RATE_LIMIT_MAX_WAIT), "pacing")
+        # Count this request now so concurrent calls see it; the response headers correct it
+        window["remaining"] -= 1
+
+    async def _wait(self, seconds: float, reason: str):
+        if seconds > RATE_LIMIT_MAX_WAIT:
+            raise RateLimitError(f"{reason}; it resets in {seconds:.0f}s. Try again later.")
+        logger.info(f"{reason}: waiting {seconds:.1f}s")
+        self.waited += seconds
+        await asyncio.sleep(seconds)
+
+rate_limits = RateLimits()
+
+# (path?query) -> (etag, payload); a 304 answer doesn't count against the rate limit
+etag_cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+stats = {"requests": 0, "not_modified": 0, "rate_limited": 0}
+
+_client: Optional[httpx.AsyncClient] = None
+
+async def get_client() -> httpx.AsyncClient:
+    """One pooled client per process: keep-alive connections instead of a TLS handshake per call."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE,
+            headers=await get_headers(),
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=120)
+        )
+    return _client
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delay-seconds or an HTTP-date; None if it is neither."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+def decode(response: httpx.Response) -> Any:
+    """JSON body, or an error payload for anything else (an HTML 502 from the edge, an empty 204)."""
+    if "json" in response.headers.get("Content-Type", ""):
+        try:
+            return response.json()
+        except ValueError:
+            pass
+    return {"error": response.status_code, "body": response.text}
+
+async def github_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """Send a request within the rate limit; a 403/429 rate-limit answer is waited out and retried once."""
+    client = await get_client()
+    resource = rate_limits.resource_for(path)
+    for attempt in range(2):
+        await rate_limits.before_request(resource)
+        stats["requests"] += 1
+        response = await client.request(method, path, **kwargs)
+        rate_limits.update(response, resource)
+        limited = response.status_code == 429 or (
+            response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0"
+        )
+        if not limited:
+            return response
+        stats["rate_limited"] += 1
+        wait = retry_after_seconds(response.headers.get("Retry-After"))
+        if wait is None:
+            wait = float(response.headers.get("X-RateLimit-Reset", time.time())) - time.time()
+        if attempt == 0:
+            await rate_limits._wait(max(wait, 0.0), f"GitHub {resource} rate limit hit")
+    return response
+
+async def github_get(path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+    """Conditional GET: revalidates cached answers with If-None-Match."""
+    key = f"{path}?{urlencode(sorted((params or {}).items()))}"
+    cached = etag_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = await github_request("GET", path, params=params, headers=headers)
+    if response.status_code == 304 and cached:
+        stats["not_modified"] += 1
+        etag_cache.move_to_end(key)
+        return 200, cached[1]
+    data = decode(response)
+    etag = response.headers.get("ETag")
+    if response.status_code == 200 and etag:
+        etag_cache[key] = (etag, data)
+        etag_cache.move_to_end(key)
+        while len(etag_cache) > ETAG_CACHE_SIZE:
+            etag_cache.popitem(last=False)
+    return response.status_code, data
 
 server = Server("github-mcp")
 
@@ -41,7 +185,8 @@ async def handle_list_tools() -> list[types.Tool]:
                     "limit": {"type": "integer", "default": 5}
                 },
                 "required": ["query"]
-            }
+            },
+            annotations=types.ToolAnnotations(readOnlyHint=True)
         ),
         types.Tool(
             name="create_issue",
@@ -63,7 +208,8 @@ async def handle_list_tools() -> list[types.Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {},
-            }
+            },
+            annotations=types.ToolAnnotations(readOnlyHint=True)
         )
     ]
 
@@ -75,54 +221,54 @@ async def handle_call_tool(
     if not arguments:
         arguments = {}
 
-    headers = await get_headers()
-    async with httpx.AsyncClient() as client:
-        
-        if name == "search_repositories":
-            query = arguments.get("query")
-            limit = arguments.get("limit", 5)
-            response = await client.get(
-                f"{API_BASE}/search/repositories",
-                params={"q": query, "per_page": limit},
-                headers=headers
-            )
+    if name == "search_repositories":
+        query = arguments.get("query")
+        limit = arguments.get("limit", 5)
+        status, data = await github_get("/search/repositories", {"q": query, "per_page": limit})
+        if status != 200:
+            return [types.TextContent(type="text", text=f"Search failed ({status}): {json.dumps(data)}")]
+        items = data.get("items", [])
+
+        result_text = ""
+        for item in items:
+            result_text += f"- {item['full_name']}: {item['html_url']} (Stars: {item['stargazers_count']})\n"
+
+        return [types.TextContent(type="text", text=result_text)]
+
+    elif name == "create_issue":
+        owner = arguments.get("owner")
+        repo = arguments.get("repo")
+        title = arguments.get("title")
+        body = arguments.get("body", "")
+
+        payload = {"title": title, "body": body}
+
+        response = await github_request("POST", f"/repos/{owner}/{repo}/issues", json=payload)
+        if response.status_code == 201:
             data = response.json()
-            items = data.get("items", [])
-            
-            result_text = ""
-            for item in items:
-                result_text += f"- {item['full_name']}: {item['html_url']} (Stars: {item['stargazers_count']})\n"
-                
-            return [types.TextContent(type="text", text=result_text)]
-
-        elif name == "create_issue":
-            owner = arguments.get("owner")
-            repo = arguments.get("repo")
-            title = arguments.get("title")
-            body = arguments.get("body", "")
-            
-            url = f"{API_BASE}/repos/{owner}/{repo}/issues"
-            payload = {"title": title, "body": body}
-            
-            response = await client.post(url, json=payload, headers=headers)
-            if response.status_code == 201:
-                data = response.json()
-                return [types.TextContent(type="text", text=f"Issue created: {data['html_url']}")]
-            else:
-                return [types.TextContent(type="text", text=f"Failed to create issue: {response.text}")]
-
-        elif name == "get_user_info":
-            response = await client.get(f"{API_BASE}/user", headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                return [types.TextContent(type="text", text=f"User: {data['login']}\nURL: {data['html_url']}")]
-            else:
-                return [types.TextContent(type="text", text=f"Failed to get user info: {response.text}")]
+            return [types.TextContent(type="text", text=f"Issue created: {data['html_url']}")]
+        else:
+            return [types.TextContent(type="text", text=f"Failed to create issue: {response.text}")]
 
+    elif name == "get_user_info":
+        status, data = await github_get("/user")
+        if status == 200:
+            return [types.TextContent(type="text", text=f"User: {data['login']}\nURL: {data['html_url']}")]
         else:
-            raise ValueError(f"Unknown tool: {name}")
+            return [types.TextContent(type="text", text=f"Failed to get user info: {json.dumps(data)}")]
+
+    else:
+        raise ValueError(f"Unknown tool: {name}")
 
 async def main():
+    parser = argparse.ArgumentParser(description="GitHub MCP server")
+    parser.add_argument("--port", type=int, help="serve streamable HTTP on this port instead of stdio")
+    args = parser.parse_args()
+    if args.port:
+        from http_transport import serve_http
+        await serve_http(server, args.port)
+        return
+
     # Run the server using stdin/stdout
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
@@ -0,0 +1,45 @@
+"""
+Serve an MCP server over streamable HTTP instead of stdio, so one long-lived process on
+localhost can be shared by every backend worker:
+
+    python github_mcp.py --port 8931
+
+and in mcp_config.json:
+
+    "github": {"transport": "http", "url": "http://127.0.0.1:8931/mcp"}
+"""
+import contextlib
+
+import uvicorn
+from mcp.server import Server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+
+class _SessionEndpoint:
+    """ASGI endpoint handing every request on the MCP path to the session manager"""
+
+    def __init__(self, manager: StreamableHTTPSessionManager):
+        self.manager = manager
+
+    async def __call__(self, scope, receive, send):
+        await self.manager.handle_request(scope, receive, send)
+
+
+def http_app(server: Server, path: str = "/mcp") -> Starlette:
+    # JSON replies are read to the end, so httpx keeps the connection alive for the next call;
+    # an SSE reply is abandoned once its result arrives, which costs a new connection per call
+    manager = StreamableHTTPSessionManager(app=server, json_response=True)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with manager.run():
+            yield
+
+    return Starlette(routes=[Route(path, endpoint=_SessionEndpoint(manager))], lifespan=lifespan)
+
+
+async def serve_http(server: Server, port: int, host: str = "127.0.0.1", path: str = "/mcp"):
+    config = uvicorn.Config(http_app(server, path), host=host, port=port, log_level="warning")
+    await uvicorn.Server(config).serve()
@@ -1,12 +1,18 @@
+import argparse
 import asyncio
 import os
+import json
 import logging
-from typing import Any, Dict, List
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 import mcp.types as types
 from mcp.server import Server, NotificationOptions
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,8 +22,79 @@ TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
 if not TAVILY_API_KEY:
     logger.warning("TAVILY_API_KEY not found in environment variables.")
 
+CACHE_TTL = float(os.environ.get("TAVILY_CACHE_TTL", "600"))
+CACHE_SIZE = 256
+MAX_BATCH_QUERIES = 8
+
 server = Server("tavily-mcp")
 
+_client: Optional[AsyncTavilyClient] = None
+
+def get_client() -> AsyncTavilyClient:
+    """One client (and connection pool) for the life of the server process."""
+    global _client
+    if _client is None:
+        _client = AsyncTavilyClient(api_key=TAVILY_API_KEY)
+    return _client
+
+# cache key -> (expires_at, response); in-flight searches are shared, so a batch
+# repeating a query (or two concurrent calls) hits the API once
+_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_in_flight: Dict[str, asyncio.Task] = {}
+stats = {"searches": 0, "cache_hits": 0, "in_flight_joins": 0}
+
+def cache_key(query: str, search_depth: str, max_results: int, include_answer: bool) -> str:
+    return json.dumps([" ".join(query.split()).lower(), search_depth, max_results, bool(include_answer)])
+
+async def search(query: str, search_depth: str = "basic", max_results: int = 5, include_answer: bool = False) -> Dict[str, Any]:
+    key = cache_key(query, search_depth, max_results, include_answer)
+    cached = _cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        stats["cache_hits"] += 1
+        _cache.move_to_end(key)
+        return cached[1]
+    task = _in_flight.get(key)
+    if task is not None:
+        stats["in_flight_joins"] += 1
+    else:
+        # The shared search runs as its own task: a caller that is cancelled (client gone,
+        # tool call timed out) stops waiting without cancelling it for everyone else
+        task = asyncio.ensure_future(_search(key, query, search_depth, max_results, include_answer))
+        _in_flight[key] = task
+        task.add_done_callback(partial(_finished, key))
+    return await asyncio.shield(task)
+
+def _finished(key: str, task: asyncio.Task):
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved when every caller had already given up
+
+async def _search(key: str, query: str, search_depth: str, max_results: int, include_answer: bool) -> Dict[str, Any]:
+    stats["searches"] += 1
+    response = await get_client().search(
+        query=query,
+        search_depth=search_depth,
+        max_results=max_results,
+        include_answer=include_answer
+    )
+    _cache[key] = (time.monotonic() + CACHE_TTL, response)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return response
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+def format_result(result: Dict[str, Any], note: str = "") -> str:
+    return (
+        f"- **{result['title']}**\n"
+        f"  {result['url']}{note}\n"
+        f"  {result['content'][:200]}...\n\n"
+    )
+
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     return [
@@ -46,7 +123,45 @@ async def handle_list_tools() -> list[types.Tool]:
                     }
                 },
                 "required": ["query"]
-            }
+            },
+            annotations=types.ToolAnnotations(readOnlyHint=True)
+        ),
+        types.Tool(
+            name="tavily_batch_search",
+            description=(
+                "Run several related web searches at once. Results are merged and de-duplicated by URL; "
+                "prefer this over consecutive tavily_search calls"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "minItems": 1,
+                        "maxItems": MAX_BATCH_QUERIES,
+                        "description": "The search queries"
+                    },
+                    "search_depth": {
+                        "type": "string",
+                        "enum": ["basic", "advanced"],
+                        "default": "basic",
+                        "description": "The depth of each search"
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "default": 5,
+                        "description": "Maximum number of results per query"
+                    },
+                    "include_answer": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Include a short answer per query generated by LLM"
+                    }
+                },
+                "required": ["queries"]
+            },
+            annotations=types.ToolAnnotations(readOnlyHint=True)
         )
     ]
 
@@ -55,7 +170,7 @@ async def handle_call_tool(
     name: str, arguments: dict | None
 ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     
-    if name != "tavily_search":
+    if name not in ("tavily_search", "tavily_batch_search"):
         raise ValueError(f"Unknown tool: {name}")
 
     if not arguments:
@@ -64,39 +179,82 @@ async def handle_call_tool(
     if not TAVILY_API_KEY:
         return [types.TextContent(type="text", text="Error: TAVILY_API_KEY not configured.")]
 
-    query = arguments.get("query")
     search_depth = arguments.get("search_depth", "basic")
     max_results = arguments.get("max_results", 5)
     include_answer = arguments.get("include_answer", False)
 
+    if name == "tavily_batch_search":
+        return await batch_search(arguments.get("queries") or [], search_depth, max_results, include_answer)
+
+    query = arguments.get("query")
+
     try:
-        tavily = TavilyClient(api_key=TAVILY_API_KEY)
-        response = tavily.search(
-            query=query,
-            search_depth=search_depth,
-            max_results=max_results,
-            include_answer=include_answer
-        )
-        
+        response = await search(query, search_depth, max_results, include_answer)
+
         # Format the output
         result_text = ""
-        
+
         if include_answer and "answer" in response:
             result_text += f"**Answer:** {response['answer']}\n\n"
-            
+
         result_text += "**Search Results:**\n"
         for result in response.get("results", []):
-            result_text += f"- **{result['title']}**\n"
-            result_text += f"  {result['url']}\n"
-            result_text += f"  {result['content'][:200]}...\n\n"
-            
+            result_text += format_result(result)
+
         return [types.TextContent(type="text", text=result_text)]
 
     except Exception as e:
         logger.error(f"Tavily search error: {e}")
         return [types.TextContent(type="text", text=f"Error executing search: {str(e)}")]
 
+async def batch_search(
+    queries: List[str], search_depth: str, max_results: int, include_answer: bool
+) -> list[types.TextContent]:
+    queries = list(dict.fromkeys(q for q in queries if q and q.strip()))[:MAX_BATCH_QUERIES]
+    if not queries:
+        raise ValueError("Missing queries")
+
+    responses = await asyncio.gather(
+        *[search(q, search_depth, max_results, include_answer) for q in queries],
+        return_exceptions=True
+    )
+
+    # Merge by URL: a page several queries found ranks above one that only one query found
+    merged: Dict[str, Dict[str, Any]] = {}
+    result_text = ""
+    for query, response in zip(queries, responses):
+        if isinstance(response, BaseException):
+            logger.error(f"Tavily search error for {query!r}: {response}")
+            result_text += f"**Error for \"{query}\":** {response}\n\n"
+            continue
+        if include_answer and response.get("answer"):
+            result_text += f"**Answer for \"{query}\":** {response['answer']}\n\n"
+        for result in response.get("results", []):
+            url = normalize_url(result["url"])
+            entry = merged.get(url)
+            if entry is None:
+                merged[url] = {"result": result, "queries": [query], "score": result.get("score", 0)}
+            else:
+                entry["queries"].append(query)
+                entry["score"] = max(entry["score"], result.get("score", 0))
+
+    ranked = sorted(merged.values(), key=lambda e: (len(e["queries"]), e["score"]), reverse=True)
+    result_text += f"**Search Results** ({len(ranked)} unique from {len(queries)} queries):\n"
+    for entry in ranked:
+        hits = len(entry["queries"])
+        result_text += format_result(entry["result"], f" (matched {hits} queries)" if hits > 1 else "")
+
+    return [types.TextContent(type="text", text=result_text)]
+
 async def main():
+    parser = argparse.ArgumentParser(description="Tavily MCP server")
+    parser.add_argument("--port", type=int, help="serve streamable HTTP on this port instead of stdio")
+    args = parser.parse_args()
+    if args.port:
+        from http_transport import serve_http
+        await serve_http(server, args.port)
+        return
+
     async with stdio_server() as (read, write):
         await server.run(
             read_stream=read,